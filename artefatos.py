@@ -0,0 +1,132 @@
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+import joblib
+import json
+import os
+from motor_arvores import EnsembleArvores
+
+# ==================== ARTEFATOS DO MODELO ====================
+# Convenções de nomes e leitura/gravação dos arquivos em artefatos_modelo,
+# compartilhadas entre o treinamento (main.py) e a interface (program.py).
+# Cada modelo fica em um arquivo próprio, para a interface carregar só os
+# que o usuário realmente escolher.
+#
+# Para inferência os modelos são abertos mapeados em memória (somente leitura):
+# o KNN via joblib mmap_mode, as árvores via os arrays achatados de
+# motor_arvores (o sklearn copiaria os nós das árvores ao desserializar).
+# Os arquivos joblib ficam sem compressão, senão não há o que mapear.
+
+ARQUIVO_LISTA_MODELOS = 'modelos_lista.json'
+# Pacote antigo com todos os modelos juntos, ainda lido como fallback
+ARQUIVO_TODOS_OS_MODELOS = 'todos_os_modelos.joblib'
+# Índice de busca aproximada usado no painel de filmes similares (indice_similaridade.py)
+DIRETORIO_INDICE_SIMILARES = 'indice_similares'
+# Títulos dos filmes de treino, na ordem das posições (titulos.py)
+DIRETORIO_TITULOS = 'titulos'
+# Estatísticas e conjunto de teste acumulados para a atualização incremental (atualizacao_incremental.py)
+DIRETORIO_ESTADO_INCREMENTAL = 'incremental'
+# Hashes e metadados do treino que gerou os arquivos (manifesto.py)
+ARQUIVO_MANIFESTO = 'manifesto.json'
+# Outras versões dos artefatos, lado a lado: artefatos_modelo/versoes/<nome>/ (main.py --versao)
+DIRETORIO_VERSOES = 'versoes'
+# Modelo escolhido por orçamento de latência/tamanho (custos_modelos.py); fica fora do manifesto,
+# pode ser refeito sem treinar
+ARQUIVO_SELECAO_MODELO = 'selecao_modelo.json'
+
+
+def nome_arquivo_modelo(nome):
+    """'Random Forest' -> 'modelo_random_forest.joblib'"""
+    return f"modelo_{nome.lower().replace(' ', '_')}.joblib"
+
+
+def diretorio_arvores(nome):
+    """'Random Forest' -> 'arvores_random_forest' (arrays .npy das árvores achatadas)"""
+    return f"arvores_{nome.lower().replace(' ', '_')}"
+
+
+def eh_modelo_de_arvores(modelo):
+    return hasattr(modelo, 'tree_') or hasattr(modelo, 'estimators_')
+
+
+def gravar_atomico(caminho, gravar):
+    """
+    Chama gravar(temporario) e troca o arquivo com os.replace: quem estiver lendo
+    (interface, servidor) vê o arquivo antigo inteiro ou o novo inteiro, nunca
+    um pela metade, e um arquivo antigo mapeado em memória não muda sob o leitor.
+    """
+    temporario = caminho + '.tmp'
+    gravar(temporario)
+    os.replace(temporario, caminho)
+
+
+def salvar_json(base_path, arquivo, valor, indent=None):
+    def gravar(temporario):
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump(valor, f, indent=indent)
+    gravar_atomico(os.path.join(base_path, arquivo), gravar)
+
+
+def salvar_modelos(output_dir, modelos):
+    """
+    Grava um arquivo por modelo e o índice nome -> arquivo. Retorna o índice.
+    Cada arquivo passa por gravar_atomico: uma interface ou um servidor aberto
+    pode estar com o arquivo antigo mapeado em memória, e sobrescrevê-lo no
+    lugar mudaria (ou truncaria) as páginas que ele está lendo.
+    """
+    lista = {}
+    for nome, modelo in modelos.items():
+        lista[nome] = nome_arquivo_modelo(nome)
+        gravar_atomico(os.path.join(output_dir, lista[nome]), lambda temporario: joblib.dump(modelo, temporario))
+        if eh_modelo_de_arvores(modelo):
+            EnsembleArvores.de_sklearn(modelo).salvar(os.path.join(output_dir, diretorio_arvores(nome)))
+    salvar_json(output_dir, ARQUIVO_LISTA_MODELOS, lista, indent=2)
+    return lista
+
+
+def carregar_json(base_path, arquivo):
+    with open(os.path.join(base_path, arquivo), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def listar_modelos(base_path):
+    """Nomes dos modelos disponíveis e seus arquivos, sem desserializar nenhum modelo."""
+    if os.path.exists(os.path.join(base_path, ARQUIVO_LISTA_MODELOS)):
+        return carregar_json(base_path, ARQUIVO_LISTA_MODELOS)
+    # Artefatos antigos: só o pacote único; os nomes vêm das métricas
+    metricas = carregar_json(base_path, 'metricas_modelos.json')
+    return {nome: ARQUIVO_TODOS_OS_MODELOS for nome in metricas}
+
+
+def carregar_modelo(base_path, nome, arquivo=None, mapeado=True):
+    """
+    Carrega um único modelo (ou o extrai do pacote antigo).
+    Com mapeado=True os arrays grandes ficam mapeados do disco, compartilhados
+    entre processos; modelos de árvores voltam como EnsembleArvores, que só
+    serve para prever (e só lê o joblib do estimador se receber um lote grande).
+    mapeado=False devolve sempre o estimador do sklearn.
+    """
+    arquivo = arquivo or nome_arquivo_modelo(nome)
+    if arquivo == ARQUIVO_TODOS_OS_MODELOS:
+        return joblib.load(os.path.join(base_path, arquivo))[nome]
+    if not mapeado:
+        return joblib.load(os.path.join(base_path, arquivo))
+    caminho_arvores = os.path.join(base_path, diretorio_arvores(nome))
+    if os.path.isdir(caminho_arvores):
+        return EnsembleArvores.carregar(caminho_arvores, mmap_mode='r',
+                                        arquivo_estimador=os.path.join(base_path, arquivo))
+    return joblib.load(os.path.join(base_path, arquivo), mmap_mode='r')
+
+
+def entrada_do_modelo(modelo, X, colunas):
+    """
+    Linhas já codificadas no formato que o modelo espera: DataFrame quando ele
+    guarda os nomes das colunas (modelos treinados com a matriz esparsa não
+    guardam) e, no KNN, no dtype das linhas de treino. Uma consulta em float64
+    contra um treino em float32 faria o sklearn converter o treino inteiro a
+    cada chamada.
+    """
+    treino = getattr(modelo, '_fit_X', None)
+    if treino is not None and not sp.issparse(X):
+        X = np.asarray(X, dtype=treino.dtype)
+    return pd.DataFrame(X, columns=colunas, copy=False) if hasattr(modelo, 'feature_names_in_') else X
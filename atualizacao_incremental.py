@@ -0,0 +1,545 @@
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+import copy
+import joblib
+import json
+import os
+import shutil
+import time
+import sklearn
+from collections import Counter
+from sklearn.metrics import accuracy_score, precision_score, f1_score
+from sklearn.tree._tree import Tree
+from preprocessamento import limpar_dataframe, COLUNAS_PARA_ESCALAR
+from ingestao import EstatisticasGlobais, eh_teste
+from features import multi_hot_esparso
+from artefatos import (listar_modelos, carregar_modelo, carregar_json, salvar_modelos, entrada_do_modelo,
+                       gravar_atomico, salvar_json,
+                       DIRETORIO_INDICE_SIMILARES, DIRETORIO_TITULOS, DIRETORIO_ESTADO_INCREMENTAL)
+from indice_similaridade import IndiceSimilaridade
+from fatores import Importancias
+from cenarios import AgregadosGeneroIdioma
+from titulos import acrescentar_titulos
+from manifesto import ler_manifesto, escrever_manifesto
+from custos_modelos import medir_custos, refazer_selecao
+from instrumentacao import etapa, ambiente, ARQUIVO_RELATORIO
+
+# ==================== ATUALIZAÇÃO INCREMENTAL ====================
+# Quando chegam filmes novos, `main.py --atualizar novos.csv` atualiza os
+# artefatos existentes só com as linhas novas, sem reler o CSV histórico:
+#
+#   estatísticas  a contagem dos orçamentos dá a mediana nova; o scaler continua
+#                 pelo partial_fit; gêneros/idiomas novos viram colunas no fim,
+#                 sem mudar a posição das antigas
+#   escala        o que já foi escalonado com o scaler antigo (árvores, linhas do
+#                 KNN, índice, teste) passa para o novo por uma transformação afim
+#                 exata: x_novo = x_antigo * escala + deslocamento
+#   Decision Tree a estrutura fica; as linhas novas descem pela árvore e
+#                 atualizam a proporção de classes e a impureza de cada nó
+#   Random Forest warm_start: árvores novas treinadas só nas linhas novas
+#   KNN           as linhas novas entram no fim do conjunto de treino
+#   outros        (Hist Gradient Boosting, Logistic Regression) treinados de novo,
+#                 depois dos demais, sobre o conjunto de treino acumulado do KNN
+#   similares     as linhas novas entram nas listas do índice, sem refazer o k-means
+#   gênero×idioma as linhas novas se somam à tabela de filmes e sucessos por par
+#   títulos       acrescentados ao fim da loja
+#
+# Os novos filmes de teste (mesma divisão por hash do modo streaming) se somam ao
+# conjunto de teste guardado, e as métricas são recalculadas sobre ele. A validação
+# cruzada e a busca de hiperparâmetros do treino completo saem das métricas: valiam
+# para os modelos de antes da atualização.
+#
+# Estado guardado pelo treino completo em artefatos_modelo/incremental:
+#   estado.json                linhas lidas, tamanhos, histórico das atualizações
+#   orcamentos.npy             orçamentos conhecidos e suas contagens
+#   X_teste.npy (ou .npz) / y_teste.npy
+
+ARQUIVO_ESTADO = 'estado.json'
+ARQUIVO_ORCAMENTOS = 'orcamentos.npy'
+# Entradas de metricas_modelos.json calculadas sobre o modelo do treino completo; caem na atualização
+DESATUALIZADAS_NA_ATUALIZACAO = ('validacao_cruzada', 'busca_hiperparametros')
+
+
+# ------------------------------ estado --------------------------------
+
+def _salvar_matriz(diretorio, nome, X):
+    if sp.issparse(X):
+        sp.save_npz(os.path.join(diretorio, f'{nome}.npz'), X.tocsr(), compressed=False)
+    else:
+        np.save(os.path.join(diretorio, f'{nome}.npy'), X.to_numpy() if isinstance(X, pd.DataFrame) else np.asarray(X))
+
+
+def _carregar_matriz(diretorio, nome):
+    caminho_esparso = os.path.join(diretorio, f'{nome}.npz')
+    if os.path.exists(caminho_esparso):
+        return sp.load_npz(caminho_esparso)
+    return np.load(os.path.join(diretorio, f'{nome}.npy'))
+
+
+def _salvar_estado(diretorio, estado):
+    with open(os.path.join(diretorio, ARQUIVO_ESTADO), 'w', encoding='utf-8') as f:
+        json.dump(estado, f, indent=2)
+
+
+def salvar_estado_incremental(output_dir, dados):
+    """Chamado pelo treino completo: guarda o que a atualização incremental precisa. Retorna o diretório."""
+    diretorio = os.path.join(output_dir, DIRETORIO_ESTADO_INCREMENTAL)
+    shutil.rmtree(diretorio, ignore_errors=True)
+    os.makedirs(diretorio)
+    _salvar_matriz(diretorio, 'X_teste', dados['X_test'])
+    np.save(os.path.join(diretorio, 'y_teste.npy'), np.asarray(dados['y_test'], dtype=np.int8))
+    np.save(os.path.join(diretorio, ARQUIVO_ORCAMENTOS), np.array(dados['orcamentos'], dtype=np.float64))
+    _salvar_estado(diretorio, {
+        'linhas_lidas': int(dados['linhas_lidas']),
+        'linhas_treino': int(dados['X_train'].shape[0]),
+        'linhas_teste': int(dados['X_test'].shape[0]),
+        'esparso': sp.issparse(dados['X_train']),
+        'reconstrucao': None,
+        'atualizacoes': [],
+    })
+    return diretorio
+
+
+def _tempo_reconstrucao(output_dir):
+    """Duração do último treino completo, lida do relatório das etapas antes de ele ser sobrescrito."""
+    try:
+        with open(os.path.join(output_dir, ARQUIVO_RELATORIO), 'r', encoding='utf-8') as f:
+            relatorio = json.load(f)
+    except (OSError, ValueError):
+        return None
+    contexto = relatorio.get('contexto', {})
+    if contexto.get('argumentos', {}).get('atualizar') or not contexto.get('linhas_treino'):
+        return None
+    return {'segundos': relatorio['segundos_total'], 'linhas_treino': contexto['linhas_treino']}
+
+
+# ------------------------- matrizes e escala --------------------------
+
+def transformacao_escala(scaler_antigo, scaler_novo, colunas):
+    """
+    (posicoes, escala, deslocamento) que levam as colunas numéricas escalonadas
+    com o scaler antigo para o novo: (bruto - m1) / s1 == x0 * (s0 / s1) + (m0 - m1) / s1.
+    """
+    nomes = list(getattr(scaler_novo, 'feature_names_in_', COLUNAS_PARA_ESCALAR))
+    posicoes = np.array([colunas.index(c) for c in nomes], dtype=np.intp)
+    escala = scaler_antigo.scale_ / scaler_novo.scale_
+    deslocamento = (scaler_antigo.mean_ - scaler_novo.mean_) / scaler_novo.scale_
+    return posicoes, escala, deslocamento
+
+
+def _reescalar(X, posicoes, escala, deslocamento):
+    """Aplica a transformação afim às colunas numéricas de uma matriz densa ou CSR."""
+    if sp.issparse(X):
+        X = X.tocsr()
+        fator = np.ones(X.shape[1])
+        fator[posicoes] = escala
+        # Os zeros implícitos também recebem o deslocamento, então ele entra como matriz à parte
+        n = X.shape[0]
+        soma = sp.csr_matrix((np.tile(deslocamento, n), np.tile(posicoes, n), np.arange(0, n * len(posicoes) + 1, len(posicoes))),
+                             shape=X.shape)
+        return (X @ sp.diags(fator) + soma).tocsr()
+    X = np.array(X, dtype=np.result_type(X.dtype, np.float32))
+    X[:, posicoes] = X[:, posicoes] * escala + deslocamento
+    return X
+
+
+def _alargar(X, n_colunas):
+    """Colunas zeradas no fim para o vocabulário novo."""
+    extra = n_colunas - X.shape[1]
+    if extra == 0:
+        return X
+    if sp.issparse(X):
+        return sp.hstack([X, sp.csr_matrix((X.shape[0], extra), dtype=X.dtype)], format='csr')
+    return np.hstack([X, np.zeros((X.shape[0], extra), dtype=X.dtype)])
+
+
+def _empilhar(X, X_novos):
+    if sp.issparse(X):
+        return sp.vstack([X, sp.csr_matrix(X_novos)], format='csr')
+    return np.vstack([X, np.asarray(X_novos, dtype=X.dtype)])
+
+
+def codificar_novos(df, scaler, colunas, generos, idiomas):
+    """Matriz densa das linhas novas, na ordem de `colunas`: numéricas escalonadas e multi-hot."""
+    posicao = {coluna: i for i, coluna in enumerate(colunas)}
+    X = np.zeros((len(df), len(colunas)))
+    nomes = list(getattr(scaler, 'feature_names_in_', COLUNAS_PARA_ESCALAR))
+    X[:, [posicao[c] for c in nomes]] = scaler.transform(df[nomes].astype('float64'))
+    for coluna, vocabulario in (('genres', generos), ('languages', idiomas)):
+        X[:, [posicao[v] for v in vocabulario]] += multi_hot_esparso(df[coluna], vocabulario).toarray()
+    return X
+
+
+# ------------------------------ modelos -------------------------------
+
+def _nova_arvore(arvore, n_features, nos, valores):
+    """Tree do sklearn com os nós e valores dados; n_features pode crescer (colunas novas nunca usadas)."""
+    nova = Tree(n_features, np.asarray(arvore.n_classes, dtype=np.intp), arvore.n_outputs)
+    nova.__setstate__({**arvore.__getstate__(), 'nodes': nos, 'values': valores})
+    return nova
+
+
+def _remapear_threshold(threshold, e, s):
+    """
+    As árvores comparam X convertido para float32; o threshold novo fica no meio
+    das imagens dos dois float32 vizinhos do antigo, e não em threshold * e + s,
+    para que o arredondamento não troque o lado de valores colados no corte.
+    """
+    abaixo = threshold.astype(np.float32)
+    abaixo = np.where(abaixo > threshold, np.nextafter(abaixo, np.float32(-np.inf)), abaixo)
+    acima = np.nextafter(abaixo, np.float32(np.inf))
+    imagem = lambda v: (v.astype(np.float64) * e + s).astype(np.float32).astype(np.float64)
+    return (imagem(abaixo) + imagem(acima)) / 2
+
+
+def _ajustar_arvore(estimador, n_features, posicoes, escala, deslocamento):
+    """
+    Leva os thresholds para a escala nova e a árvore para as colunas novas. As
+    decisões só mudam para valores a um ulp (float32) do corte.
+    """
+    estado = estimador.tree_.__getstate__()
+    nos = estado['nodes'].copy()
+    for posicao, e, s in zip(posicoes, escala, deslocamento):
+        divide = nos['feature'] == posicao
+        nos['threshold'][divide] = _remapear_threshold(nos['threshold'][divide], e, s)
+    estimador.tree_ = _nova_arvore(estimador.tree_, n_features, nos, estado['values'])
+    estimador.n_features_in_ = n_features
+
+
+def _impureza(fracoes, criterio):
+    if criterio == 'gini':
+        return 1.0 - (fracoes ** 2).sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return -np.nansum(np.where(fracoes > 0, fracoes * np.log2(fracoes), 0.0), axis=1)
+
+
+def _atualizar_contagens(estimador, X, y):
+    """
+    Warm start de uma árvore: a estrutura fica e as linhas novas descem por ela,
+    somando-se à proporção de classes, ao peso e à impureza de cada nó do caminho.
+    """
+    estado = estimador.tree_.__getstate__()
+    nos, valores = estado['nodes'].copy(), estado['values'].copy()
+    caminhos = estimador.decision_path(X)
+    classes = np.searchsorted(estimador.classes_, y)
+    por_classe = sp.csr_matrix((np.ones(len(classes)), (np.arange(len(classes)), classes)),
+                               shape=(len(classes), len(estimador.classes_)))
+    contagens = (caminhos.T @ por_classe).toarray()
+
+    peso = nos['weighted_n_node_samples']
+    # O sklearn guarda proporções desde a versão 1.4 e contagens antes dela
+    em_contagens = not np.allclose(valores[:, 0, :].sum(axis=1), 1.0)
+    totais = (valores[:, 0, :] if em_contagens else valores[:, 0, :] * peso[:, None]) + contagens
+    novo_peso = peso + contagens.sum(axis=1)
+    fracoes = totais / novo_peso[:, None]
+    valores[:, 0, :] = totais if em_contagens else fracoes
+    nos['weighted_n_node_samples'] = novo_peso
+    nos['n_node_samples'] += contagens.sum(axis=1).astype(np.int64)
+    nos['impurity'] = _impureza(fracoes, estimador.criterion)
+    estimador.tree_ = _nova_arvore(estimador.tree_, estimador.n_features_in_, nos, valores)
+
+
+def _renomear_colunas(modelo, colunas):
+    modelo.n_features_in_ = len(colunas)
+    if hasattr(modelo, 'feature_names_in_'):
+        modelo.feature_names_in_ = np.array(colunas, dtype=object)
+
+
+def arvores_novas_padrao(floresta, linhas_novas, linhas_treino):
+    """Árvores novas na proporção das linhas novas (ao menos uma)."""
+    return max(1, round(len(floresta.estimators_) * linhas_novas / max(linhas_treino, 1)))
+
+
+def atualizar_modelo(nome, modelo, X_novos, y_novos, colunas, transformacao, arvores_novas=None,
+                     linhas_treino=0, cpus=None):
+    """
+    Atualiza um modelo do sklearn no lugar. Retorna uma descrição curta do que
+    foi feito, ou None se o modelo precisa ser treinado de novo (retreinar_modelo).
+    """
+    posicoes, escala, deslocamento = transformacao
+    n_colunas = len(colunas)
+    if hasattr(modelo, 'estimators_'):
+        for estimador in modelo.estimators_:
+            _ajustar_arvore(estimador, n_colunas, posicoes, escala, deslocamento)
+        _renomear_colunas(modelo, colunas)
+        arvores_novas = arvores_novas if arvores_novas is not None else \
+            arvores_novas_padrao(modelo, len(y_novos), linhas_treino)
+        # Árvores treinadas só com uma classe quebrariam o predict_proba do conjunto
+        if arvores_novas <= 0 or len(np.unique(y_novos)) < len(modelo.classes_):
+            return "árvores mantidas (linhas novas sem todas as classes)"
+        parametros = modelo.get_params()
+        modelo.set_params(warm_start=True, n_estimators=len(modelo.estimators_) + arvores_novas,
+                          n_jobs=cpus or parametros['n_jobs'])
+        modelo.fit(entrada_do_modelo(modelo, X_novos, colunas), y_novos)
+        modelo.set_params(warm_start=parametros['warm_start'], n_jobs=parametros['n_jobs'])
+        return f"+{arvores_novas} árvore(s) por warm_start ({len(modelo.estimators_)} no total)"
+    if hasattr(modelo, 'tree_'):
+        _ajustar_arvore(modelo, n_colunas, posicoes, escala, deslocamento)
+        _renomear_colunas(modelo, colunas)
+        _atualizar_contagens(modelo, entrada_do_modelo(modelo, X_novos, colunas), y_novos)
+        return f"contagens dos nós atualizadas ({modelo.tree_.node_count} nós)"
+    if hasattr(modelo, '_fit_X'):
+        X = _empilhar(_reescalar(_alargar(modelo._fit_X, n_colunas), posicoes, escala, deslocamento), X_novos)
+        y = np.concatenate([np.asarray(modelo.classes_)[modelo._y], y_novos])
+        modelo.fit(entrada_do_modelo(modelo, X, colunas), y)
+        return f"{len(y_novos)} linha(s) acrescentada(s) ({X.shape[0]} no total)"
+    return None
+
+
+def retreinar_modelo(nome, modelo, modelos, colunas):
+    """
+    Treina de novo um modelo sem atualização própria, sobre as linhas de treino
+    acumuladas pelo KNN de `modelos` (já atualizado e na escala nova).
+    """
+    knn = next((m for m in modelos.values() if hasattr(m, '_fit_X')), None)
+    if knn is None:
+        raise ValueError(f"Modelo {nome} ({type(modelo).__name__}) não suporta atualização incremental "
+                         f"e não há um KNN com o conjunto de treino acumulado para treiná-lo de novo")
+    y = np.asarray(knn.classes_)[knn._y]
+    modelo.fit(entrada_do_modelo(modelo, knn._fit_X, colunas), y)
+    return f"treinado de novo com o conjunto acumulado ({len(y)} linhas)"
+
+
+def avaliar(modelos, X_teste, y_teste, colunas):
+    metricas = {}
+    for nome, modelo in modelos.items():
+        y_pred = modelo.predict(entrada_do_modelo(modelo, X_teste, colunas))
+        metricas[nome] = {'accuracy': accuracy_score(y_teste, y_pred), 'precision': precision_score(y_teste, y_pred),
+                          'f1_score': f1_score(y_teste, y_pred)}
+    return metricas
+
+
+# ----------------------------- atualização -----------------------------
+
+def _conferir_versao_sklearn(output_dir):
+    """
+    A atualização grava campos privados do sklearn (os nós das árvores por
+    Tree.__setstate__, _fit_X/_y do KNN), cujo formato pode mudar entre versões
+    sem erro nenhum: o modelo sairia corrompido. Só atualiza artefatos gravados
+    com o sklearn instalado; com outro, o caminho é o treino completo.
+    """
+    manifesto = ler_manifesto(output_dir)
+    gravado = manifesto['ambiente'].get('sklearn') if manifesto else None
+    if gravado != sklearn.__version__:
+        raise ValueError(f"Artefatos em {output_dir} gravados com scikit-learn {gravado or 'desconhecido'}, "
+                         f"instalado {sklearn.__version__}: a atualização incremental não é segura entre versões. "
+                         f"Rode o main.py completo para treinar de novo.")
+
+
+def atualizar_artefatos(caminho_csv, output_dir, arvores_novas=None, cpus=None):
+    """
+    Atualiza os artefatos de `output_dir` com os filmes de `caminho_csv`.
+    Retorna o tamanho do problema depois da atualização e os tempos.
+    """
+    inicio = time.perf_counter()
+    diretorio_estado = os.path.join(output_dir, DIRETORIO_ESTADO_INCREMENTAL)
+    if not os.path.exists(os.path.join(diretorio_estado, ARQUIVO_ESTADO)):
+        raise FileNotFoundError(f"{diretorio_estado} não existe: rode o main.py completo uma vez antes de atualizar")
+    _conferir_versao_sklearn(output_dir)
+    with open(os.path.join(diretorio_estado, ARQUIVO_ESTADO), 'r', encoding='utf-8') as f:
+        estado = json.load(f)
+    estado['reconstrucao'] = estado['reconstrucao'] or _tempo_reconstrucao(output_dir)
+
+    print(f"{'='*60}\nATUALIZAÇÃO INCREMENTAL: {caminho_csv}\n{'='*60}")
+    with etapa('carregar_novos'):
+        df = pd.read_csv(caminho_csv)
+        linhas_lidas = len(df)
+        df = limpar_dataframe(df)
+        # Índices continuando os do histórico, para a divisão treino/teste por hash
+        teste = eh_teste(df.index.to_numpy() + estado['linhas_lidas'])
+    print(f"Filmes novos: {linhas_lidas} lidos, {len(df)} após a limpeza "
+          f"({int((~teste).sum())} treino, {int(teste.sum())} teste)")
+
+    with etapa('atualizar_estatisticas'):
+        colunas = carregar_json(output_dir, 'colunas_modelo.json')
+        generos = carregar_json(output_dir, 'generos_lista.json')
+        idiomas = carregar_json(output_dir, 'idiomas_lista.json')
+        scaler_antigo = joblib.load(os.path.join(output_dir, 'scaler.joblib'))
+        valores, contagens = np.load(os.path.join(diretorio_estado, ARQUIVO_ORCAMENTOS))
+
+        # Mesma acumulação da primeira passada do modo streaming, partindo do que já foi visto
+        estatisticas = EstatisticasGlobais()
+        estatisticas.scaler = copy.deepcopy(scaler_antigo)
+        estatisticas.contagem_budget = Counter(dict(zip(valores.tolist(), contagens.astype(np.int64).tolist())))
+        estatisticas.generos, estatisticas.idiomas = set(generos), set(idiomas)
+        estatisticas.atualizar(df, teste)
+        mediana = estatisticas.finalizar()
+        scaler = estatisticas.scaler
+
+        # Vocabulário novo no fim: as colunas antigas não mudam de posição
+        generos_novos = sorted(estatisticas.generos - set(generos))
+        idiomas_novos = sorted(estatisticas.idiomas - set(idiomas))
+        colunas = colunas + generos_novos + idiomas_novos
+        transformacao = transformacao_escala(scaler_antigo, scaler, colunas)
+    print(f"Mediana do orçamento: {mediana:,.0f} | colunas novas: {len(generos_novos)} gênero(s), "
+          f"{len(idiomas_novos)} idioma(s)")
+
+    with etapa('codificar_novos'):
+        df['budget'] = df['budget'].fillna(mediana)
+        X_novos = codificar_novos(df, scaler, colunas, generos + generos_novos, idiomas + idiomas_novos)
+        y_novos = (df['rating'] >= 7).to_numpy(dtype=np.int64)
+        if estado['esparso']:
+            X_novos = sp.csr_matrix(X_novos)
+        X_treino, y_treino = X_novos[~teste], y_novos[~teste]
+        X_teste_novos, y_teste_novos = X_novos[teste], y_novos[teste]
+
+    lista = listar_modelos(output_dir)
+    modelos = {}
+    retreinar = []
+    with etapa('atualizar_modelos'):
+        for nome, arquivo in lista.items():
+            with etapa(nome, linhas=len(y_treino)):
+                modelos[nome] = carregar_modelo(output_dir, nome, arquivo, mapeado=False)
+                descricao = atualizar_modelo(nome, modelos[nome], X_treino, y_treino, colunas, transformacao,
+                                             arvores_novas, estado['linhas_treino'], cpus)
+            if descricao is None:
+                retreinar.append(nome)
+            else:
+                print(f"✔ {nome}: {descricao}")
+        for nome in retreinar:
+            with etapa(nome, linhas=len(y_treino)):
+                descricao = retreinar_modelo(nome, modelos[nome], modelos, colunas)
+            print(f"✔ {nome}: {descricao}")
+
+    with etapa('avaliar'):
+        X_teste = _empilhar(_reescalar(_alargar(_carregar_matriz(diretorio_estado, 'X_teste'), len(colunas)),
+                                       *transformacao), X_teste_novos)
+        y_teste = np.concatenate([np.load(os.path.join(diretorio_estado, 'y_teste.npy')), y_teste_novos])
+        metricas = avaliar(modelos, X_teste, y_teste, colunas)
+        # Informações extras do treino completo continuam, menos as que descrevem o modelo de antes
+        # da atualização: a interface e a seleção por orçamento usariam a média da validação antiga
+        anteriores = carregar_json(output_dir, 'metricas_modelos.json')
+        for nome in metricas:
+            extras = {chave: valor for chave, valor in anteriores.get(nome, {}).items()
+                      if chave not in DESATUALIZADAS_NA_ATUALIZACAO}
+            metricas[nome] = {**extras, **metricas[nome]}
+    for nome, m in metricas.items():
+        print(f"{nome}: Acurácia {m['accuracy']:.3f} | Precisão {m['precision']:.3f} | F1-Score {m['f1_score']:.3f} "
+              f"({len(y_teste)} filmes de teste)")
+
+    with etapa('salvar_artefatos'):
+        with etapa('modelos'):
+            salvar_modelos(output_dir, modelos)
+        # Tudo trocado com os.replace, como os modelos: quem lê durante a atualização
+        # nunca vê um scaler ou um JSON pela metade
+        gravar_atomico(os.path.join(output_dir, 'scaler.joblib'), lambda temporario: joblib.dump(scaler, temporario))
+        for arquivo, valor in (('generos_lista.json', sorted(generos + generos_novos)),
+                               ('idiomas_lista.json', sorted(idiomas + idiomas_novos)),
+                               ('colunas_modelo.json', colunas)):
+            salvar_json(output_dir, arquivo, valor)
+        # Os modelos mudaram de tamanho (árvores e linhas novas): custos medidos de novo
+        with etapa('custos_modelos'):
+            for nome, custos in medir_custos(output_dir, lista, X_teste, colunas).items():
+                metricas[nome]['custos'] = custos
+        salvar_json(output_dir, 'metricas_modelos.json', metricas, indent=2)
+        # A escolha por orçamento usava os custos e a qualidade de antes: refeita com o mesmo orçamento
+        selecao = refazer_selecao(output_dir, metricas)
+        if selecao:
+            print(f"✔ Modelo padrão para o orçamento: {selecao['modelo']}")
+        importancias = {nome: dict(zip(colunas, modelo.feature_importances_))
+                        for nome, modelo in modelos.items() if hasattr(modelo, 'feature_importances_')}
+        Importancias.de_dicionario(importancias, colunas).salvar(output_dir)
+        agregados = AgregadosGeneroIdioma.carregar(output_dir)
+        if agregados is not None:
+            agregados.acrescentar(X_treino, y_treino, colunas, generos_novos, idiomas_novos)
+            agregados.salvar(output_dir)
+
+        caminho_indice = os.path.join(output_dir, DIRETORIO_INDICE_SIMILARES)
+        if os.path.isdir(caminho_indice):
+            with etapa('indice_similares'):
+                IndiceSimilaridade.carregar(caminho_indice).acrescentar(X_treino, caminho_indice, *transformacao)
+        acrescentar_titulos(os.path.join(output_dir, DIRETORIO_TITULOS), df['title'][~teste])
+
+        _salvar_matriz(diretorio_estado, 'X_teste', X_teste)
+        np.save(os.path.join(diretorio_estado, 'y_teste.npy'), y_teste.astype(np.int8))
+        valores = np.array(sorted(estatisticas.contagem_budget), dtype=np.float64)
+        np.save(os.path.join(diretorio_estado, ARQUIVO_ORCAMENTOS),
+                np.array([valores, [estatisticas.contagem_budget[v] for v in valores]], dtype=np.float64))
+
+        # A versão continua com o mesmo nome; os hashes passam a ser os dos arquivos atualizados
+        with etapa('manifesto'):
+            anterior = ler_manifesto(output_dir)
+            escrever_manifesto(output_dir, versao=anterior['versao'] if anterior else None,
+                               origem='atualizacao_incremental', ambiente=ambiente())
+
+    segundos = time.perf_counter() - inicio
+    estado['linhas_lidas'] += linhas_lidas
+    estado['linhas_treino'] += len(y_treino)
+    estado['linhas_teste'] = len(y_teste)
+    estado['atualizacoes'].append({'csv': os.path.abspath(caminho_csv), 'linhas': linhas_lidas,
+                                   'segundos': segundos, 'em': time.strftime('%Y-%m-%d %H:%M:%S')})
+    _salvar_estado(diretorio_estado, estado)
+
+    resultado = {'linhas_treino': estado['linhas_treino'], 'linhas_teste': estado['linhas_teste'],
+                 'colunas': len(colunas), 'linhas_novas': linhas_lidas, 'segundos_atualizacao': segundos}
+    reconstrucao = estado['reconstrucao']
+    if reconstrucao:
+        # Custo do treino completo escalado pelo tamanho atual (o fit cresce ao menos linearmente)
+        estimado = reconstrucao['segundos'] * estado['linhas_treino'] / reconstrucao['linhas_treino']
+        resultado['segundos_reconstrucao_estimada'] = estimado
+        print(f"⏱ Atualização incremental: {segundos:.2f}s | reconstrução completa estimada: {estimado:.2f}s "
+              f"(último treino completo: {reconstrucao['segundos']:.2f}s com {reconstrucao['linhas_treino']} linhas) "
+              f"| {estimado / segundos:.1f}x mais rápido")
+    else:
+        print(f"⏱ Atualização incremental: {segundos:.2f}s")
+    return resultado
+
+
+if __name__ == "__main__":
+    # Comparação em dados sintéticos: treino completo na base, atualização com os
+    # filmes novos e, como referência, treino completo do zero em base + novos.
+    # As métricas de cada um saem de um mesmo conjunto separado (holdout).
+    import argparse
+    import subprocess
+    import sys
+    import tempfile
+    from dados_sinteticos import gerar_csv
+
+    parser = argparse.ArgumentParser(description="Compara a atualização incremental com o treino do zero.")
+    parser.add_argument('--linhas', type=int, default=50_000, help="Filmes da base.")
+    parser.add_argument('--novos', type=int, default=5_000, help="Filmes acrescentados.")
+    parser.add_argument('--holdout', type=int, default=5_000, help="Filmes separados para avaliar os dois.")
+    parser.add_argument('--cpus', type=int, default=None)
+    args = parser.parse_args()
+
+    diretorio = tempfile.mkdtemp(prefix='atualizacao_')
+    caminho = lambda nome: os.path.join(diretorio, nome)
+    gerar_csv(caminho('todos.csv'), args.linhas + args.novos + args.holdout)
+    todos = pd.read_csv(caminho('todos.csv'))
+    fatias = {'base.csv': todos.iloc[:args.linhas], 'novos.csv': todos.iloc[args.linhas:args.linhas + args.novos],
+              'completo.csv': todos.iloc[:args.linhas + args.novos], 'holdout.csv': todos.iloc[args.linhas + args.novos:]}
+    for nome, fatia in fatias.items():
+        fatia.to_csv(caminho(nome), index=False)
+
+    def rodar(rotulo, *opcoes):
+        comando = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'main.py'),
+                   '--cache-preprocessamento', caminho('cache'), *opcoes]
+        if args.cpus:
+            comando += ['--cpus', str(args.cpus)]
+        inicio = time.perf_counter()
+        subprocess.run(comando, check=True, stdout=subprocess.DEVNULL, cwd=diretorio)
+        segundos = time.perf_counter() - inicio
+        print(f"⏱ {rotulo}: {segundos:.2f}s")
+        return segundos
+
+    print(f"{'='*60}\nAtualização incremental: {args.linhas} filmes + {args.novos} novos "
+          f"(holdout de {args.holdout})\n{'='*60}")
+    rodar("treino completo (base)", '--csv', caminho('base.csv'), '--saida', caminho('incremental'))
+    incremental = rodar("atualização (novos)", '--atualizar', caminho('novos.csv'), '--saida', caminho('incremental'))
+    completo = rodar("treino do zero (base + novos)", '--csv', caminho('completo.csv'), '--saida', caminho('completo'))
+    print(f"✔ Atualização {completo / incremental:.1f}x mais rápida que o treino do zero")
+
+    holdout = limpar_dataframe(pd.read_csv(caminho('holdout.csv')))
+    holdout['budget'] = holdout['budget'].fillna(holdout['budget'].median())
+    y_holdout = (holdout['rating'] >= 7).to_numpy(dtype=np.int64)
+    for rotulo in ('incremental', 'completo'):
+        base_path = caminho(rotulo)
+        colunas = carregar_json(base_path, 'colunas_modelo.json')
+        X = codificar_novos(holdout, joblib.load(os.path.join(base_path, 'scaler.joblib')), colunas,
+                            carregar_json(base_path, 'generos_lista.json'), carregar_json(base_path, 'idiomas_lista.json'))
+        modelos = {nome: carregar_modelo(base_path, nome, arquivo, mapeado=False)
+                   for nome, arquivo in listar_modelos(base_path).items()}
+        for nome, m in avaliar(modelos, X, y_holdout, colunas).items():
+            print(f"{rotulo:>11} | {nome}: Acurácia {m['accuracy']:.3f} | F1-Score {m['f1_score']:.3f}")
+    shutil.rmtree(diretorio, ignore_errors=True)
@@ -0,0 +1,353 @@
+import numpy as np
+import pandas as pd
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# ==================== SUÍTE DE BENCHMARKS ====================
+# Mede o projeto inteiro sobre CSVs sintéticos (dados_sinteticos.py), sem rede
+# e sem interface gráfica (nada aqui importa o Tkinter):
+#
+#   conversores   throughput de cada converter_* / str_para_lista sobre as colunas cruas
+#   pipeline      main.py de ponta a ponta em um subprocesso; o tempo, o RSS e o
+#                 throughput de cada etapa vêm do relatorio_etapas.json (instrumentacao.py)
+#   inferencia    latência (p50/p90/p99) de uma previsão da interface por modelo,
+#                 repetindo o que MoviePredictorApp._run_prediction faz, e throughput em lote
+#   equivalencia  as conferências de resultado de cada módulo: conversores vetorizados x
+#                 por linha (preprocessamento.py), motor de árvores x sklearn
+#                 (motor_arvores.py) e validação cruzada com 1 x várias CPUs
+#                 (validacao_cruzada.py), sobre o CSV e os artefatos da seção pipeline
+#
+# Cada seção roda em um processo novo, então o pico de RSS medido é só dela.
+# Os resultados vão para um JSON; com --baseline cada métrica é comparada com
+# a de uma execução anterior e o comando sai com código 1 se alguma piorou
+# mais que a tolerância. Qualquer divergência na seção equivalencia também
+# sai com código 1, com ou sem baseline.
+#
+#   python benchmark.py --linhas 20000 100000 --saida resultados.json
+#   python benchmark.py --linhas 20000 100000 --baseline resultados.json
+
+DIRETORIO = os.path.dirname(os.path.abspath(__file__))
+SECOES = ['conversores', 'pipeline', 'inferencia', 'equivalencia']
+PERCENTIS = [50, 90, 99]
+# Medidas menores que isso variam mais que a tolerância só com o ruído da máquina
+MINIMOS_COMPARACAO = {'s': 0.02, 'ms': 1.0}
+# Valores sorteados para os conversores e folds da validação cruzada na seção equivalencia
+LINHAS_CONVERSORES_EQUIVALENCIA = 200_000
+FOLDS_EQUIVALENCIA = 3
+
+
+def _metrica(valor, unidade, melhor='menor'):
+    return {'valor': float(valor), 'unidade': unidade, 'melhor': melhor}
+
+
+def _melhor_tempo(funcao, repeticoes):
+    """Menor tempo entre as repetições (o menos afetado por ruído)."""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos)
+
+
+def _em_processo_novo(funcao, *args):
+    """Roda funcao(*args) em um processo 'spawn' limpo; devolve (resultado, pico de RSS em MB)."""
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as executor:
+        return executor.submit(_com_pico_rss, funcao, *args).result()
+
+
+def _com_pico_rss(funcao, *args):
+    from instrumentacao import pico_rss_mb
+    return funcao(*args), pico_rss_mb()
+
+
+# -------------------------------- conversores --------------------------------
+
+def bench_conversores(caminho_csv, repeticoes):
+    from preprocessamento import converter_valor_vetorizado, converter_duracao_vetorizado, str_para_lista_vetorizado
+    bruto = pd.read_csv(caminho_csv)
+    casos = {
+        'converter_valor_vetorizado (votes)': lambda: converter_valor_vetorizado(bruto['votes']),
+        'converter_valor_vetorizado (budget)': lambda: converter_valor_vetorizado(bruto['budget']),
+        'converter_duracao_vetorizado (duration)': lambda: converter_duracao_vetorizado(bruto['duration'].astype(str)),
+        'str_para_lista_vetorizado (genres)': lambda: str_para_lista_vetorizado(bruto['genres']),
+        'str_para_lista_vetorizado (languages)': lambda: str_para_lista_vetorizado(bruto['languages']),
+    }
+    metricas = {}
+    for nome, funcao in casos.items():
+        segundos = _melhor_tempo(funcao, repeticoes)
+        metricas[f'{nome}/segundos'] = _metrica(segundos, 's')
+        metricas[f'{nome}/linhas_por_segundo'] = _metrica(len(bruto) / segundos, 'linhas/s', 'maior')
+    return metricas
+
+
+# --------------------------------- pipeline ----------------------------------
+
+def _rodar_main(caminho_csv, diretorio, cpus, usar_tracemalloc):
+    """Roda o main.py do zero (sem cache) e devolve o relatorio_etapas.json."""
+    artefatos = os.path.join(diretorio, 'artefatos_modelo')
+    comando = [sys.executable, os.path.join(DIRETORIO, 'main.py'), '--csv', caminho_csv, '--saida', artefatos,
+               '--cache-preprocessamento', os.path.join(diretorio, 'cache_preprocessamento'),
+               '--reconstruir-cache', '--cpus', str(cpus)]
+    if usar_tracemalloc:
+        comando.append('--tracemalloc')
+    caminho_log = os.path.join(diretorio, 'main.log')
+    with open(caminho_log, 'w', encoding='utf-8') as log:
+        retorno = subprocess.run(comando, cwd=DIRETORIO, stdout=log, stderr=subprocess.STDOUT).returncode
+    if retorno != 0:
+        with open(caminho_log, encoding='utf-8') as log:
+            raise RuntimeError(f"main.py falhou (código {retorno}):\n{log.read()[-3000:]}")
+
+    with open(os.path.join(artefatos, 'relatorio_etapas.json'), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def bench_pipeline(caminho_csv, diretorio, cpus, usar_tracemalloc, repeticoes):
+    """
+    Roda o main.py `repeticoes` vezes e devolve (métricas, diretório dos artefatos).
+    Cada etapa fica com o seu melhor tempo entre as execuções.
+    """
+    relatorios = [_rodar_main(caminho_csv, diretorio, cpus, usar_tracemalloc) for _ in range(repeticoes)]
+    n_linhas = sum(1 for _ in open(caminho_csv, encoding='utf-8')) - 1
+
+    total = min(r['segundos_total'] for r in relatorios)
+    metricas = {
+        'total/segundos': _metrica(total, 's'),
+        'total/linhas_por_segundo': _metrica(n_linhas / total, 'linhas/s', 'maior'),
+        'total/rss_pico_mb': _metrica(min(r['rss_pico_processo_mb'] for r in relatorios), 'MB'),
+    }
+    for medicao in relatorios[0]['etapas']:
+        etapa = medicao['etapa']
+        execucoes = [m for r in relatorios for m in r['etapas'] if m['etapa'] == etapa]
+        segundos = min(m['segundos'] for m in execucoes)
+        metricas[f'{etapa}/segundos'] = _metrica(segundos, 's')
+        # fit/predict registram quantas linhas viram; as etapas de preparação passam pelo CSV inteiro
+        if segundos > 0:
+            metricas[f'{etapa}/linhas_por_segundo'] = _metrica(medicao.get('linhas', n_linhas) / segundos, 'linhas/s', 'maior')
+        if medicao.get('tracemalloc_pico_mb') is not None:
+            metricas[f'{etapa}/alocado_pico_mb'] = _metrica(min(m['tracemalloc_pico_mb'] for m in execucoes), 'MB')
+    return metricas, os.path.join(diretorio, 'artefatos_modelo')
+
+
+# --------------------------------- inferência --------------------------------
+
+def _entradas_aleatorias(artefatos, n, seed):
+    from artefatos import carregar_json
+    rng = np.random.default_rng(seed)
+    generos = carregar_json(artefatos, 'generos_lista.json')
+    idiomas = carregar_json(artefatos, 'idiomas_lista.json')
+    return [{'year': float(rng.integers(1900, 2026)), 'duration': float(rng.integers(1, 301)),
+             'votes': float(rng.integers(0, 3_000_000)), 'budget': float(rng.integers(0, 300_000_000)),
+             'genero': str(rng.choice(generos)), 'idioma': str(rng.choice(idiomas))} for _ in range(n)]
+
+
+def bench_inferencia(artefatos, n_previsoes, n_lote, seed, repeticoes):
+    import joblib
+    from artefatos import listar_modelos, carregar_modelo, carregar_json, entrada_do_modelo, DIRETORIO_INDICE_SIMILARES, DIRETORIO_TITULOS
+    from codificador import CodificadorLinha, COLUNAS_NUMERICAS
+    from fatores import Importancias
+    from indice_similaridade import IndiceSimilaridade
+    from titulos import carregar_titulos
+
+    colunas = carregar_json(artefatos, 'colunas_modelo.json')
+    codificador = CodificadorLinha(colunas, joblib.load(os.path.join(artefatos, 'scaler.joblib')))
+    importancias = Importancias.carregar(artefatos)
+    indice = IndiceSimilaridade.carregar(os.path.join(artefatos, DIRETORIO_INDICE_SIMILARES))
+    titulos = carregar_titulos(artefatos, DIRETORIO_TITULOS)
+    entradas = _entradas_aleatorias(artefatos, n_previsoes, seed)
+
+    metricas = {}
+    for nome, arquivo in listar_modelos(artefatos).items():
+        segundos = _melhor_tempo(lambda: carregar_modelo(artefatos, nome, arquivo), repeticoes)
+        metricas[f'{nome}/carregar_ms'] = _metrica(segundos * 1000, 'ms')
+        modelo = carregar_modelo(artefatos, nome, arquivo)
+
+        def prever(e):
+            # Mesmos passos do worker da interface: codificar, prever, fatores, contribuições, similares
+            linha = codificador.codificar(e)
+            entrada = entrada_do_modelo(modelo, linha, colunas)
+            modelo.predict(entrada)
+            if nome in importancias:
+                importancias.top_fatores(nome, e['genero'], e['idioma'])
+            if hasattr(modelo, 'contribuicoes'):
+                modelo.contribuicoes(linha)
+            if nome == 'KNN':
+                _, indices = indice.buscar(entrada, k=3)
+                titulos.titulos(indices[0])
+
+        for e in entradas[:20]:
+            prever(e)
+        # Cada percentil fica com a melhor das repetições; o máximo isolado é só ruído e não entra
+        percentis = []
+        for _ in range(repeticoes):
+            latencias = []
+            for e in entradas:
+                inicio = time.perf_counter()
+                prever(e)
+                latencias.append((time.perf_counter() - inicio) * 1000)
+            percentis.append(np.percentile(latencias, PERCENTIS))
+        for p, valor in zip(PERCENTIS, np.min(percentis, axis=0)):
+            metricas[f'{nome}/latencia_p{p}_ms'] = _metrica(valor, 'ms')
+
+        # Lote, como o previsao_lote.py: estimador do sklearn e codificação vetorizada
+        estimador = carregar_modelo(artefatos, nome, arquivo, mapeado=False)
+        lote = pd.DataFrame(_entradas_aleatorias(artefatos, n_lote, seed + 1))
+        X = codificador.codificar_lote(lote[COLUNAS_NUMERICAS], lote['genero'], lote['idioma'])
+        entrada = entrada_do_modelo(estimador, X, colunas)
+        segundos = _melhor_tempo(lambda: estimador.predict_proba(entrada), repeticoes)
+        metricas[f'{nome}/lote_linhas_por_segundo'] = _metrica(n_lote / segundos, 'linhas/s', 'maior')
+    return metricas
+
+
+# -------------------------------- equivalência -------------------------------
+
+def verificar_equivalencias(caminho_csv, artefatos, cpus):
+    """
+    Roda as conferências de preprocessamento.py, motor_arvores.py e
+    validacao_cruzada.py e devolve as divergências (lista vazia: tudo igual).
+    """
+    from preprocessamento import verificar_equivalencia as conversores_equivalentes
+    from motor_arvores import verificar_equivalencia as motor_equivalente
+    from validacao_cruzada import verificar_determinismo
+    from main import preparar_dados_em_memoria, criar_modelos
+
+    divergencias = [f"preprocessamento: {r['nome']} vetorizado difere do original por linha"
+                    for r in conversores_equivalentes(LINHAS_CONVERSORES_EQUIVALENCIA) if not r['iguais']]
+    divergencias += [f"motor_arvores: {d}" for d in motor_equivalente(artefatos)]
+    dados = preparar_dados_em_memoria(caminho_csv)
+    iguais, _ = verificar_determinismo(criar_modelos(), dados['X_train'], dados['y_train'], dados['scaler'],
+                                       dados['colunas'], n_folds=FOLDS_EQUIVALENCIA, cpus=cpus)
+    if not iguais:
+        divergencias.append("validacao_cruzada: métricas por fold mudam com o número de processos")
+    return divergencias
+
+
+# --------------------------------- execução ----------------------------------
+
+def executar(args):
+    from dados_sinteticos import gerar_csv
+    from instrumentacao import ambiente
+
+    resultados = {'criado_em': time.strftime('%Y-%m-%d %H:%M:%S'), 'ambiente': ambiente(),
+                  'config': vars(args), 'metricas': {}, 'divergencias': []}
+    for n in args.linhas:
+        diretorio = tempfile.mkdtemp(prefix=f'benchmark_{n}_')
+        try:
+            print(f"{'='*60}\n{n} linhas ({args.generos} gêneros, {args.idiomas} idiomas)\n{'='*60}")
+            caminho_csv = gerar_csv(os.path.join(diretorio, 'imdb_sintetico.csv'), n, args.generos,
+                                    args.idiomas, args.seed)
+
+            def guardar(secao, metricas):
+                for chave, metrica in metricas.items():
+                    resultados['metricas'][f'{n} linhas/{secao}/{chave}'] = metrica
+                    print(f"  {secao}/{chave}: {metrica['valor']:,.3f} {metrica['unidade']}")
+
+            if 'conversores' in args.secoes:
+                metricas, pico = _em_processo_novo(bench_conversores, caminho_csv, args.repeticoes)
+                guardar('conversores', dict(metricas, rss_pico_mb=_metrica(pico, 'MB')))
+
+            artefatos = None
+            if {'pipeline', 'inferencia', 'equivalencia'} & set(args.secoes):
+                metricas, artefatos = bench_pipeline(caminho_csv, diretorio, args.cpus, args.tracemalloc, args.repeticoes)
+                if 'pipeline' in args.secoes:
+                    guardar('pipeline', metricas)
+
+            if 'inferencia' in args.secoes:
+                metricas, pico = _em_processo_novo(bench_inferencia, artefatos, args.previsoes, args.lote, args.seed,
+                                                  args.repeticoes)
+                guardar('inferencia', dict(metricas, rss_pico_mb=_metrica(pico, 'MB')))
+
+            if 'equivalencia' in args.secoes:
+                divergencias, _ = _em_processo_novo(verificar_equivalencias, caminho_csv, artefatos, args.cpus)
+                for divergencia in divergencias:
+                    print(f"✘ DIVERGÊNCIA: {divergencia}")
+                if not divergencias:
+                    print("✔ equivalencia: conversores, motor de árvores e validação cruzada conferem")
+                resultados['divergencias'] += [f'{n} linhas: {d}' for d in divergencias]
+        finally:
+            if args.manter:
+                print(f"Arquivos mantidos em: {diretorio}")
+            else:
+                shutil.rmtree(diretorio, ignore_errors=True)
+    return resultados
+
+
+def comparar(resultados, baseline, tolerancia):
+    """Imprime a variação de cada métrica contra a baseline; devolve o número de regressões."""
+    print(f"\n{'='*60}\nCOMPARAÇÃO COM A BASELINE ({baseline['criado_em']})\n{'='*60}")
+    for campo in ('commit', 'cpus', 'numpy', 'pandas', 'sklearn'):
+        antes, depois = baseline['ambiente'].get(campo), resultados['ambiente'].get(campo)
+        if antes != depois:
+            print(f"Aviso: {campo} mudou ({antes} -> {depois})")
+
+    regressoes = 0
+    for chave, metrica in resultados['metricas'].items():
+        anterior = baseline['metricas'].get(chave)
+        if anterior is None or not anterior['valor'] or not metrica['valor']:
+            continue
+        if max(metrica['valor'], anterior['valor']) < MINIMOS_COMPARACAO.get(metrica['unidade'], 0):
+            continue
+        # O throughput de uma etapa já comparada em segundos repetiria a mesma linha
+        if chave.endswith('/linhas_por_segundo') and chave.replace('/linhas_por_segundo', '/segundos') in resultados['metricas']:
+            continue
+        razao = metrica['valor'] / anterior['valor']
+        # Piora relativa: mais tempo/memória ou menos throughput
+        piora = razao - 1 if metrica['melhor'] == 'menor' else 1 / razao - 1
+        if piora > tolerancia:
+            status = "✘"
+            regressoes += 1
+        elif piora < -tolerancia:
+            status = "✔ melhorou"
+        else:
+            status = "✔"
+        print(f"{status} {chave}: {anterior['valor']:,.3f} -> {metrica['valor']:,.3f} {metrica['unidade']} ({razao - 1:+.1%})")
+    print(f"\n{regressoes} regressão(ões) acima de {tolerancia:.0%}" if regressoes
+          else f"\n✔ Nenhuma regressão acima de {tolerancia:.0%}")
+    return regressoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks do CineScope sobre dados sintéticos (sem interface gráfica).")
+    parser.add_argument('--linhas', type=int, nargs='+', default=[20_000], help="Tamanhos do dataset sintético.")
+    parser.add_argument('--generos', type=int, default=27, help="Número de gêneros distintos.")
+    parser.add_argument('--idiomas', type=int, default=150, help="Número de idiomas distintos.")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--secoes', nargs='+', choices=SECOES, default=SECOES)
+    parser.add_argument('--repeticoes', type=int, default=3,
+                        help="Repetições de cada medição (vale o melhor tempo de cada etapa/percentil).")
+    parser.add_argument('--previsoes', type=int, default=500, help="Previsões de uma linha por modelo.")
+    parser.add_argument('--lote', type=int, default=20_000, help="Linhas do teste de previsão em lote.")
+    parser.add_argument('--cpus', type=int, default=1, help="CPUs do treino (fixo para resultados comparáveis).")
+    parser.add_argument('--tracemalloc', action='store_true', help="Mede também o pico de alocações de cada etapa.")
+    parser.add_argument('--saida', default='benchmark_resultados.json', help="JSON com os resultados.")
+    parser.add_argument('--baseline', default=None, help="JSON de uma execução anterior para comparar.")
+    parser.add_argument('--tolerancia', type=float, default=0.20, help="Piora relativa aceita antes de acusar regressão.")
+    parser.add_argument('--manter', action='store_true', help="Não apaga o CSV e os artefatos gerados.")
+    args = parser.parse_args()
+
+    # Lida antes de rodar: --saida pode ser o mesmo arquivo da baseline
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    resultados = executar(args)
+    with open(args.saida, 'w', encoding='utf-8') as f:
+        json.dump(resultados, f, indent=2, ensure_ascii=False)
+    print(f"✔ Resultados salvos em: {args.saida}")
+
+    regressoes = comparar(resultados, baseline, args.tolerancia) if baseline is not None else 0
+    if regressoes or resultados['divergencias']:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+import numpy as np
+import pandas as pd
+import joblib
+import json
+import math
+import os
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.metrics import f1_score
+from sklearn.model_selection import ParameterGrid, StratifiedKFold
+from treinamento import matrizes_compartilhadas, carregar_matriz
+
+# ==================== BUSCA DE HIPERPARÂMETROS ====================
+# Successive halving: todas as combinações da grade começam avaliadas com poucas
+# linhas de treino; a cada rodada só a melhor fração (1/FATOR) segue, com FATOR
+# vezes mais linhas, até a última rodada usar o treino inteiro.
+# Cada avaliação (parâmetros, fold, linhas) é gravada em um cache em disco assim
+# que termina, então uma nova execução após uma queda ou com a grade alterada
+# só calcula o que ainda falta. A chave inclui o hash dos parâmetros fixos do
+# estimador base (random_state, class_weight... de criar_modelos()): mudá-los
+# não reaproveita scores calculados com o modelo antigo.
+
+GRADES = {
+    'Decision Tree': {'max_depth': [None, 5, 10, 20], 'min_samples_leaf': [1, 5, 20]},
+    'Random Forest': {'n_estimators': [100, 200], 'max_depth': [None, 10, 20], 'max_features': ['sqrt', 0.3]},
+    'KNN': {'n_neighbors': [5, 11, 21], 'weights': ['uniform', 'distance']},
+}
+
+# Quanto a grade encolhe (e os recursos crescem) a cada rodada
+FATOR = 3
+N_FOLDS = 3
+# Mínimo de linhas de treino na primeira rodada
+MIN_RECURSOS = 500
+SEMENTE = 42
+
+
+def _linhas(X, indices):
+    """Seleciona linhas por posição em DataFrame, array ou CSR."""
+    return X.iloc[indices] if isinstance(X, pd.DataFrame) else X[indices]
+
+
+def _avaliar_fold(modelo, parametros, X, y, idx_treino, idx_validacao):
+    """Treina uma combinação em um fold e devolve o F1 na validação. Roda nos workers."""
+    X = carregar_matriz(X)
+    modelo = clone(modelo).set_params(**parametros)
+    modelo.fit(_linhas(X, idx_treino), y[idx_treino])
+    return f1_score(y[idx_validacao], modelo.predict(_linhas(X, idx_validacao)))
+
+
+class CacheAvaliacoes:
+    """
+    Resultados já calculados, um por linha em um arquivo JSONL. O arquivo é
+    específico dos dados de treino (hash de X e y), então dados diferentes
+    nunca reaproveitam resultados uns dos outros.
+    """
+
+    def __init__(self, diretorio, X, y):
+        os.makedirs(diretorio, exist_ok=True)
+        impressao_digital = joblib.hash((X, y, N_FOLDS, SEMENTE))
+        self.caminho = os.path.join(diretorio, f'{impressao_digital}.jsonl')
+        self.resultados = {}
+        if os.path.exists(self.caminho):
+            with open(self.caminho, 'r', encoding='utf-8') as f:
+                for linha in f:
+                    try:
+                        registro = json.loads(linha)
+                    except json.JSONDecodeError:
+                        # Última linha incompleta de uma execução interrompida
+                        continue
+                    self.resultados[registro['chave']] = registro['score']
+
+    @staticmethod
+    def chave(nome_modelo, estimador, parametros, fold, recursos):
+        """`estimador` é o joblib.hash dos parâmetros do modelo base: mudar um parâmetro fora da grade invalida."""
+        return json.dumps([nome_modelo, estimador, parametros, fold, recursos], sort_keys=True, default=str)
+
+    def __contains__(self, chave):
+        return chave in self.resultados
+
+    def __getitem__(self, chave):
+        return self.resultados[chave]
+
+    def gravar(self, chave, score):
+        self.resultados[chave] = score
+        with open(self.caminho, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({'chave': chave, 'score': score}) + '\n')
+
+
+def _rodadas(n_candidatos, n_linhas):
+    """Quantidade de linhas de treino usada em cada rodada; a última usa o treino inteiro."""
+    n_rodadas = max(1, math.ceil(math.log(n_candidatos, FATOR))) if n_candidatos > 1 else 1
+    recursos = [max(min(MIN_RECURSOS, n_linhas), n_linhas // FATOR ** (n_rodadas - 1 - r)) for r in range(n_rodadas)]
+    # Em datasets pequenos várias rodadas batem no mínimo; basta uma delas
+    return list(dict.fromkeys(recursos))
+
+
+def buscar_hiperparametros(modelos, X_train, y_train, diretorio_cache, cpus=None):
+    """
+    Roda o successive halving para cada modelo com grade em GRADES.
+    Retorna {nome: {'parametros': ..., 'f1_validacao': ..., 'rodadas': [...]}}.
+    """
+    print(f"\n{'='*60}")
+    print("BUSCA DE HIPERPARÂMETROS (SUCCESSIVE HALVING)")
+    print(f"{'='*60}")
+
+    y = np.asarray(y_train)
+    n_linhas = len(y)
+    cache = CacheAvaliacoes(diretorio_cache, X_train, y)
+    print(f"Cache de avaliações: {cache.caminho} ({len(cache.resultados)} resultados reaproveitáveis)")
+
+    # Ordem fixa das linhas: a rodada com r recursos usa as r primeiras
+    ordem = np.random.default_rng(SEMENTE).permutation(n_linhas)
+    melhores = {}
+
+    with matrizes_compartilhadas(X_train=X_train) as caminhos:
+        for nome, modelo in modelos.items():
+            if nome not in GRADES:
+                continue
+            candidatos = list(ParameterGrid(GRADES[nome]))
+            estimador = joblib.hash(modelo.get_params())
+            historico = []
+
+            for recursos in _rodadas(len(candidatos), n_linhas):
+                subconjunto = ordem[:recursos]
+                folds = list(StratifiedKFold(n_splits=N_FOLDS, shuffle=True, random_state=SEMENTE)
+                             .split(subconjunto, y[subconjunto]))
+
+                pendentes = [(c, f) for c in range(len(candidatos)) for f in range(N_FOLDS)
+                             if CacheAvaliacoes.chave(nome, estimador, candidatos[c], f, recursos) not in cache]
+                tarefas = (delayed(_avaliar_fold)(modelo, candidatos[c], caminhos['X_train'], y,
+                                                  subconjunto[folds[f][0]], subconjunto[folds[f][1]])
+                           for c, f in pendentes)
+
+                # Cada resultado vai para o cache assim que fica pronto
+                execucao = Parallel(n_jobs=cpus or -1, backend='loky', return_as='generator')(tarefas)
+                for (c, f), score in zip(pendentes, execucao):
+                    cache.gravar(CacheAvaliacoes.chave(nome, estimador, candidatos[c], f, recursos), float(score))
+
+                medias = [np.mean([cache[CacheAvaliacoes.chave(nome, estimador, p, f, recursos)] for f in range(N_FOLDS)])
+                          for p in candidatos]
+                print(f"{nome}: {len(candidatos)} candidato(s) com {recursos} linhas "
+                      f"({len(pendentes)} fold(s) calculados, {len(candidatos) * N_FOLDS - len(pendentes)} do cache) "
+                      f"| melhor F1 {max(medias):.3f}")
+                historico.append({'linhas': recursos, 'candidatos': len(candidatos), 'melhor_f1': float(max(medias))})
+
+                # Mantém a melhor fração para a próxima rodada (ordem estável em caso de empate)
+                manter = max(1, math.ceil(len(candidatos) / FATOR))
+                ranking = sorted(range(len(candidatos)), key=lambda i: -medias[i])[:manter]
+                melhor_f1 = medias[ranking[0]]
+                candidatos = [candidatos[i] for i in ranking]
+
+            melhores[nome] = {'parametros': candidatos[0], 'f1_validacao': float(melhor_f1), 'rodadas': historico}
+            print(f"✔ Melhor configuração para {nome}: {candidatos[0]}")
+
+    return melhores
@@ -0,0 +1,167 @@
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+import hashlib
+import inspect
+import joblib
+import json
+import os
+import shutil
+import time
+from artefatos import DIRETORIO_TITULOS
+from titulos import salvar_titulos
+from instrumentacao import etapa
+
+# ==================== CACHE DO PRÉ-PROCESSAMENTO ====================
+# Guarda o resultado do pré-processamento (matrizes de treino/teste, alvo, scaler,
+# vocabulários, títulos) endereçado pelo conteúdo: a chave é o hash do CSV, do
+# código de pré-processamento e da configuração. Se qualquer um deles muda, a
+# chave muda e o cache antigo simplesmente deixa de ser usado (e é apagado
+# quando passa de MAX_ENTRADAS). --reconstruir-cache força um novo cálculo.
+#
+# Formato de cada entrada (um diretório por chave):
+#   X_train.npy / X_test.npy   matriz densa (ou .npz para CSR)
+#   y_train.npy / y_test.npy   alvo
+#   scaler.joblib              StandardScaler ajustado
+#   orcamentos.npy             orçamentos conhecidos e suas contagens (mediana na atualização incremental)
+#   metadados.json             colunas, vocabulários, linhas lidas e configuração
+#   titulos/                   títulos do treino, copiados para os artefatos
+
+MAX_ENTRADAS = 3
+TAMANHO_BLOCO_HASH = 1 << 20
+
+
+def chave_preprocessamento(caminho_csv, config, codigo):
+    """
+    Hash SHA-256 do conteúdo do CSV, do código-fonte em `codigo` (módulos ou
+    funções) e da configuração.
+    """
+    h = hashlib.sha256()
+    with open(caminho_csv, 'rb') as f:
+        for bloco in iter(lambda: f.read(TAMANHO_BLOCO_HASH), b''):
+            h.update(bloco)
+    for objeto in codigo:
+        h.update(inspect.getsource(objeto).encode('utf-8'))
+    h.update(json.dumps(config, sort_keys=True).encode('utf-8'))
+    return h.hexdigest()[:32]
+
+
+def _salvar_matriz(diretorio, nome, X):
+    if sp.issparse(X):
+        sp.save_npz(os.path.join(diretorio, f'{nome}.npz'), X.tocsr(), compressed=False)
+    else:
+        # DataFrame denso vira um único array no dtype comum das colunas; para os
+        # DataFrames sobre memmap (modo streaming) é só uma view do arquivo
+        valores = X.to_numpy() if isinstance(X, pd.DataFrame) else np.asarray(X)
+        np.save(os.path.join(diretorio, f'{nome}.npy'), valores)
+
+
+def salvar_no_cache(diretorio_cache, chave, dados, output_dir):
+    """Grava `dados` em uma entrada nova; a entrada só aparece completa (rename atômico)."""
+    destino = os.path.join(diretorio_cache, chave)
+    temporario = destino + '.tmp'
+    shutil.rmtree(temporario, ignore_errors=True)
+    os.makedirs(temporario)
+
+    for nome in ('X_train', 'X_test'):
+        _salvar_matriz(temporario, nome, dados[nome])
+    for nome in ('y_train', 'y_test'):
+        np.save(os.path.join(temporario, f'{nome}.npy'), np.asarray(dados[nome]))
+    joblib.dump(dados['scaler'], os.path.join(temporario, 'scaler.joblib'))
+
+    # No modo streaming os títulos já estão em arquivo nos artefatos
+    if dados['titulos_treino'] is not None:
+        salvar_titulos(os.path.join(temporario, DIRETORIO_TITULOS), dados['titulos_treino'])
+    else:
+        shutil.copytree(os.path.join(output_dir, DIRETORIO_TITULOS), os.path.join(temporario, DIRETORIO_TITULOS))
+
+    # Orçamentos conhecidos (valores, contagens), usados pela atualização incremental
+    np.save(os.path.join(temporario, 'orcamentos.npy'), np.array(dados['orcamentos']))
+
+    with open(os.path.join(temporario, 'metadados.json'), 'w', encoding='utf-8') as f:
+        json.dump({'colunas': list(dados['colunas']), 'generos': list(dados['generos']),
+                   'idiomas': list(dados['idiomas']), 'linhas_lidas': int(dados['linhas_lidas']),
+                   'criado_em': time.strftime('%Y-%m-%d %H:%M:%S')}, f)
+
+    shutil.rmtree(destino, ignore_errors=True)
+    os.replace(temporario, destino)
+    _limpar_entradas_antigas(diretorio_cache)
+
+
+def carregar_do_cache(diretorio_cache, chave, output_dir):
+    """
+    Abre uma entrada do cache (matrizes mapeadas em memória, copy-on-write) ou devolve None.
+    Os títulos do treino são copiados direto para output_dir.
+    """
+    origem = os.path.join(diretorio_cache, chave)
+    if not os.path.exists(os.path.join(origem, 'metadados.json')):
+        return None
+    # Marca o uso para a limpeza manter as entradas mais recentes
+    os.utime(origem)
+
+    with open(os.path.join(origem, 'metadados.json'), 'r', encoding='utf-8') as f:
+        metadados = json.load(f)
+
+    def matriz(nome):
+        caminho_esparso = os.path.join(origem, f'{nome}.npz')
+        if os.path.exists(caminho_esparso):
+            return sp.load_npz(caminho_esparso)
+        # Copy-on-write, como no modo --streaming (ingestao.py): uma escrita no lugar mais
+        # adiante não pode falhar só quando os dados vieram do cache
+        return pd.DataFrame(np.load(os.path.join(origem, f'{nome}.npy'), mmap_mode='c'),
+                            columns=metadados['colunas'], copy=False)
+
+    os.makedirs(output_dir, exist_ok=True)
+    destino_titulos = os.path.join(output_dir, DIRETORIO_TITULOS)
+    shutil.rmtree(destino_titulos, ignore_errors=True)
+    shutil.copytree(os.path.join(origem, DIRETORIO_TITULOS), destino_titulos)
+
+    return {
+        'X_train': matriz('X_train'),
+        'X_test': matriz('X_test'),
+        'y_train': np.load(os.path.join(origem, 'y_train.npy')),
+        'y_test': np.load(os.path.join(origem, 'y_test.npy')),
+        'scaler': joblib.load(os.path.join(origem, 'scaler.joblib')),
+        'generos': metadados['generos'],
+        'idiomas': metadados['idiomas'],
+        'colunas': metadados['colunas'],
+        'titulos_treino': None,
+        'linhas_lidas': metadados['linhas_lidas'],
+        'orcamentos': tuple(np.load(os.path.join(origem, 'orcamentos.npy'))),
+    }
+
+
+def _limpar_entradas_antigas(diretorio_cache):
+    """Mantém só as MAX_ENTRADAS entradas usadas mais recentemente."""
+    entradas = [os.path.join(diretorio_cache, nome) for nome in os.listdir(diretorio_cache)
+                if not nome.endswith('.tmp')]
+    entradas.sort(key=os.path.getmtime, reverse=True)
+    for antiga in entradas[MAX_ENTRADAS:]:
+        shutil.rmtree(antiga, ignore_errors=True)
+
+
+def preparar_dados_com_cache(caminho_csv, output_dir, diretorio_cache, config, codigo, preparar, reconstruir=False):
+    """
+    Devolve os dados pré-processados do cache quando a chave existe; senão chama
+    preparar(), grava o resultado e o reabre do cache, para que uma execução
+    com cache quente e uma fria entreguem exatamente os mesmos objetos ao treino.
+    """
+    inicio = time.perf_counter()
+    chave = chave_preprocessamento(caminho_csv, config, codigo)
+
+    if not reconstruir:
+        with etapa('carregar_cache'):
+            dados = carregar_do_cache(diretorio_cache, chave, output_dir)
+        if dados is not None:
+            print(f"✔ Pré-processamento carregado do cache {chave} em {time.perf_counter() - inicio:.2f}s")
+            return dados
+
+    motivo = "reconstrução forçada" if reconstruir else "cache não encontrado"
+    print(f"Pré-processando o dataset ({motivo}, chave {chave})")
+    dados = preparar()
+    os.makedirs(diretorio_cache, exist_ok=True)
+    with etapa('salvar_cache'):
+        salvar_no_cache(diretorio_cache, chave, dados, output_dir)
+    print(f"✔ Pré-processamento salvo no cache em: {os.path.join(diretorio_cache, chave)}")
+    with etapa('carregar_cache'):
+        return carregar_do_cache(diretorio_cache, chave, output_dir)
@@ -0,0 +1,86 @@
+import os
+from collections import OrderedDict
+from artefatos import DIRETORIO_VERSOES
+
+# ==================== CACHE DE PREVISÕES ====================
+# Resultados completos de previsões (classe, fatores e filmes similares) para
+# entradas já vistas, com limite de tamanho (LRU). A chave é o nome do modelo
+# mais as entradas validadas; qualquer arquivo de artefatos_modelo criado,
+# removido ou alterado (tamanho ou mtime) esvazia o cache, porque os resultados
+# guardados podem ter vindo de outro modelo. As outras versões (artefatos_modelo/versoes)
+# têm cada uma o seu cache e não entram na assinatura.
+# Esvaziar o cache não basta: os modelos, o scaler e o índice já abertos continuam
+# sendo os antigos. Por isso a interface pergunta artefatos_mudaram() antes de cada
+# previsão e, se mudaram, recarrega a versão inteira (com um cache novo).
+
+TAMANHO_MAXIMO = 256
+CAMPOS_NUMERICOS = ('year', 'duration', 'votes', 'budget')
+
+
+def assinatura_artefatos(diretorio):
+    """(caminho relativo, tamanho, mtime) de cada arquivo do diretório, recursivamente."""
+    assinatura = []
+    for raiz, subdiretorios, arquivos in os.walk(diretorio):
+        if raiz == diretorio and DIRETORIO_VERSOES in subdiretorios:
+            subdiretorios.remove(DIRETORIO_VERSOES)
+        for nome in arquivos:
+            caminho = os.path.join(raiz, nome)
+            try:
+                info = os.stat(caminho)
+            except FileNotFoundError:
+                # Arquivo removido no meio da varredura (ex.: main.py regravando os artefatos)
+                continue
+            assinatura.append((os.path.relpath(caminho, diretorio), info.st_size, info.st_mtime_ns))
+    return tuple(sorted(assinatura))
+
+
+class CachePrevisoes:
+    """LRU de resultados de previsão com contadores de acertos e falhas."""
+
+    def __init__(self, diretorio_artefatos, tamanho_maximo=TAMANHO_MAXIMO):
+        self.diretorio = diretorio_artefatos
+        self.tamanho_maximo = tamanho_maximo
+        self.resultados = OrderedDict()
+        self.acertos = 0
+        self.falhas = 0
+        self.invalidacoes = 0
+        self.assinatura = assinatura_artefatos(diretorio_artefatos)
+
+    @staticmethod
+    def chave(nome_modelo, entradas):
+        """Entradas normalizadas: números como float e nomes sem espaços nas pontas."""
+        numeros = tuple(float(entradas[c]) for c in CAMPOS_NUMERICOS)
+        return (nome_modelo, *numeros, entradas['genero'].strip(), entradas['idioma'].strip())
+
+    def artefatos_mudaram(self):
+        """Se algum arquivo do diretório mudou desde a última verificação (sem esvaziar o cache)."""
+        return assinatura_artefatos(self.diretorio) != self.assinatura
+
+    def _verificar_artefatos(self):
+        assinatura = assinatura_artefatos(self.diretorio)
+        if assinatura != self.assinatura:
+            self.assinatura = assinatura
+            if self.resultados:
+                self.invalidacoes += 1
+            self.resultados.clear()
+
+    def obter(self, chave):
+        """Resultado guardado para a chave, ou None (contando acerto ou falha)."""
+        self._verificar_artefatos()
+        if chave in self.resultados:
+            self.resultados.move_to_end(chave)
+            self.acertos += 1
+            return self.resultados[chave]
+        self.falhas += 1
+        return None
+
+    def guardar(self, chave, resultado):
+        self.resultados[chave] = resultado
+        self.resultados.move_to_end(chave)
+        while len(self.resultados) > self.tamanho_maximo:
+            self.resultados.popitem(last=False)
+
+    def estatisticas(self):
+        total = self.acertos + self.falhas
+        return {'acertos': self.acertos, 'falhas': self.falhas, 'invalidacoes': self.invalidacoes,
+                'entradas': len(self.resultados), 'taxa_acerto': self.acertos / total if total else 0.0}
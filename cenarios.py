@@ -0,0 +1,210 @@
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+import os
+from codificador import COLUNAS_NUMERICAS
+from artefatos import entrada_do_modelo
+
+# ==================== ANÁLISE "E SE..." ====================
+# A janela "E se..." da interface não faz um clique (e uma previsão) por
+# combinação. Ela codifica a grade inteira e chama um único predict_proba:
+#
+#   gênero × idioma    as entradas numéricas ficam fixas e entra cada par dos
+#                      vocabulários (generos_lista.json × idiomas_lista.json),
+#                      mostrado em ranking
+#   orçamento × votos  gênero e idioma ficam fixos e a varredura é logarítmica
+#                      em torno dos valores digitados, mostrada como mapa de calor
+#
+# Junto com a previsão vai uma tabela calculada no treino (ARQUIVO_AGREGADOS):
+# quantos filmes de treino há em cada par e quantos deles fizeram sucesso. A
+# previsão para um par sem nenhum filme é extrapolação do modelo.
+
+ARQUIVO_AGREGADOS = 'agregados_generos_idiomas.npz'
+PONTOS_VARREDURA = 9
+# A varredura vai de valor / AMPLITUDE_VARREDURA a valor * AMPLITUDE_VARREDURA
+AMPLITUDE_VARREDURA = 10.0
+# A contagem lê a matriz de treino em blocos (no modo streaming ela é mapeada do disco)
+LINHAS_POR_BLOCO = 50_000
+
+
+def _bloco_denso(X, linhas, posicoes):
+    """Colunas `posicoes` das `linhas` de X (DataFrame, array ou CSR) em float32."""
+    if isinstance(X, pd.DataFrame):
+        return X.iloc[linhas, posicoes].to_numpy(dtype=np.float32)
+    if sp.issparse(X):
+        return X[linhas][:, posicoes].toarray().astype(np.float32)
+    return np.asarray(X[linhas][:, posicoes], dtype=np.float32)
+
+
+class AgregadosGeneroIdioma:
+    """Filmes de treino e sucessos por par (gênero, idioma)."""
+
+    def __init__(self, generos, idiomas, filmes, sucessos):
+        self.generos = list(generos)
+        self.idiomas = list(idiomas)
+        # (n_generos, n_idiomas)
+        self.filmes = np.asarray(filmes, dtype=np.int64)
+        self.sucessos = np.asarray(sucessos, dtype=np.int64)
+
+    @classmethod
+    def de_matriz(cls, X, y, colunas, generos, idiomas):
+        """Conta os pares nas linhas codificadas X; um filme com dois gêneros conta nos dois."""
+        generos, idiomas = sorted(generos), sorted(idiomas)
+        vazio = np.zeros((len(generos), len(idiomas)), dtype=np.int64)
+        agregados = cls(generos, idiomas, vazio, vazio.copy())
+        agregados.acrescentar(X, y, colunas)
+        return agregados
+
+    def acrescentar(self, X, y, colunas, generos=(), idiomas=()):
+        """Soma as linhas X/y. Gêneros e idiomas novos entram no vocabulário, em ordem alfabética."""
+        novos_generos = sorted(set(self.generos) | set(generos))
+        novos_idiomas = sorted(set(self.idiomas) | set(idiomas))
+        if novos_generos != self.generos or novos_idiomas != self.idiomas:
+            def reindexar(valores):
+                return pd.DataFrame(valores, index=self.generos, columns=self.idiomas).reindex(
+                    index=novos_generos, columns=novos_idiomas, fill_value=0).to_numpy(dtype=np.int64, copy=True)
+            self.filmes, self.sucessos = reindexar(self.filmes), reindexar(self.sucessos)
+            self.generos, self.idiomas = novos_generos, novos_idiomas
+
+        posicao = {coluna: j for j, coluna in enumerate(colunas)}
+        posicoes_generos = [posicao[g] for g in self.generos]
+        posicoes_idiomas = [posicao[i] for i in self.idiomas]
+        y = np.asarray(y, dtype=np.float32)
+        for inicio in range(0, X.shape[0], LINHAS_POR_BLOCO):
+            linhas = slice(inicio, inicio + LINHAS_POR_BLOCO)
+            G = _bloco_denso(X, linhas, posicoes_generos)
+            L = _bloco_denso(X, linhas, posicoes_idiomas)
+            # Contagens inteiras: exatas em float32 dentro de um bloco
+            self.filmes += np.rint(G.T @ L).astype(np.int64)
+            self.sucessos += np.rint(G.T @ (L * y[linhas, None])).astype(np.int64)
+
+    def salvar(self, diretorio):
+        caminho = os.path.join(diretorio, ARQUIVO_AGREGADOS)
+        np.savez(caminho, generos=np.array(self.generos, dtype=str), idiomas=np.array(self.idiomas, dtype=str),
+                 filmes=self.filmes, sucessos=self.sucessos)
+        return caminho
+
+    @classmethod
+    def carregar(cls, diretorio):
+        """A tabela gravada pelo treino, ou None em artefatos antigos."""
+        caminho = os.path.join(diretorio, ARQUIVO_AGREGADOS)
+        if not os.path.exists(caminho):
+            return None
+        with np.load(caminho) as arquivo:
+            return cls(arquivo['generos'].tolist(), arquivo['idiomas'].tolist(), arquivo['filmes'], arquivo['sucessos'])
+
+    def tabela(self, generos, idiomas):
+        """(filmes, sucessos) de cada par (generos[k], idiomas[k]); pares desconhecidos têm zero filmes."""
+        g = pd.Index(self.generos).get_indexer(pd.Index(generos, dtype=object))
+        i = pd.Index(self.idiomas).get_indexer(pd.Index(idiomas, dtype=object))
+        conhecidos = (g >= 0) & (i >= 0)
+        filmes, sucessos = np.zeros(len(g), dtype=np.int64), np.zeros(len(g), dtype=np.int64)
+        filmes[conhecidos] = self.filmes[g[conhecidos], i[conhecidos]]
+        sucessos[conhecidos] = self.sucessos[g[conhecidos], i[conhecidos]]
+        return filmes, sucessos
+
+
+def probabilidade_sucesso(modelo, X, colunas):
+    """P(sucesso) de cada linha codificada de X, em um único predict_proba."""
+    proba = modelo.predict_proba(entrada_do_modelo(modelo, X, colunas))
+    return proba[:, list(modelo.classes_).index(1)]
+
+
+def _numericas_repetidas(entradas, n):
+    return pd.DataFrame({c: np.full(n, float(entradas[c])) for c in COLUNAS_NUMERICAS})
+
+
+def ranking_generos_idiomas(modelo, codificador, entradas, generos, idiomas, agregados=None, so_vistos=False):
+    """
+    Prevê todos os pares gênero × idioma com as numéricas de `entradas`.
+    so_vistos: só os pares com filmes no treino (exige agregados). Retorna um
+    DataFrame (genero, idioma, probabilidade, filmes, taxa_sucesso) do par mais
+    provável para o menos provável; sem agregados, filmes e taxa ficam vazios.
+    """
+    pares = pd.MultiIndex.from_product([generos, idiomas], names=['genero', 'idioma']).to_frame(index=False)
+    if agregados is not None:
+        pares['filmes'], sucessos = agregados.tabela(pares['genero'], pares['idioma'])
+        pares['taxa_sucesso'] = np.where(pares['filmes'] > 0, sucessos / np.maximum(pares['filmes'], 1), np.nan)
+        if so_vistos:
+            pares = pares[pares['filmes'] > 0].reset_index(drop=True)
+    else:
+        pares['filmes'], pares['taxa_sucesso'] = pd.NA, np.nan
+
+    X = codificador.codificar_lote(_numericas_repetidas(entradas, len(pares)), pares['genero'], pares['idioma'])
+    pares['probabilidade'] = probabilidade_sucesso(modelo, X, codificador.colunas)
+    ordem = ['genero', 'idioma', 'probabilidade', 'filmes', 'taxa_sucesso']
+    return pares[ordem].sort_values('probabilidade', ascending=False, kind='stable').reset_index(drop=True)
+
+
+def valores_varredura(valor, pontos=PONTOS_VARREDURA, amplitude=AMPLITUDE_VARREDURA):
+    """`pontos` valores inteiros em escala logarítmica em torno de `valor` (1 quando ele é 0)."""
+    centro = max(float(valor), 1.0)
+    return np.unique(np.rint(np.geomspace(centro / amplitude, centro * amplitude, pontos)))
+
+
+def varredura(modelo, codificador, entradas, campo_linhas='budget', campo_colunas='votes', pontos=PONTOS_VARREDURA):
+    """
+    Prevê a grade campo_linhas × campo_colunas em torno dos valores de `entradas`,
+    com o gênero e o idioma delas. Retorna (valores_linhas, valores_colunas,
+    probabilidades (n_linhas, n_colunas)).
+    """
+    valores_linhas = valores_varredura(entradas[campo_linhas], pontos)
+    valores_colunas = valores_varredura(entradas[campo_colunas], pontos)
+    n = len(valores_linhas) * len(valores_colunas)
+    numericas = _numericas_repetidas(entradas, n)
+    numericas[campo_linhas] = np.repeat(valores_linhas, len(valores_colunas))
+    numericas[campo_colunas] = np.tile(valores_colunas, len(valores_linhas))
+    X = codificador.codificar_lote(numericas, [entradas['genero']] * n, [entradas['idioma']] * n)
+    probabilidades = probabilidade_sucesso(modelo, X, codificador.colunas)
+    return valores_linhas, valores_colunas, probabilidades.reshape(len(valores_linhas), len(valores_colunas))
+
+
+if __name__ == "__main__":
+    # Compara a grade vetorizada com uma previsão por combinação (como um clique
+    # por par na interface) e confere se as probabilidades batem:
+    #   python cenarios.py [diretorio_artefatos] [pares_no_laco]
+    import joblib
+    import sys
+    import time
+    from artefatos import listar_modelos, carregar_modelo, carregar_json
+    from codificador import CodificadorLinha
+
+    base_path = sys.argv[1] if len(sys.argv) > 1 else 'artefatos_modelo'
+    n_laco = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    colunas = carregar_json(base_path, 'colunas_modelo.json')
+    generos = carregar_json(base_path, 'generos_lista.json')
+    idiomas = carregar_json(base_path, 'idiomas_lista.json')
+    codificador = CodificadorLinha(colunas, joblib.load(os.path.join(base_path, 'scaler.joblib')))
+    agregados = AgregadosGeneroIdioma.carregar(base_path)
+    entradas = {'year': 2010.0, 'duration': 120.0, 'votes': 50_000.0, 'budget': 15_000_000.0,
+                'genero': generos[0], 'idioma': idiomas[0]}
+
+    print(f"{'='*40}\nGrade de {len(generos)} gêneros × {len(idiomas)} idiomas = {len(generos) * len(idiomas)} pares\n{'='*40}")
+    if agregados is not None:
+        print(f"Pares com filmes no treino: {int((agregados.filmes > 0).sum())}")
+    for nome, arquivo in listar_modelos(base_path).items():
+        modelo = carregar_modelo(base_path, nome, arquivo)
+        probabilidade_sucesso(modelo, codificador.codificar(entradas), colunas)
+
+        inicio = time.perf_counter()
+        ranking = ranking_generos_idiomas(modelo, codificador, entradas, generos, idiomas, agregados)
+        tempo_grade = time.perf_counter() - inicio
+
+        # Uma previsão por par, só nos primeiros n_laco pares do ranking; o total é estimado
+        amostra = ranking.head(n_laco)
+        inicio = time.perf_counter()
+        por_par = [probabilidade_sucesso(modelo, codificador.codificar({**entradas, 'genero': g, 'idioma': i}), colunas)[0]
+                   for g, i in zip(amostra['genero'], amostra['idioma'])]
+        tempo_laco = (time.perf_counter() - inicio) / len(amostra) * len(ranking)
+
+        iguais = np.allclose(por_par, amostra['probabilidade'], rtol=0, atol=1e-9)
+        status = "✔" if iguais else "✘ DIVERGÊNCIA"
+        melhor = ranking.iloc[0]
+        print(f"{status} {nome}: grade {tempo_grade * 1000:.0f} ms | um por par ~{tempo_laco * 1000:.0f} ms "
+              f"({tempo_laco / tempo_grade:.0f}x) | melhor: {melhor['genero']} / {melhor['idioma']} "
+              f"{melhor['probabilidade']:.1%}")
+
+        inicio = time.perf_counter()
+        linhas, colunas_varredura, grade = varredura(modelo, codificador, entradas)
+        print(f"  varredura orçamento × votos {grade.shape[0]}×{grade.shape[1]}: "
+              f"{(time.perf_counter() - inicio) * 1000:.0f} ms | P(sucesso) de {grade.min():.1%} a {grade.max():.1%}")
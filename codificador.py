@@ -0,0 +1,159 @@
+import numpy as np
+import pandas as pd
+
+# ==================== CODIFICADOR DE UMA LINHA ====================
+# A interface prevê um filme por vez. Montar um DataFrame de uma linha, ajustar
+# dtypes, preencher com .loc e passar um recorte pelo scaler custa mais do que
+# a própria previsão. Aqui as posições das colunas e os vetores do scaler são
+# calculados uma única vez e cada previsão só escreve em um array já alocado.
+
+COLUNAS_NUMERICAS = ['year', 'duration', 'votes', 'budget']
+
+# Faixas aceitas nas três entradas (interface, servidor_inferencia e previsao_lote).
+# Cada regra vale tanto para um número quanto para uma coluna inteira; NaN nunca passa.
+REGRAS_NUMERICAS = {
+    'year': (lambda v: (v >= 1800) & (v <= 2100), "O ano deve ser entre 1800 e 2100."),
+    'duration': (lambda v: v > 0, "A duração deve ser um número positivo."),
+    'votes': (lambda v: v >= 0, "A quantidade de votos não pode ser negativa."),
+    'budget': (lambda v: v >= 0, "O orçamento não pode ser negativo."),
+}
+
+
+def erro_de_faixa(campo, valor):
+    """Mensagem da regra de `campo` que `valor` viola, ou None."""
+    regra, mensagem = REGRAS_NUMERICAS[campo]
+    return None if regra(valor) else mensagem
+
+
+def dentro_das_faixas(numericas):
+    """Máscara das linhas de um DataFrame com COLUNAS_NUMERICAS que passam em todas as regras."""
+    return np.logical_and.reduce([np.asarray(regra(numericas[campo]), dtype=bool)
+                                  for campo, (regra, _) in REGRAS_NUMERICAS.items()])
+
+
+def codificar_com_pandas(entradas, colunas_modelo, scaler):
+    """Caminho original da interface, mantido como referência de comportamento."""
+    numeric_cols = COLUNAS_NUMERICAS; dtypes = {col: 'float64' for col in colunas_modelo if col in numeric_cols}
+    novo_df = pd.DataFrame(0, index=[0], columns=colunas_modelo).astype(dtypes)
+    for col in numeric_cols:
+        if col in novo_df.columns: novo_df.loc[0, col] = entradas[col]
+    if entradas['genero'] in novo_df.columns: novo_df.loc[0, entradas['genero']] = 1
+    if entradas['idioma'] in novo_df.columns: novo_df.loc[0, entradas['idioma']] = 1
+
+    colunas_existentes_no_df = [c for c in numeric_cols if c in novo_df.columns]
+    if colunas_existentes_no_df: novo_df.loc[:, colunas_existentes_no_df] = scaler.transform(novo_df[colunas_existentes_no_df])
+    return novo_df
+
+
+class CodificadorLinha:
+    """
+    Transforma as entradas da interface (ano, duração, votos, orçamento, gênero
+    e idioma) na linha de features do modelo, já escalada.
+    """
+
+    def __init__(self, colunas_modelo, scaler):
+        self.colunas = list(colunas_modelo)
+        self.posicoes = {coluna: i for i, coluna in enumerate(self.colunas)}
+
+        # O scaler foi ajustado em COLUNAS_NUMERICAS; a média e a escala de cada
+        # coluna são buscadas pelo nome quando o scaler guarda os nomes
+        nomes_scaler = list(getattr(scaler, 'feature_names_in_', COLUNAS_NUMERICAS))
+        self.numericas = [c for c in COLUNAS_NUMERICAS if c in self.posicoes]
+        self.indices_numericos = np.array([self.posicoes[c] for c in self.numericas], dtype=np.intp)
+        self.media = np.array([scaler.mean_[nomes_scaler.index(c)] for c in self.numericas])
+        self.escala = np.array([scaler.scale_[nomes_scaler.index(c)] for c in self.numericas])
+
+        self.linha = np.zeros((1, len(self.colunas)))
+
+    def codificar(self, entradas):
+        """
+        Devolve um array (1, n_colunas) em float64. O array é reaproveitado na
+        chamada seguinte; copie-o se precisar guardar o resultado.
+        """
+        linha = self.linha
+        linha.fill(0.0)
+        valores = np.array([entradas[c] for c in self.numericas], dtype=np.float64)
+        # Mesmas operações do StandardScaler.transform: subtrai a média e divide pela escala
+        valores -= self.media
+        valores /= self.escala
+        linha[0, self.indices_numericos] = valores
+        for chave in ('genero', 'idioma'):
+            posicao = self.posicoes.get(entradas[chave])
+            if posicao is not None:
+                linha[0, posicao] = 1.0
+        return linha
+
+    def codificar_lote(self, numericas, generos, idiomas):
+        """
+        Versão vetorizada de codificar() para muitas linhas de uma vez.
+        `numericas` é um DataFrame com COLUNAS_NUMERICAS; `generos` e `idiomas`
+        são sequências de nomes. Gêneros e idiomas desconhecidos ficam zerados.
+        """
+        n = len(generos)
+        X = np.zeros((n, len(self.colunas)))
+        valores = numericas[self.numericas].to_numpy(dtype=np.float64, copy=True)
+        valores -= self.media
+        valores /= self.escala
+        X[:, self.indices_numericos] = valores
+        indice = pd.Index(self.colunas)
+        linhas = np.arange(n)
+        for nomes in (generos, idiomas):
+            posicoes = indice.get_indexer(pd.Index(nomes, dtype=object))
+            conhecidos = posicoes >= 0
+            X[linhas[conhecidos], posicoes[conhecidos]] = 1.0
+        return X
+
+
+if __name__ == "__main__":
+    # Confere a equivalência com o caminho em pandas e mede a latência por previsão:
+    #   python codificador.py [diretorio_artefatos] [numero_de_previsoes]
+    import joblib
+    import os
+    import sys
+    import time
+    from artefatos import listar_modelos, carregar_modelo, carregar_json
+
+    base_path = sys.argv[1] if len(sys.argv) > 1 else 'artefatos_modelo'
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    scaler = joblib.load(os.path.join(base_path, 'scaler.joblib'))
+    colunas = carregar_json(base_path, 'colunas_modelo.json')
+    generos = carregar_json(base_path, 'generos_lista.json')
+    idiomas = carregar_json(base_path, 'idiomas_lista.json')
+
+    rng = np.random.default_rng(42)
+    entradas = [{'year': float(rng.integers(1850, 2026)), 'duration': float(rng.integers(1, 301)),
+                 'votes': float(rng.integers(0, 4_000_000)), 'budget': float(rng.integers(0, 1_000_000_000)),
+                 'genero': str(rng.choice(generos)), 'idioma': str(rng.choice(idiomas))} for _ in range(n)]
+
+    codificador = CodificadorLinha(colunas, scaler)
+
+    def medir(funcao):
+        inicio = time.perf_counter()
+        resultados = [funcao(e) for e in entradas]
+        return resultados, (time.perf_counter() - inicio) / n * 1e6
+
+    print(f"{'='*40}\nCodificação de {n} previsões de uma linha\n{'='*40}")
+    esperado, tempo_pandas = medir(lambda e: codificar_com_pandas(e, colunas, scaler).to_numpy(dtype=np.float64))
+    obtido, tempo_rapido = medir(lambda e: codificador.codificar(e).copy())
+    iguais = all(np.array_equal(a, b) for a, b in zip(esperado, obtido))
+    status = "✔" if iguais else "✘ DIVERGÊNCIA"
+    print(f"{status} Linhas idênticas: {iguais}")
+    print(f"⏱ pandas {tempo_pandas:.0f} µs | pré-compilado {tempo_rapido:.1f} µs | ganho {tempo_pandas / tempo_rapido:.0f}x")
+
+    print(f"\n{'='*40}\nPrevisão completa (codificação + modelo)\n{'='*40}")
+    for nome, arquivo in listar_modelos(base_path).items():
+        modelo = carregar_modelo(base_path, nome, arquivo)
+        com_nomes = hasattr(modelo, 'feature_names_in_')
+
+        def prever_pandas(e):
+            df = codificar_com_pandas(e, colunas, scaler)
+            return modelo.predict(df if com_nomes else df.to_numpy())[0]
+
+        def prever_rapido(e):
+            linha = codificador.codificar(e)
+            return modelo.predict(pd.DataFrame(linha, columns=colunas, copy=False) if com_nomes else linha)[0]
+
+        esperado, tempo_pandas = medir(prever_pandas)
+        obtido, tempo_rapido = medir(prever_rapido)
+        status = "✔" if esperado == obtido else "✘ DIVERGÊNCIA"
+        print(f"{status} {nome}: pandas {tempo_pandas / 1000:.2f} ms | pré-compilado {tempo_rapido / 1000:.2f} ms por previsão")
@@ -0,0 +1,209 @@
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+import os
+import time
+from artefatos import carregar_modelo, carregar_json, salvar_json, entrada_do_modelo, diretorio_arvores, ARQUIVO_SELECAO_MODELO
+
+# ==================== CUSTO DOS MODELOS ====================
+# Em produção importa tanto quanto a qualidade o que cada modelo custa para
+# servir. No fim do treino cada modelo é medido sobre os artefatos já gravados,
+# aberto como a interface o abre (carregar_modelo, arrays mapeados):
+#
+#   bytes                          tamanho em disco (joblib + árvores achatadas)
+#   carregar_ms                    mediana de REPETICOES_CARREGAR aberturas
+#   linha_p50_ms / linha_p99_ms    predict_proba de uma linha, como cada clique da interface
+#   lote_p50_ms / lote_p99_ms      predict_proba de um lote de TAMANHO_LOTE linhas
+#   lote_linhas_por_segundo        a partir da mediana do lote
+#
+# Os custos vão para metricas_modelos.json -> <modelo> -> 'custos'. Com um
+# orçamento (main.py --latencia-max-ms / --tamanho-max-mb, ou este módulo pela
+# linha de comando), selecionar_modelo escolhe o modelo de melhor qualidade
+# entre os que cabem nele e grava a escolha em ARQUIVO_SELECAO_MODELO; a interface e
+# o servidor de inferência passam a usá-lo como padrão.
+
+REPETICOES_CARREGAR = 5
+N_LINHAS = 200
+TAMANHO_LOTE = 1000
+N_LOTES = 10
+AQUECIMENTO = 5
+METRICA_SELECAO = 'f1_score'
+
+
+def tamanho_em_disco(base_path, nome, arquivo):
+    """Bytes do arquivo do modelo mais os das árvores achatadas, quando existem."""
+    total = os.path.getsize(os.path.join(base_path, arquivo))
+    caminho_arvores = os.path.join(base_path, diretorio_arvores(nome))
+    if os.path.isdir(caminho_arvores):
+        total += sum(os.path.getsize(os.path.join(caminho_arvores, f)) for f in os.listdir(caminho_arvores))
+    return total
+
+
+def _linhas_densas(X, n):
+    """As primeiras n linhas em um array float64, o formato que o codificador da interface entrega."""
+    if sp.issparse(X):
+        return X[:n].toarray().astype(np.float64)
+    return np.asarray(X.iloc[:n] if isinstance(X, pd.DataFrame) else X[:n], dtype=np.float64)
+
+
+def _cronometrar(funcao, repeticoes):
+    latencias = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        latencias.append((time.perf_counter() - inicio) * 1000)
+    return latencias
+
+
+def medir_custos(base_path, lista_modelos, X_amostra, colunas, n_linhas=N_LINHAS, tamanho_lote=TAMANHO_LOTE):
+    """
+    Mede os modelos de `lista_modelos` ({nome: arquivo}) gravados em base_path.
+    X_amostra: linhas já codificadas (o conjunto de teste). Retorna {nome: custos}.
+    """
+    amostra = _linhas_densas(X_amostra, max(n_linhas, tamanho_lote))
+    custos = {}
+    for nome, arquivo in lista_modelos.items():
+        carregar = _cronometrar(lambda: carregar_modelo(base_path, nome, arquivo), REPETICOES_CARREGAR)
+        modelo = carregar_modelo(base_path, nome, arquivo)
+
+        linhas = [amostra[i:i + 1] for i in range(min(n_linhas, len(amostra)))]
+        for linha in linhas[:AQUECIMENTO]:
+            modelo.predict_proba(entrada_do_modelo(modelo, linha, colunas))
+        iterador = iter(linhas)
+        por_linha = _cronometrar(lambda: modelo.predict_proba(entrada_do_modelo(modelo, next(iterador), colunas)),
+                                 len(linhas))
+
+        lote = amostra[:tamanho_lote]
+        modelo.predict_proba(entrada_do_modelo(modelo, lote, colunas))
+        por_lote = _cronometrar(lambda: modelo.predict_proba(entrada_do_modelo(modelo, lote, colunas)), N_LOTES)
+
+        custos[nome] = {
+            'bytes': tamanho_em_disco(base_path, nome, arquivo),
+            'carregar_ms': float(np.median(carregar)),
+            'linha_p50_ms': float(np.percentile(por_linha, 50)),
+            'linha_p99_ms': float(np.percentile(por_linha, 99)),
+            'lote_linhas': len(lote),
+            'lote_p50_ms': float(np.percentile(por_lote, 50)),
+            'lote_p99_ms': float(np.percentile(por_lote, 99)),
+            'lote_linhas_por_segundo': len(lote) / (float(np.median(por_lote)) / 1000),
+        }
+    return custos
+
+
+def qualidade(metricas_modelo, metrica=METRICA_SELECAO):
+    """Média da validação cruzada quando houver; senão o valor no conjunto de teste."""
+    validacao = metricas_modelo.get('validacao_cruzada')
+    return validacao[metrica]['media'] if validacao else metricas_modelo[metrica]
+
+
+def selecionar_modelo(metricas, latencia_max_ms=None, tamanho_max_mb=None, metrica=METRICA_SELECAO):
+    """
+    Melhor modelo pela `metrica` entre os que cabem no orçamento: p99 de uma
+    linha até latencia_max_ms e tamanho em disco até tamanho_max_mb (None: sem
+    limite). Retorna a seleção (gravável em ARQUIVO_SELECAO_MODELO) ou levanta
+    ValueError se nenhum modelo cabe.
+    """
+    candidatos = {}
+    for nome, m in metricas.items():
+        if 'custos' not in m:
+            continue
+        custos = m['custos']
+        motivos = []
+        if latencia_max_ms is not None and custos['linha_p99_ms'] > latencia_max_ms:
+            motivos.append(f"p99 {custos['linha_p99_ms']:.2f} ms > {latencia_max_ms:g} ms")
+        if tamanho_max_mb is not None and custos['bytes'] / 1e6 > tamanho_max_mb:
+            motivos.append(f"{custos['bytes'] / 1e6:.1f} MB > {tamanho_max_mb:g} MB")
+        candidatos[nome] = {'qualidade': qualidade(m, metrica), 'linha_p99_ms': custos['linha_p99_ms'],
+                            'mb': custos['bytes'] / 1e6, 'fora_do_orcamento': motivos}
+
+    dentro = [nome for nome, c in candidatos.items() if not c['fora_do_orcamento']]
+    if not dentro:
+        raise ValueError(f"Nenhum modelo cabe no orçamento (p99 ≤ {latencia_max_ms} ms, tamanho ≤ {tamanho_max_mb} MB): "
+                         + "; ".join(f"{nome}: {', '.join(c['fora_do_orcamento'])}" for nome, c in candidatos.items()))
+    # Empate na qualidade: o mais rápido
+    escolhido = max(dentro, key=lambda nome: (candidatos[nome]['qualidade'], -candidatos[nome]['linha_p99_ms']))
+    return {'modelo': escolhido, 'metrica': metrica,
+            'orcamento': {'latencia_max_ms': latencia_max_ms, 'tamanho_max_mb': tamanho_max_mb},
+            'candidatos': candidatos, 'criado_em': time.strftime('%Y-%m-%d %H:%M:%S')}
+
+
+def salvar_selecao(base_path, selecao):
+    # Lido pela interface e pelo servidor na abertura: trocado inteiro, nunca pela metade
+    salvar_json(base_path, ARQUIVO_SELECAO_MODELO, selecao, indent=2)
+    return os.path.join(base_path, ARQUIVO_SELECAO_MODELO)
+
+
+def refazer_selecao(base_path, metricas):
+    """
+    Escolhe de novo, com o orçamento e a métrica gravados, depois que os modelos
+    mudaram (main.py --atualizar). Se nenhum modelo cabe mais, a seleção é
+    apagada e a interface volta ao padrão. Retorna a seleção nova ou None.
+    """
+    caminho = os.path.join(base_path, ARQUIVO_SELECAO_MODELO)
+    if not os.path.exists(caminho):
+        return None
+    anterior = carregar_json(base_path, ARQUIVO_SELECAO_MODELO)
+    orcamento = anterior['orcamento']
+    try:
+        selecao = selecionar_modelo(metricas, orcamento['latencia_max_ms'], orcamento['tamanho_max_mb'],
+                                    anterior['metrica'])
+    except ValueError as e:
+        os.remove(caminho)
+        print(f"AVISO: seleção por orçamento apagada. {e}")
+        return None
+    salvar_selecao(base_path, selecao)
+    return selecao
+
+
+def modelo_selecionado(base_path, lista_modelos):
+    """O modelo escolhido pelo orçamento, se houver uma seleção e o modelo ainda existir."""
+    if not os.path.exists(os.path.join(base_path, ARQUIVO_SELECAO_MODELO)):
+        return None
+    nome = carregar_json(base_path, ARQUIVO_SELECAO_MODELO)['modelo']
+    return nome if nome in lista_modelos else None
+
+
+def melhor_modelo(metricas, lista_modelos, metrica=METRICA_SELECAO):
+    """O melhor modelo pela `metrica` entre os de lista_modelos, sem orçamento (None se não houver métricas)."""
+    candidatos = [nome for nome in lista_modelos if metrica in metricas.get(nome, {})]
+    return max(candidatos, key=lambda nome: qualidade(metricas[nome], metrica)) if candidatos else None
+
+
+def imprimir_tabela(metricas, metrica=METRICA_SELECAO, selecao=None):
+    print(f"{'Modelo':<24}{metrica:>10}{'MB':>8}{'abrir ms':>10}{'linha p50':>11}{'linha p99':>11}"
+          f"{'lote p50':>10}{'lote p99':>10}{'linhas/s':>12}")
+    for nome, m in metricas.items():
+        if 'custos' not in m:
+            continue
+        c = m['custos']
+        marca = '  ← escolhido' if selecao and selecao['modelo'] == nome else ''
+        print(f"{nome:<24}{qualidade(m, metrica):>10.3f}{c['bytes'] / 1e6:>8.1f}{c['carregar_ms']:>10.1f}"
+              f"{c['linha_p50_ms']:>11.2f}{c['linha_p99_ms']:>11.2f}{c['lote_p50_ms']:>10.1f}{c['lote_p99_ms']:>10.1f}"
+              f"{c['lote_linhas_por_segundo']:>12,.0f}{marca}")
+
+
+if __name__ == "__main__":
+    # Mostra os custos gravados no treino e escolhe o modelo para um orçamento, sem treinar de novo:
+    #   python custos_modelos.py [artefatos_modelo] [--latencia-max-ms 2] [--tamanho-max-mb 20]
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Custos dos modelos do CineScope e seleção por orçamento.")
+    parser.add_argument('artefatos', nargs='?', default='artefatos_modelo')
+    parser.add_argument('--latencia-max-ms', type=float, default=None, help="p99 máximo de uma previsão de uma linha.")
+    parser.add_argument('--tamanho-max-mb', type=float, default=None, help="Tamanho máximo do modelo em disco.")
+    parser.add_argument('--metrica', default=METRICA_SELECAO, choices=['accuracy', 'precision', 'f1_score'])
+    args = parser.parse_args()
+
+    metricas = carregar_json(args.artefatos, 'metricas_modelos.json')
+    print(f"{'='*40}\nCustos dos modelos em {args.artefatos}\n{'='*40}")
+    selecao = None
+    if args.latencia_max_ms is not None or args.tamanho_max_mb is not None:
+        try:
+            selecao = selecionar_modelo(metricas, args.latencia_max_ms, args.tamanho_max_mb, args.metrica)
+        except ValueError as e:
+            imprimir_tabela(metricas, args.metrica)
+            print(f"✘ {e}")
+            raise SystemExit(1)
+    imprimir_tabela(metricas, args.metrica, selecao)
+    if selecao:
+        print(f"✔ Modelo escolhido: {selecao['modelo']} | seleção salva em: {salvar_selecao(args.artefatos, selecao)}")
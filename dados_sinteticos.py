@@ -0,0 +1,122 @@
+import numpy as np
+import pandas as pd
+import argparse
+import os
+
+# ==================== DATASET SINTÉTICO NO FORMATO DO IMDb ====================
+# Gera um CSV com as mesmas colunas e os mesmos formatos de texto do
+# imdb_filmes.csv, para medir o pipeline sem baixar o dataset e com tamanhos
+# arbitrários:
+#   duration   '2h 15m', '1h', '45m'
+#   votes      '804', '76K', '1.2M'
+#   budget     '$2,700,000' (parte vazia)
+#   genres / languages   listas em texto: "['Action', 'Drama']", '[]'
+# A nota depende dos votos, da duração e do gênero (mais ruído), então os
+# modelos têm o que aprender e os tempos de treino ficam realistas. O mesmo
+# seed gera sempre o mesmo arquivo.
+
+GENEROS_IMDB = ['Drama', 'Comedy', 'Action', 'Thriller', 'Romance', 'Crime', 'Horror', 'Adventure',
+                'Mystery', 'Family', 'Fantasy', 'Sci-Fi', 'Biography', 'History', 'Animation', 'Music',
+                'War', 'Documentary', 'Sport', 'Musical', 'Western', 'Film-Noir', 'Short', 'News',
+                'Reality-TV', 'Talk-Show', 'Game-Show']
+IDIOMAS_IMDB = ['English', 'French', 'Spanish', 'German', 'Italian', 'Japanese', 'Hindi', 'Russian',
+                'Mandarin', 'Korean', 'Portuguese', 'Arabic', 'Cantonese', 'Swedish', 'Turkish',
+                'Tamil', 'Telugu', 'Polish', 'Dutch', 'Persian']
+COLUNAS_CSV = ['title', 'year', 'duration', 'rating', 'votes', 'budget', 'genres', 'languages']
+
+
+def vocabulario(base, n, prefixo):
+    """Os n primeiros nomes reais e, se faltar, nomes sintéticos ('Genre27', 'Lang20', ...)."""
+    return base[:n] + [f'{prefixo}{i}' for i in range(len(base), n)]
+
+
+def _formatar_votos(votos):
+    """804 -> '804', 76_400 -> '76K', 1_230_000 -> '1.2M' (como no site do IMDb)."""
+    texto = votos.astype(str).astype(object)
+    mil = (votos >= 1_000) & (votos < 1_000_000)
+    texto[mil] = [f'{v // 1000}K' for v in votos[mil]]
+    milhao = votos >= 1_000_000
+    texto[milhao] = [f'{v / 1e6:.1f}M' for v in votos[milhao]]
+    return texto
+
+
+def _formatar_duracao(minutos):
+    horas, resto = np.divmod(minutos, 60)
+    return np.array([f'{h}h {m}m' if h and m else (f'{h}h' if h else f'{m}m') for h, m in zip(horas, resto)],
+                    dtype=object)
+
+
+def _listas(rng, n, vocab, pesos, maximo, proporcao_vazia):
+    """Listas em texto com 1 a `maximo` itens distintos sorteados por `pesos`."""
+    tamanhos = rng.integers(1, maximo + 1, size=n)
+    tamanhos[rng.random(n) < proporcao_vazia] = 0
+    itens = rng.choice(len(vocab), size=(n, maximo), p=pesos)
+    vocab = np.array([repr(v) for v in vocab], dtype=object)
+    textos = np.empty(n, dtype=object)
+    for i, (tamanho, linha) in enumerate(zip(tamanhos, itens)):
+        escolhidos = sorted(set(linha[:tamanho].tolist()))
+        textos[i] = '[' + ', '.join(vocab[escolhidos]) + ']'
+    return textos, itens[:, 0], tamanhos > 0
+
+
+def gerar_bloco(rng, inicio, n, generos, idiomas):
+    """DataFrame com n filmes sintéticos, títulos numerados a partir de `inicio`."""
+    # Frequências tipo Zipf: poucos gêneros/idiomas muito comuns, cauda longa de raros
+    pesos_generos = 1 / np.arange(1, len(generos) + 1) ** 0.8
+    pesos_idiomas = 1 / np.arange(1, len(idiomas) + 1) ** 1.5
+    textos_generos, genero_principal, tem_genero = _listas(rng, n, generos, pesos_generos / pesos_generos.sum(), 3, 0.02)
+    textos_idiomas, _, _ = _listas(rng, n, idiomas, pesos_idiomas / pesos_idiomas.sum(), 2, 0.01)
+
+    ano = rng.integers(1900, 2026, size=n).astype(np.float64)
+    minutos = np.clip(rng.normal(100, 30, size=n), 1, 400).astype(np.int64)
+    votos = np.minimum(rng.lognormal(7, 2.5, size=n), 3e6).astype(np.int64)
+    orcamento = (np.round(rng.lognormal(16, 1.5, size=n), -5)).astype(np.int64)
+
+    # Nota: mais votos, filmes mais longos e alguns gêneros puxam para cima
+    efeito_genero = np.sin(np.arange(len(generos)) * 1.7)[genero_principal] * tem_genero
+    nota = 3.5 + 0.35 * np.log1p(votos) + 0.01 * (minutos - 100) + 0.8 * efeito_genero + rng.normal(0, 1, size=n)
+    nota = np.round(np.clip(nota, 1, 10), 1)
+
+    df = pd.DataFrame({
+        'title': [f'Movie {i}' for i in range(inicio, inicio + n)],
+        'year': ano,
+        'duration': _formatar_duracao(minutos),
+        'rating': nota,
+        'votes': _formatar_votos(votos),
+        'budget': np.array([f'${v:,}' for v in orcamento], dtype=object),
+        'genres': textos_generos,
+        'languages': textos_idiomas,
+    })
+    # Faltantes nas mesmas proporções do dataset real
+    df.loc[rng.random(n) < 0.01, 'year'] = np.nan
+    df.loc[rng.random(n) < 0.02, 'duration'] = np.nan
+    df.loc[rng.random(n) < 0.30, 'budget'] = np.nan
+    return df
+
+
+def gerar_csv(caminho, n_linhas, n_generos=len(GENEROS_IMDB), n_idiomas=150, seed=42, chunksize=100_000):
+    """Grava `n_linhas` filmes sintéticos em `caminho`, em blocos (a memória não cresce com n_linhas)."""
+    rng = np.random.default_rng(seed)
+    generos = vocabulario(GENEROS_IMDB, n_generos, 'Genre')
+    idiomas = vocabulario(IDIOMAS_IMDB, n_idiomas, 'Lang')
+    with open(caminho, 'w', encoding='utf-8', newline='') as f:
+        for inicio in range(0, n_linhas, chunksize):
+            bloco = gerar_bloco(rng, inicio, min(chunksize, n_linhas - inicio), generos, idiomas)
+            bloco.to_csv(f, header=(inicio == 0), index=False, columns=COLUNAS_CSV)
+    return caminho
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera um CSV sintético no formato do imdb_filmes.csv.")
+    parser.add_argument('saida', help="Caminho do CSV gerado.")
+    parser.add_argument('--linhas', type=int, default=100_000)
+    parser.add_argument('--generos', type=int, default=len(GENEROS_IMDB), help="Número de gêneros distintos.")
+    parser.add_argument('--idiomas', type=int, default=150, help="Número de idiomas distintos.")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    gerar_csv(args.saida, args.linhas, args.generos, args.idiomas, args.seed)
+    print(f"✔ {args.linhas} filmes sintéticos salvos em: {args.saida} ({os.path.getsize(args.saida) / 2**20:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
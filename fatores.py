@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+import json
+import os
+
+# ==================== IMPORTÂNCIA DOS FATORES ====================
+# A importância de cada coluna por modelo fica em um único .npz com arrays
+# alinhados a colunas_modelo.json, no lugar do JSON {modelo: {coluna: valor}}.
+# A ordem dos 4 campos numéricos já vai calculada para cada modelo, então o
+# top-3 de um par (gênero, idioma) só compara dois valores com essa lista.
+
+ARQUIVO_IMPORTANCIAS = 'importancias.npz'
+# Formato antigo, ainda lido como fallback
+ARQUIVO_IMPORTANCIAS_JSON = 'feature_importances.json'
+CAMPOS_NUMERICOS = ['year', 'duration', 'votes', 'budget']
+N_FATORES = 3
+
+
+class Importancias:
+    """Importâncias por modelo, com o ranking dos campos numéricos pré-calculado."""
+
+    def __init__(self, modelos, colunas, valores):
+        self.modelos = list(modelos)
+        self.colunas = list(colunas)
+        # (n_modelos, n_colunas)
+        self.valores = np.asarray(valores, dtype=np.float64)
+        self._linha = {nome: i for i, nome in enumerate(self.modelos)}
+        self._posicao = {coluna: j for j, coluna in enumerate(self.colunas)}
+
+        # Por modelo: [(importância, ordem, campo)] dos numéricos, do maior para o menor.
+        # A ordem original desempata, como no sorted(..., reverse=True) da interface
+        self.ranking_numericos = {}
+        for nome, i in self._linha.items():
+            numericos = [(self.importancia(nome, c), ordem, c) for ordem, c in enumerate(CAMPOS_NUMERICOS)]
+            self.ranking_numericos[nome] = sorted(numericos, key=lambda item: (-item[0], item[1]))
+
+    @classmethod
+    def de_dicionario(cls, importancias, colunas):
+        """{modelo: {coluna: valor}} (saída do treino ou JSON antigo) -> Importancias."""
+        valores = np.zeros((len(importancias), len(colunas)))
+        for i, por_coluna in enumerate(importancias.values()):
+            valores[i] = [por_coluna.get(c, 0) for c in colunas]
+        return cls(list(importancias), colunas, valores)
+
+    def salvar(self, diretorio):
+        caminho = os.path.join(diretorio, ARQUIVO_IMPORTANCIAS)
+        np.savez(caminho, modelos=np.array(self.modelos, dtype=str), colunas=np.array(self.colunas, dtype=str),
+                 valores=self.valores)
+        return caminho
+
+    @classmethod
+    def carregar(cls, diretorio):
+        caminho = os.path.join(diretorio, ARQUIVO_IMPORTANCIAS)
+        if os.path.exists(caminho):
+            with np.load(caminho) as arquivo:
+                return cls(arquivo['modelos'].tolist(), arquivo['colunas'].tolist(), arquivo['valores'])
+        # Artefatos antigos: o JSON com um dicionário por modelo
+        with open(os.path.join(diretorio, ARQUIVO_IMPORTANCIAS_JSON), 'r', encoding='utf-8') as f:
+            importancias = json.load(f)
+        colunas = list(dict.fromkeys(c for por_coluna in importancias.values() for c in por_coluna))
+        return cls.de_dicionario(importancias, colunas)
+
+    def __contains__(self, nome_modelo):
+        return nome_modelo in self._linha
+
+    def importancia(self, nome_modelo, coluna):
+        j = self._posicao.get(coluna)
+        return float(self.valores[self._linha[nome_modelo], j]) if j is not None else 0.0
+
+    def top_fatores(self, nome_modelo, genero, idioma, n=N_FATORES):
+        """
+        Os n fatores mais importantes entre os 4 numéricos, o gênero e o idioma:
+        [(campo, importância)], com campo em CAMPOS_NUMERICOS, 'genero' ou 'idioma'.
+        """
+        candidatos = self.ranking_numericos[nome_modelo][:n] + [
+            (self.importancia(nome_modelo, genero), len(CAMPOS_NUMERICOS), 'genero'),
+            (self.importancia(nome_modelo, idioma), len(CAMPOS_NUMERICOS) + 1, 'idioma'),
+        ]
+        candidatos.sort(key=lambda item: (-item[0], item[1]))
+        return [(campo, valor) for valor, _, campo in candidatos[:n]]
+
+    def top_fatores_lote(self, nome_modelo, generos, idiomas, n=N_FATORES):
+        """Versão vetorizada de top_fatores: array (n_linhas, n) com os campos escolhidos."""
+        linha = self.valores[self._linha[nome_modelo]]
+        indice = pd.Index(self.colunas)
+
+        def pesos(nomes):
+            posicoes = indice.get_indexer(pd.Index(nomes, dtype=object))
+            return np.where(posicoes >= 0, linha[posicoes], 0.0)
+
+        numericos = np.array([self.importancia(nome_modelo, c) for c in CAMPOS_NUMERICOS])
+        todos = np.empty((len(generos), len(CAMPOS_NUMERICOS) + 2))
+        todos[:, :len(CAMPOS_NUMERICOS)] = numericos
+        todos[:, -2] = pesos(generos)
+        todos[:, -1] = pesos(idiomas)
+        ordem = np.argsort(-todos, axis=1, kind='stable')[:, :n]
+        return np.array(CAMPOS_NUMERICOS + ['genero', 'idioma'], dtype=object)[ordem]
@@ -0,0 +1,98 @@
+import pandas as pd
+import numpy as np
+import scipy.sparse as sp
+from itertools import chain
+
+# ==================== MATRIZ DE FEATURES ESPARSA ====================
+# Gêneros e idiomas viram uma matriz multi-hot CSR montada direto das listas já
+# convertidas, usando um mapa vocabulário -> coluna. Sem explode, get_dummies
+# ou groupby: cada filme ocupa só as posições dos seus gêneros/idiomas.
+
+
+def criar_vocabulario(listas):
+    """Vocabulário ordenado (mesma ordem das colunas do get_dummies) a partir de uma Series de listas."""
+    return sorted(set(chain.from_iterable(listas)))
+
+
+def multi_hot_esparso(listas, vocabulario, dtype=np.float64):
+    """
+    Monta a matriz CSR (n_filmes x len(vocabulario)) com 1 nas posições de cada lista.
+    Itens fora do vocabulário são ignorados, como uma coluna que não existe no treino.
+    """
+    tamanhos = listas.str.len().to_numpy(dtype=np.int64)
+    itens = pd.Index(vocabulario).get_indexer(list(chain.from_iterable(listas)))
+
+    conhecidos = itens >= 0
+    if not conhecidos.all():
+        # Recalcula os tamanhos descontando os itens desconhecidos de cada linha
+        linhas = np.repeat(np.arange(len(tamanhos)), tamanhos)
+        tamanhos = np.bincount(linhas[conhecidos], minlength=len(tamanhos))
+        itens = itens[conhecidos]
+
+    indptr = np.concatenate(([0], np.cumsum(tamanhos)))
+    dados = np.ones(len(itens), dtype=dtype)
+    matriz = sp.csr_matrix((dados, itens, indptr), shape=(len(tamanhos), len(vocabulario)))
+    # Item repetido na mesma lista soma, igual ao groupby(...).sum() do caminho denso
+    matriz.sum_duplicates()
+    return matriz
+
+
+def montar_matriz_esparsa(numericas, generos, idiomas):
+    """Junta as colunas numéricas (densas, já escalonadas) às matrizes multi-hot em uma única CSR."""
+    return sp.hstack([sp.csr_matrix(numericas), generos, idiomas], format='csr')
+
+
+def tamanho_em_bytes(X):
+    """Memória ocupada pelos dados de uma matriz densa, DataFrame ou CSR."""
+    if sp.issparse(X):
+        return X.data.nbytes + X.indices.nbytes + X.indptr.nbytes
+    if isinstance(X, pd.DataFrame):
+        return int(X.memory_usage(index=False).sum())
+    return X.nbytes
+
+
+if __name__ == "__main__":
+    # Compara memória, tempo de treino e métricas entre os formatos da matriz:
+    #   python features.py [caminho_csv]
+    # "denso float64" reproduz o layout anterior (indicadores int64, numéricas
+    # float64) a partir do compacto (indicadores uint8, numéricas float32).
+    import sys
+    import time
+    import tracemalloc
+    from sklearn.metrics import accuracy_score, f1_score
+    from main import preparar_dados_em_memoria, criar_modelos
+
+    caminho = sys.argv[1] if len(sys.argv) > 1 else 'imdb_filmes.csv'
+    compacto = preparar_dados_em_memoria(caminho)
+    esparso = preparar_dados_em_memoria(caminho, esparso=True)
+    numericas = [c for c in compacto['colunas'] if c in compacto['scaler'].feature_names_in_]
+    tipos_antigos = {c: 'float64' if c in numericas else 'int64' for c in compacto['colunas']}
+    antigo = dict(compacto, **{nome: compacto[nome].astype(tipos_antigos) for nome in ('X_train', 'X_test')})
+    dados = {'denso float64': antigo, 'denso compacto': compacto, 'esparso': esparso}
+
+    print(f"\n{'Matriz':<16}{'Memória (MB)':>14}")
+    for nome, d in dados.items():
+        print(f"{nome:<16}{tamanho_em_bytes(d['X_train']) / 1e6:>14.1f}")
+
+    # Pico de alocações (tracemalloc: arrays do NumPy e objetos Python) durante o fit
+    print(f"\n{'Modelo':<16}{'Matriz':<16}{'fit (s)':>9}{'predict (s)':>13}{'pico fit (MB)':>15}"
+          f"{'acurácia':>10}{'F1':>8}  previsões")
+    # Só os modelos que aceitam os três formatos
+    for nome_modelo in criar_modelos(esparso=True):
+        referencia = None
+        for nome, d in dados.items():
+            modelo = criar_modelos(esparso=True)[nome_modelo]
+            tracemalloc.start()
+            inicio = time.perf_counter()
+            modelo.fit(d['X_train'], d['y_train'])
+            segundos_fit = time.perf_counter() - inicio
+            pico = tracemalloc.get_traced_memory()[1] / 1e6
+            tracemalloc.stop()
+            inicio = time.perf_counter()
+            y_pred = modelo.predict(d['X_test'])
+            segundos_predict = time.perf_counter() - inicio
+            referencia = y_pred if referencia is None else referencia
+            iguais = (y_pred == referencia).mean()
+            print(f"{nome_modelo:<16}{nome:<16}{segundos_fit:>9.2f}{segundos_predict:>13.2f}{pico:>15.1f}"
+                  f"{accuracy_score(d['y_test'], y_pred):>10.4f}{f1_score(d['y_test'], y_pred):>8.4f}"
+                  f"  {iguais:.2%} iguais ao float64")
@@ -0,0 +1,341 @@
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+import json
+import os
+import shutil
+import time
+from numpy.lib.format import open_memmap
+
+# ==================== ÍNDICE DE FILMES SIMILARES ====================
+# Busca aproximada de vizinhos (IVF, "inverted file") para o painel de filmes
+# similares. O kneighbors do KNN compara a consulta com todas as linhas de
+# treino; aqui as linhas são agrupadas por k-means e cada consulta só compara
+# com as linhas dos n_sondas grupos mais próximos.
+#
+# O k-means e a escolha dos grupos trabalham em uma projeção PCA com poucas
+# dimensões (as centenas de colunas one-hot deixam a atribuição cara); a ordem
+# final dos candidatos usa a distância euclidiana exata nas colunas originais.
+#
+# Formato em disco (tudo .npy, aberto com mmap como os outros artefatos):
+#   vetores.npy     linhas de treino em float32, agrupadas por lista
+#   ids.npy         posição original (no X_train) de cada linha de vetores.npy
+#   inicio.npy      onde começa cada lista em vetores.npy (n_listas + 1)
+#   centroides.npy  centroides das listas no espaço projetado
+#   media.npy / componentes.npy  projeção PCA
+#   metadados.json  n_sondas padrão e dimensões
+
+TAMANHO_BLOCO = 100_000
+N_COMPONENTES = 32
+AMOSTRA_MAXIMA = 100_000
+SEMENTE = 42
+
+
+def _bloco(X, inicio, fim):
+    """Linhas [inicio, fim) de um array, memmap, DataFrame ou CSR, em float32 denso."""
+    if sp.issparse(X):
+        return X[inicio:fim].toarray().astype(np.float32)
+    if isinstance(X, pd.DataFrame):
+        return X.iloc[inicio:fim].to_numpy(dtype=np.float32)
+    return np.asarray(X[inicio:fim], dtype=np.float32)
+
+
+def _linhas(X, indices):
+    if sp.issparse(X):
+        return X[indices].toarray().astype(np.float32)
+    if isinstance(X, pd.DataFrame):
+        return X.iloc[indices].to_numpy(dtype=np.float32)
+    return np.asarray(X[indices], dtype=np.float32)
+
+
+def n_listas_padrao(n):
+    """Cerca de sqrt(n) listas: equilibra o custo de escolher as listas e o de varrê-las."""
+    return int(max(1, min(n, round(np.sqrt(n)))))
+
+
+class IndiceSimilaridade:
+    """Índice IVF sobre as linhas de treino; buscar() devolve posições no X_train, como kneighbors."""
+
+    def __init__(self, vetores, ids, inicio, centroides, media, componentes, n_sondas):
+        self.vetores = vetores
+        self.ids = ids
+        self.inicio = inicio
+        self.centroides = centroides
+        self.media = media
+        self.componentes = componentes
+        self.n_sondas = n_sondas
+
+    @property
+    def n_listas(self):
+        return len(self.centroides)
+
+    def _projetar(self, X):
+        return (np.asarray(X, dtype=np.float32) - self.media) @ self.componentes.T
+
+    @classmethod
+    def construir(cls, X, diretorio, n_listas=None, n_sondas=16, n_componentes=N_COMPONENTES):
+        """
+        Constrói o índice sobre as linhas de X e grava em `diretorio`. X é lido em
+        blocos, então pode ser um memmap maior que a memória.
+        """
+        # Importados aqui: a interface só consulta o índice e não precisa carregar o sklearn para isso
+        from sklearn.cluster import MiniBatchKMeans
+        from sklearn.decomposition import PCA
+
+        n, d = X.shape
+        n_listas = n_listas or n_listas_padrao(n)
+        rng = np.random.default_rng(SEMENTE)
+        amostra = _linhas(X, np.sort(rng.choice(n, min(n, AMOSTRA_MAXIMA), replace=False)))
+
+        pca = PCA(n_components=min(n_componentes, d, len(amostra)), random_state=SEMENTE).fit(amostra)
+        media = pca.mean_.astype(np.float32)
+        componentes = pca.components_.astype(np.float32)
+        projetada = (amostra - media) @ componentes.T
+        kmeans = MiniBatchKMeans(n_clusters=n_listas, batch_size=max(1024, 4 * n_listas), n_init=1,
+                                 random_state=SEMENTE).fit(projetada)
+        centroides = kmeans.cluster_centers_.astype(np.float32)
+
+        # Primeira passada: a lista de cada linha
+        listas = np.empty(n, dtype=np.int32)
+        for i in range(0, n, TAMANHO_BLOCO):
+            listas[i:i + TAMANHO_BLOCO] = kmeans.predict((_bloco(X, i, i + TAMANHO_BLOCO) - media) @ componentes.T)
+
+        ordem = np.argsort(listas, kind='stable')
+        inicio = np.concatenate(([0], np.cumsum(np.bincount(listas, minlength=n_listas)))).astype(np.int64)
+        destino = np.empty(n, dtype=np.int64)
+        destino[ordem] = np.arange(n)
+
+        # Segunda passada: copia cada linha para a posição da sua lista
+        temporario = diretorio + '.tmp'
+        shutil.rmtree(temporario, ignore_errors=True)
+        os.makedirs(temporario)
+        vetores = open_memmap(os.path.join(temporario, 'vetores.npy'), mode='w+', dtype=np.float32, shape=(n, d))
+        for i in range(0, n, TAMANHO_BLOCO):
+            bloco = _bloco(X, i, i + TAMANHO_BLOCO)
+            vetores[destino[i:i + len(bloco)]] = bloco
+        vetores.flush()
+        del vetores
+
+        ids = ordem.astype(np.int32 if n < 2**31 else np.int64)
+        for nome, valor in (('ids', ids), ('inicio', inicio), ('centroides', centroides),
+                            ('media', media), ('componentes', componentes)):
+            np.save(os.path.join(temporario, f'{nome}.npy'), valor)
+        with open(os.path.join(temporario, 'metadados.json'), 'w', encoding='utf-8') as f:
+            json.dump({'n_sondas': n_sondas, 'linhas': n, 'colunas': d, 'n_listas': n_listas}, f)
+
+        shutil.rmtree(diretorio, ignore_errors=True)
+        os.replace(temporario, diretorio)
+        return cls.carregar(diretorio)
+
+    @classmethod
+    def carregar(cls, diretorio, mmap_mode='r'):
+        with open(os.path.join(diretorio, 'metadados.json'), 'r', encoding='utf-8') as f:
+            metadados = json.load(f)
+        arrays = {nome: np.load(os.path.join(diretorio, f'{nome}.npy'), mmap_mode=mmap_mode)
+                  for nome in ('vetores', 'ids', 'inicio', 'centroides', 'media', 'componentes')}
+        # Os arrays pequenos usados em toda consulta ficam na memória
+        for nome in ('inicio', 'centroides', 'media', 'componentes'):
+            arrays[nome] = np.array(arrays[nome])
+        return cls(**arrays, n_sondas=metadados['n_sondas'])
+
+    def buscar(self, consultas, k=3, n_sondas=None):
+        """
+        Os k vizinhos aproximados de cada consulta: (distancias, indices), no
+        mesmo formato de kneighbors. Os índices são posições no X_train.
+        """
+        consultas = np.asarray(consultas, dtype=np.float32)
+        n_sondas = min(n_sondas or self.n_sondas, self.n_listas)
+        projetadas = self._projetar(consultas)
+        distancias_centroides = ((projetadas[:, None, :] - self.centroides[None, :, :]) ** 2).sum(axis=2)
+        sondas = np.argpartition(distancias_centroides, n_sondas - 1, axis=1)[:, :n_sondas]
+
+        distancias = np.full((len(consultas), k), np.inf)
+        indices = np.full((len(consultas), k), -1, dtype=np.int64)
+        for i, consulta in enumerate(consultas):
+            faixas = [np.arange(self.inicio[s], self.inicio[s + 1]) for s in sondas[i]]
+            candidatos = np.concatenate(faixas)
+            if not len(candidatos):
+                continue
+            # Cada lista é um trecho contíguo de vetores.npy: a leitura são n_sondas trechos sequenciais
+            candidatos.sort()
+            diferenca = self.vetores[candidatos] - consulta
+            d2 = np.einsum('ij,ij->i', diferenca, diferenca)
+            m = min(k, len(candidatos))
+            melhores = np.argpartition(d2, m - 1)[:m] if m < len(candidatos) else np.arange(len(candidatos))
+            melhores = melhores[np.argsort(d2[melhores], kind='stable')]
+            distancias[i, :m] = np.sqrt(d2[melhores])
+            indices[i, :m] = self.ids[candidatos[melhores]]
+        return distancias, indices
+
+    def acrescentar(self, X_novos, diretorio, posicoes=None, escala=None, deslocamento=None):
+        """
+        Acrescenta as linhas de X_novos (ids continuando depois do último) sem
+        refazer o PCA nem o k-means: cada linha nova vai para a lista do centroide
+        mais próximo e o arquivo é regravado com as listas ainda contíguas.
+
+        X_novos pode ter colunas a mais (vocabulário novo), que ficam zeradas nas
+        linhas antigas. Se o scaler mudou, as colunas `posicoes` das linhas antigas
+        passam para a escala nova (x * escala + deslocamento) e a projeção é
+        ajustada para dar os mesmos valores, então as listas continuam válidas.
+        Grava em `diretorio` e devolve o índice reaberto de lá.
+        """
+        n_antigas, d_antigo = self.vetores.shape
+        X_novos = _bloco(X_novos, 0, X_novos.shape[0])
+        m, d = X_novos.shape
+        media = np.zeros(d, dtype=np.float32)
+        media[:d_antigo] = self.media
+        componentes = np.zeros((len(self.componentes), d), dtype=np.float32)
+        componentes[:, :d_antigo] = self.componentes
+        if posicoes is not None:
+            posicoes = np.asarray(posicoes, dtype=np.intp)
+            escala = np.asarray(escala, dtype=np.float32)
+            deslocamento = np.asarray(deslocamento, dtype=np.float32)
+            # (x - media) @ c.T == (x * e + s - (media * e + s)) @ (c / e).T
+            media[posicoes] = media[posicoes] * escala + deslocamento
+            componentes[:, posicoes] /= escala
+
+        n_listas = self.n_listas
+        projetadas = (X_novos - media) @ componentes.T
+        listas_novas = np.argmin(((projetadas[:, None, :] - self.centroides[None, :, :]) ** 2).sum(axis=2), axis=1)
+        por_lista_antigas = np.diff(self.inicio)
+        por_lista_novas = np.bincount(listas_novas, minlength=n_listas)
+        inicio = np.concatenate(([0], np.cumsum(por_lista_antigas + por_lista_novas))).astype(np.int64)
+
+        # Destino de cada linha: as antigas andam o número de novas das listas anteriores;
+        # as novas entram no fim da sua lista, na ordem de chegada
+        lista_das_antigas = np.repeat(np.arange(n_listas), por_lista_antigas)
+        destino_antigas = np.arange(n_antigas) + (inicio[:-1] - self.inicio[:-1])[lista_das_antigas]
+        ordem = np.argsort(listas_novas, kind='stable')
+        rank = np.empty(m, dtype=np.int64)
+        rank[ordem] = np.arange(m) - np.repeat(np.cumsum(por_lista_novas) - por_lista_novas, por_lista_novas)
+        destino_novas = inicio[listas_novas] + por_lista_antigas[listas_novas] + rank
+
+        n = n_antigas + m
+        temporario = diretorio + '.tmp'
+        shutil.rmtree(temporario, ignore_errors=True)
+        os.makedirs(temporario)
+        vetores = open_memmap(os.path.join(temporario, 'vetores.npy'), mode='w+', dtype=np.float32, shape=(n, d))
+        for i in range(0, n_antigas, TAMANHO_BLOCO):
+            bloco = np.zeros((min(TAMANHO_BLOCO, n_antigas - i), d), dtype=np.float32)
+            bloco[:, :d_antigo] = self.vetores[i:i + TAMANHO_BLOCO]
+            if posicoes is not None:
+                bloco[:, posicoes] = bloco[:, posicoes] * escala + deslocamento
+            vetores[destino_antigas[i:i + len(bloco)]] = bloco
+        vetores[destino_novas] = X_novos
+        vetores.flush()
+        del vetores
+
+        ids = np.empty(n, dtype=np.int32 if n < 2**31 else np.int64)
+        ids[destino_antigas] = self.ids
+        primeiro_id = int(np.max(self.ids)) + 1 if n_antigas else 0
+        ids[destino_novas] = np.arange(primeiro_id, primeiro_id + m)
+        for nome, valor in (('ids', ids), ('inicio', inicio), ('centroides', self.centroides),
+                            ('media', media), ('componentes', componentes)):
+            np.save(os.path.join(temporario, f'{nome}.npy'), valor)
+        with open(os.path.join(temporario, 'metadados.json'), 'w', encoding='utf-8') as f:
+            json.dump({'n_sondas': self.n_sondas, 'linhas': n, 'colunas': d, 'n_listas': n_listas}, f)
+
+        shutil.rmtree(diretorio, ignore_errors=True)
+        os.replace(temporario, diretorio)
+        return type(self).carregar(diretorio)
+
+
+def busca_exata(X, consultas, k=3):
+    """Força bruta em blocos, para medir o recall do índice."""
+    consultas = np.asarray(consultas, dtype=np.float32)
+    melhores_d = np.full((len(consultas), k), np.inf, dtype=np.float32)
+    melhores_i = np.full((len(consultas), k), -1, dtype=np.int64)
+    normas_q = (consultas ** 2).sum(axis=1)[:, None]
+    for inicio in range(0, X.shape[0], TAMANHO_BLOCO):
+        bloco = _bloco(X, inicio, inicio + TAMANHO_BLOCO)
+        d2 = normas_q - 2 * consultas @ bloco.T + (bloco ** 2).sum(axis=1)[None, :]
+        juntos_d = np.concatenate([melhores_d, d2], axis=1)
+        juntos_i = np.concatenate([melhores_i, np.broadcast_to(np.arange(inicio, inicio + len(bloco)), d2.shape)], axis=1)
+        escolha = np.argsort(juntos_d, axis=1, kind='stable')[:, :k]
+        melhores_d = np.take_along_axis(juntos_d, escolha, axis=1)
+        melhores_i = np.take_along_axis(juntos_i, escolha, axis=1)
+    return np.sqrt(np.maximum(melhores_d, 0)), melhores_i
+
+
+def recall(distancias_aprox, distancias_exatas, tolerancia=1e-4):
+    """
+    Fração dos k vizinhos devolvidos que estão entre os k mais próximos de verdade.
+    Compara por distância para não penalizar empates (filmes com as mesmas features).
+    """
+    limite = distancias_exatas[:, -1:] * (1 + tolerancia) + tolerancia
+    return float((distancias_aprox <= limite).mean())
+
+
+def _gerar_catalogo_sintetico(caminho, n, n_generos=21, n_idiomas=154, semente=0):
+    """Matriz no formato do X_train (4 numéricas escaladas + multi-hot), gravada em blocos em um .npy."""
+    rng = np.random.default_rng(semente)
+    d = 4 + n_generos + n_idiomas
+    X = open_memmap(caminho, mode='w+', dtype=np.float32, shape=(n, d))
+    pesos_idiomas = 1.0 / np.arange(1, n_idiomas + 1) ** 1.2
+    pesos_idiomas /= pesos_idiomas.sum()
+    for inicio in range(0, n, TAMANHO_BLOCO):
+        m = min(TAMANHO_BLOCO, n - inicio)
+        bloco = np.zeros((m, d), dtype=np.float32)
+        bloco[:, :4] = rng.normal(size=(m, 4))
+        linhas = np.arange(m)
+        for _ in range(3):
+            # 1 a 3 gêneros por filme (repetições só reescrevem o mesmo 1)
+            bloco[linhas, 4 + rng.integers(0, n_generos, len(linhas))] = 1.0
+            linhas = linhas[rng.random(len(linhas)) < 0.5]
+        bloco[np.arange(m), 4 + n_generos + rng.choice(n_idiomas, m, p=pesos_idiomas)] = 1.0
+        X[inicio:inicio + m] = bloco
+    X.flush()
+    return np.load(caminho, mmap_mode='r')
+
+
+if __name__ == "__main__":
+    # Recall contra a busca exata e latência por consulta:
+    #   python indice_similaridade.py [tamanhos...]        (catálogos sintéticos; padrão 100000 1000000)
+    #   python indice_similaridade.py --artefatos DIR      (índice salvo pelo main.py, consultas do teste)
+    import sys
+    import tempfile
+
+    K = 3
+    N_CONSULTAS = 200
+    SONDAS = [1, 2, 4, 8, 16, 32]
+
+    def relatorio(X, indice, consultas, rotulo):
+        inicio = time.perf_counter()
+        exatas_d, _ = busca_exata(X, consultas, K)
+        tempo_exato = (time.perf_counter() - inicio) / len(consultas) * 1000
+        print(f"{rotulo}: {indice.n_listas} listas | busca exata {tempo_exato:.2f} ms/consulta")
+        for n_sondas in SONDAS:
+            if n_sondas > indice.n_listas:
+                break
+            # Consultas uma a uma, como na interface
+            inicio = time.perf_counter()
+            resultados = [indice.buscar(c[None, :], K, n_sondas)[0] for c in consultas]
+            tempo = (time.perf_counter() - inicio) / len(consultas) * 1000
+            r = recall(np.vstack(resultados), exatas_d)
+            print(f"  n_sondas={n_sondas:>2}: recall@{K} {r:.3f} | {tempo:.2f} ms/consulta "
+                  f"| ganho {tempo_exato / tempo:.0f}x")
+
+    if len(sys.argv) > 2 and sys.argv[1] == '--artefatos':
+        base_path = sys.argv[2]
+        indice = IndiceSimilaridade.carregar(os.path.join(base_path, 'indice_similares'))
+        # Sem o X_train no artefato, a referência exata são os próprios vetores do índice
+        # e as consultas são linhas deles com ruído
+        X = indice.vetores
+        rng = np.random.default_rng(1)
+        consultas = np.asarray(X[rng.choice(len(X), N_CONSULTAS, replace=False)]).copy()
+        consultas[:, :4] += rng.normal(scale=0.1, size=(N_CONSULTAS, 4))
+        relatorio(X, indice, consultas, f"{base_path} ({len(X)} filmes)")
+        sys.exit(0)
+
+    tamanhos = [int(t) for t in sys.argv[1:]] or [100_000, 1_000_000]
+    with tempfile.TemporaryDirectory(prefix='cinescope_indice_') as temp:
+        for n in tamanhos:
+            print(f"\n{'='*40}\nCatálogo sintético com {n} filmes\n{'='*40}")
+            X = _gerar_catalogo_sintetico(os.path.join(temp, f'X_{n}.npy'), n)
+            inicio = time.perf_counter()
+            indice = IndiceSimilaridade.construir(X, os.path.join(temp, f'indice_{n}'))
+            print(f"⏱ Índice construído em {time.perf_counter() - inicio:.1f}s")
+            rng = np.random.default_rng(1)
+            consultas = _gerar_catalogo_sintetico(os.path.join(temp, 'consultas.npy'), N_CONSULTAS, semente=n)
+            relatorio(X, indice, np.asarray(consultas), f"{n} filmes")
+            del X, indice
@@ -0,0 +1,221 @@
+import pandas as pd
+import numpy as np
+import os
+from collections import Counter
+from itertools import chain
+from sklearn.preprocessing import StandardScaler
+from preprocessamento import limpar_dataframe, COLUNAS_PARA_ESCALAR
+from features import multi_hot_esparso, montar_matriz_esparsa
+from artefatos import DIRETORIO_TITULOS
+from titulos import EscritorTitulos
+from instrumentacao import etapa
+
+# ==================== INGESTÃO EM CHUNKS (OUT-OF-CORE) ====================
+# O CSV é lido duas vezes em blocos de tamanho fixo:
+#   1ª passada: limpa cada chunk e acumula as estatísticas globais (mediana do
+#               orçamento, vocabulários de gêneros/idiomas, média/variância do scaler).
+#   2ª passada: limpa de novo, codifica e grava as linhas direto em arquivos .npy
+#               mapeados em memória, que o treinamento lê sem carregá-los inteiros.
+# Assim o pico de memória depende do chunksize, não do tamanho do CSV.
+
+# Fração das linhas que vai para o conjunto de teste
+PROPORCAO_TESTE = 0.2
+
+
+def eh_teste(indices):
+    """
+    Divisão treino/teste determinística por hash multiplicativo do índice da linha.
+    Não depende do chunksize e não precisa ver o dataset inteiro, ao contrário
+    do train_test_split estratificado do modo em memória.
+    """
+    hash_indices = (indices.astype(np.uint64) * np.uint64(2654435761)) % np.uint64(2**32)
+    return hash_indices < np.uint64(PROPORCAO_TESTE * 2**32)
+
+
+def _ler_chunks(caminho_csv, chunksize):
+    """Lê o CSV em blocos e devolve cada um já limpo (sem preencher o 'budget')."""
+    leitor = pd.read_csv(caminho_csv, chunksize=chunksize)
+    while True:
+        # A leitura fica fora do yield para a etapa não medir o trabalho de quem consome o chunk
+        with etapa('carregar_csv'):
+            chunk = next(leitor, None)
+        if chunk is None:
+            return
+        yield len(chunk), limpar_dataframe(chunk)
+
+
+class EstatisticasGlobais:
+    """Estatísticas acumuladas chunk a chunk na primeira passada."""
+
+    def __init__(self):
+        self.linhas_lidas = 0
+        self.n_treino = 0
+        self.n_teste = 0
+        self.generos = set()
+        self.idiomas = set()
+        # Contagem de cada orçamento distinto: dá a mediana exata com memória
+        # proporcional ao número de valores distintos, não ao de linhas
+        self.contagem_budget = Counter()
+        # Orçamentos nulos do treino, que depois recebem a mediana
+        self.budget_nulos_treino = 0
+        self.scaler = StandardScaler()
+
+    def atualizar(self, df, teste):
+        self.n_teste += int(teste.sum())
+        self.n_treino += int((~teste).sum())
+
+        self.generos.update(chain.from_iterable(df['genres']))
+        self.idiomas.update(chain.from_iterable(df['languages']))
+
+        self.contagem_budget.update(df['budget'].dropna().value_counts().to_dict())
+
+        # O StandardScaler ignora NaN no partial_fit, então o orçamento nulo
+        # fica de fora aqui e é compensado em finalizar()
+        treino = df.loc[~teste, COLUNAS_PARA_ESCALAR].astype('float64')
+        if len(treino):
+            self.budget_nulos_treino += int(treino['budget'].isna().sum())
+            self.scaler.partial_fit(treino)
+
+    def mediana_budget(self):
+        """Mediana exata a partir da contagem de valores distintos."""
+        if not self.contagem_budget:
+            return np.nan
+        valores = np.array(sorted(self.contagem_budget))
+        acumulado = np.cumsum([self.contagem_budget[v] for v in valores])
+        total = acumulado[-1]
+        # Mesmo critério do Series.median(): média dos dois centrais quando o total é par
+        baixo = valores[np.searchsorted(acumulado, (total + 1) // 2)]
+        alto = valores[np.searchsorted(acumulado, total // 2 + 1)]
+        return (baixo + alto) / 2
+
+    def finalizar(self):
+        """
+        Inclui no scaler os orçamentos nulos do treino, agora preenchidos com a mediana.
+        Juntar k valores iguais à mediana numa média/variância já acumulada tem forma
+        fechada, então não é preciso reler nada.
+        """
+        mediana = self.mediana_budget()
+        k = self.budget_nulos_treino
+        if k == 0:
+            return mediana
+
+        col = COLUNAS_PARA_ESCALAR.index('budget')
+        n = self.scaler.n_samples_seen_[col]
+        media, variancia = self.scaler.mean_[col], self.scaler.var_[col]
+        if n == 0:
+            media, variancia = mediana, 0.0
+        total = n + k
+        nova_media = (n * media + k * mediana) / total
+        nova_variancia = (n * variancia + n * k / total * (media - mediana) ** 2) / total
+
+        self.scaler.n_samples_seen_[col] = total
+        self.scaler.mean_[col] = nova_media
+        self.scaler.var_[col] = nova_variancia
+        # Mesmo tratamento do StandardScaler para desvio zero
+        self.scaler.scale_[col] = np.sqrt(nova_variancia) if nova_variancia > 0 else 1.0
+        return mediana
+
+
+def _codificar_chunk(df, scaler, generos, idiomas):
+    """Monta a matriz de features (numéricas escalonadas + multi-hot) de um chunk."""
+    numericas = scaler.transform(df[COLUNAS_PARA_ESCALAR].astype('float64'))
+    X = montar_matriz_esparsa(numericas,
+                              multi_hot_esparso(df['genres'], generos),
+                              multi_hot_esparso(df['languages'], idiomas))
+    return X.toarray().astype(np.float32, copy=False)
+
+
+def preparar_dados_streaming(caminho_csv, output_dir, chunksize=100_000):
+    """
+    Prepara os dados de treino/teste lendo o CSV em chunks.
+    Retorna o mesmo dicionário do modo em memória; X_train/X_test são DataFrames
+    sobre arquivos .npy mapeados em memória (float32) em output_dir/streaming.
+    """
+    # --------------------- 1ª passada: estatísticas globais ---------------------
+    estatisticas = EstatisticasGlobais()
+    with etapa('primeira_passada'):
+        for linhas_lidas, df in _ler_chunks(caminho_csv, chunksize):
+            estatisticas.linhas_lidas += linhas_lidas
+            with etapa('acumular_estatisticas'):
+                estatisticas.atualizar(df, eh_teste(df.index.to_numpy()))
+
+    mediana = estatisticas.finalizar()
+    scaler = estatisticas.scaler
+    generos = sorted(estatisticas.generos)
+    idiomas = sorted(estatisticas.idiomas)
+
+    print(f"Dataset original: {estatisticas.linhas_lidas} filmes (lidos em chunks de {chunksize})")
+    print(f"Dataset final: {estatisticas.n_treino + estatisticas.n_teste} filmes")
+
+    # Mesma ordem de colunas do modo em memória: numéricas, gêneros e idiomas
+    colunas = COLUNAS_PARA_ESCALAR + generos + idiomas
+
+    # --------------------- 2ª passada: codificação em disco ---------------------
+    dir_streaming = os.path.join(output_dir, 'streaming')
+    os.makedirs(dir_streaming, exist_ok=True)
+
+    def criar(nome, forma, dtype):
+        return np.lib.format.open_memmap(os.path.join(dir_streaming, nome), mode='w+', dtype=dtype, shape=forma)
+
+    X_train = criar('X_train.npy', (estatisticas.n_treino, len(colunas)), np.float32)
+    X_test = criar('X_test.npy', (estatisticas.n_teste, len(colunas)), np.float32)
+    y_train = criar('y_train.npy', (estatisticas.n_treino,), np.int8)
+    y_test = criar('y_test.npy', (estatisticas.n_teste,), np.int8)
+
+    # Títulos do treino vão direto para a loja de títulos usada pela interface
+    titulos = EscritorTitulos(os.path.join(output_dir, DIRETORIO_TITULOS), estatisticas.n_treino)
+
+    pos_treino, pos_teste = 0, 0
+    sucessos = 0
+    with etapa('segunda_passada'):
+        for _, df in _ler_chunks(caminho_csv, chunksize):
+            with etapa('codificar'):
+                df['budget'] = df['budget'].fillna(mediana)
+                teste = eh_teste(df.index.to_numpy())
+                X_chunk = _codificar_chunk(df, scaler, generos, idiomas)
+                y_chunk = (df['rating'] >= 7).to_numpy(dtype=np.int8)
+                sucessos += int(y_chunk.sum())
+
+            with etapa('gravar_em_disco'):
+                n_tr, n_te = int((~teste).sum()), int(teste.sum())
+                X_train[pos_treino:pos_treino + n_tr] = X_chunk[~teste]
+                y_train[pos_treino:pos_treino + n_tr] = y_chunk[~teste]
+                X_test[pos_teste:pos_teste + n_te] = X_chunk[teste]
+                y_test[pos_teste:pos_teste + n_te] = y_chunk[teste]
+                pos_treino += n_tr
+                pos_teste += n_te
+
+                # Mesma ordem das linhas de X_train
+                titulos.adicionar(df['title'][~teste])
+
+    titulos.fechar()
+
+    total = pos_treino + pos_teste
+    if total:
+        print(f"Distribuição do target: Sucessos={sucessos} ({sucessos / total:.1%}), "
+              f"Não sucessos={total - sucessos} ({(total - sucessos) / total:.1%})")
+
+    for arquivo in (X_train, X_test, y_train, y_test):
+        arquivo.flush()
+
+    # Reabre em copy-on-write: o treinamento lê as páginas sob demanda do disco e
+    # nada é gravado de volta (o sklearn recusa buffers somente leitura em algumas checagens)
+    def abrir(nome):
+        return np.load(os.path.join(dir_streaming, nome), mmap_mode='c')
+
+    return {
+        'X_train': pd.DataFrame(abrir('X_train.npy'), columns=colunas, copy=False),
+        'X_test': pd.DataFrame(abrir('X_test.npy'), columns=colunas, copy=False),
+        'y_train': abrir('y_train.npy'),
+        'y_test': abrir('y_test.npy'),
+        'scaler': scaler,
+        'generos': generos,
+        'idiomas': idiomas,
+        'colunas': colunas,
+        'titulos_treino': None,
+        # Para a atualização incremental (atualizacao_incremental.py)
+        'linhas_lidas': estatisticas.linhas_lidas,
+        'orcamentos': (np.array(sorted(estatisticas.contagem_budget), dtype=np.float64),
+                       np.array([estatisticas.contagem_budget[v] for v in sorted(estatisticas.contagem_budget)],
+                                dtype=np.float64)),
+    }
@@ -0,0 +1,270 @@
+import cProfile
+import json
+import os
+import platform
+import pstats
+import re
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# ==================== INSTRUMENTAÇÃO DAS ETAPAS ====================
+# Cada etapa do pipeline (carregar, converter, dividir, escalonar, treinar...)
+# roda dentro de `with etapa('nome'):`. Sem uma Instrumentacao ativa a etapa
+# não registra nada e praticamente não custa. Com ela ativa, cada
+# etapa registra:
+#   segundos / cpu_segundos     tempo de parede e de CPU do processo
+#   rss_antes_mb / rss_depois_mb / rss_pico_processo_mb
+#   tracemalloc_pico_mb         pico de alocações Python/NumPy (opcional, deixa tudo mais lento)
+#   perfil                      as funções mais caras pelo cProfile (opcional)
+#
+# Etapas aninhadas viram caminhos ('preparar_dados/converter_numericos') e
+# etapas repetidas (um chunk por vez no modo streaming) são somadas em uma
+# entrada só, com o número de chamadas. O relatório vai em JSON para
+# comparar execuções com tamanhos de dataset ou versões do código diferentes.
+
+ARQUIVO_RELATORIO = 'relatorio_etapas.json'
+DIRETORIO_PERFIS = 'perfis'
+N_FUNCOES_PERFIL = 15
+
+_ativa = None
+
+
+def rss_mb():
+    """Memória residente atual do processo, ou None fora do Linux."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def pico_rss_mb():
+    """Maior memória residente do processo até agora, ou None sem o módulo resource."""
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss vem em KB no Linux e em bytes no macOS
+    return pico / 2**20 if sys.platform == 'darwin' else pico / 2**10
+
+
+def _versao(modulo):
+    return getattr(sys.modules.get(modulo), '__version__', None)
+
+
+def _commit_git(diretorio):
+    """Commit atual do repositório do código, lido direto de .git (None fora de um repositório)."""
+    git = os.path.join(diretorio, '.git')
+    try:
+        with open(os.path.join(git, 'HEAD')) as f:
+            head = f.read().strip()
+        if not head.startswith('ref: '):
+            return head
+        referencia = head[5:]
+        caminho = os.path.join(git, referencia)
+        if os.path.exists(caminho):
+            with open(caminho) as f:
+                return f.read().strip()
+        with open(os.path.join(git, 'packed-refs')) as f:
+            for linha in f:
+                if linha.rstrip().endswith(' ' + referencia):
+                    return linha.split()[0]
+    except OSError:
+        pass
+    return None
+
+
+def ambiente():
+    """Versões e máquina, para saber se dois relatórios são comparáveis."""
+    return {
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'cpus': os.cpu_count(),
+        'numpy': _versao('numpy'),
+        'pandas': _versao('pandas'),
+        'sklearn': _versao('sklearn'),
+        'commit': _commit_git(os.path.dirname(os.path.abspath(__file__))),
+    }
+
+
+class Instrumentacao:
+    """Coleta as medições das etapas de uma execução e grava o relatório."""
+
+    def __init__(self, usar_tracemalloc=False, perfil=False, diretorio_perfis=None):
+        self.usar_tracemalloc = usar_tracemalloc
+        self.perfil = perfil
+        self.diretorio_perfis = diretorio_perfis
+        self.etapas = {}
+        self.inicio = time.perf_counter()
+        self.criado_em = time.strftime('%Y-%m-%d %H:%M:%S')
+        self.pilha = []
+
+    def __enter__(self):
+        global _ativa
+        self._anterior = _ativa
+        _ativa = self
+        if self.usar_tracemalloc and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        return self
+
+    def __exit__(self, *excecao):
+        global _ativa
+        _ativa = self._anterior
+        if self.usar_tracemalloc and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        return False
+
+    def caminho(self, nome):
+        return '/'.join([m['etapa'] for m in self.pilha] + [nome])
+
+    def registrar(self, medicao):
+        """Guarda uma medição; etapas com o mesmo caminho são somadas."""
+        chave = medicao['etapa']
+        anterior = self.etapas.get(chave)
+        if anterior is None:
+            # Medições de outros processos não sabem quando começaram neste relógio
+            self.etapas[chave] = dict(medicao, chamadas=1)
+            self.etapas[chave].setdefault('inicio_s', time.perf_counter() - self.inicio)
+            return
+        anterior['chamadas'] += 1
+        for campo in ('segundos', 'cpu_segundos'):
+            if medicao.get(campo) is not None:
+                anterior[campo] = (anterior.get(campo) or 0.0) + medicao[campo]
+        for campo in ('rss_pico_processo_mb', 'tracemalloc_pico_mb'):
+            if medicao.get(campo) is not None:
+                anterior[campo] = max(anterior.get(campo) or 0.0, medicao[campo])
+        anterior['rss_depois_mb'] = medicao.get('rss_depois_mb')
+
+    def etapas_em_ordem(self):
+        # As etapas são registradas ao terminar; o início devolve a ordem de execução (mãe antes das filhas)
+        return sorted(self.etapas.values(), key=lambda m: m['inicio_s'])
+
+    def relatorio(self, **contexto):
+        return {
+            'criado_em': self.criado_em,
+            'segundos_total': time.perf_counter() - self.inicio,
+            'rss_pico_processo_mb': pico_rss_mb(),
+            'ambiente': ambiente(),
+            'contexto': contexto,
+            'tracemalloc': self.usar_tracemalloc,
+            'perfil': self.perfil,
+            'etapas': self.etapas_em_ordem(),
+        }
+
+    def salvar(self, diretorio, **contexto):
+        os.makedirs(diretorio, exist_ok=True)
+        caminho = os.path.join(diretorio, ARQUIVO_RELATORIO)
+        with open(caminho, 'w', encoding='utf-8') as f:
+            json.dump(self.relatorio(**contexto), f, indent=2, ensure_ascii=False, default=str)
+        return caminho
+
+    def imprimir_resumo(self):
+        """Uma linha por etapa, recuada pelo nível de aninhamento."""
+        print(f"\n{'='*60}\nTEMPO E MEMÓRIA POR ETAPA\n{'='*60}")
+        for medicao in self.etapas_em_ordem():
+            nivel = medicao['etapa'].count('/')
+            nome = medicao['etapa'].rsplit('/', 1)[-1]
+            vezes = f" ({medicao['chamadas']}x)" if medicao['chamadas'] > 1 else ""
+            memoria = []
+            if medicao.get('rss_depois_mb') is not None:
+                memoria.append(f"RSS {medicao['rss_depois_mb']:.0f} MB")
+            if medicao.get('tracemalloc_pico_mb') is not None:
+                memoria.append(f"pico alocado {medicao['tracemalloc_pico_mb']:.1f} MB")
+            print(f"⏱ {'  ' * nivel}{nome}{vezes}: {medicao['segundos']:.2f}s"
+                  + (f" | {' | '.join(memoria)}" if memoria else ""))
+
+
+def _resumir_perfil(perfilador, nome, diretorio):
+    estatisticas = pstats.Stats(perfilador)
+    if diretorio:
+        os.makedirs(diretorio, exist_ok=True)
+        estatisticas.dump_stats(os.path.join(diretorio, re.sub(r'[^\w.-]+', '_', nome) + '.prof'))
+    linhas = sorted(estatisticas.stats.items(), key=lambda item: item[1][3], reverse=True)
+    return [{'funcao': f"{arquivo}:{linha}({funcao})", 'chamadas': chamadas,
+             'tempo_proprio': proprio, 'tempo_acumulado': acumulado}
+            for (arquivo, linha, funcao), (_, chamadas, proprio, acumulado, _) in linhas[:N_FUNCOES_PERFIL]]
+
+
+@contextmanager
+def medir(nome, **info):
+    """
+    Mede um trecho e devolve a medição (um dicionário) sem registrá-la. Quem
+    chama pode completar o dicionário dentro do bloco (ex.: número de linhas).
+    Funciona também nos processos do pool de treino, onde não há Instrumentacao ativa.
+    """
+    instrumentacao = _ativa
+    caminho = instrumentacao.caminho(nome) if instrumentacao else nome
+    medicao = {'etapa': nome, **info, 'pid': os.getpid(), 'rss_antes_mb': rss_mb()}
+
+    mae = instrumentacao.pilha[-1] if instrumentacao is not None and instrumentacao.pilha else None
+    rastrear = instrumentacao is not None and instrumentacao.usar_tracemalloc and tracemalloc.is_tracing()
+    if rastrear:
+        alocado_antes, pico_ate_aqui = tracemalloc.get_traced_memory()
+        # reset_peak() apaga o pico da etapa mãe: ele fica guardado em _pico_filhas
+        if mae is not None and '_pico_filhas' in mae:
+            mae['_pico_filhas'] = max(mae['_pico_filhas'], pico_ate_aqui)
+        tracemalloc.reset_peak()
+        medicao['_pico_filhas'] = 0
+    # Só um cProfile roda por vez: o da etapa mãe pausa enquanto a filha roda,
+    # então cada perfil mostra só o que é da própria etapa
+    perfilador = None
+    if instrumentacao is not None and instrumentacao.perfil:
+        perfilador = cProfile.Profile()
+        medicao['_perfilador'] = perfilador
+        if mae is not None and '_perfilador' in mae:
+            mae['_perfilador'].disable()
+    if instrumentacao is not None:
+        instrumentacao.pilha.append(medicao)
+
+    inicio, inicio_cpu = time.perf_counter(), time.process_time()
+    if instrumentacao is not None:
+        medicao['inicio_s'] = inicio - instrumentacao.inicio
+    if perfilador is not None:
+        perfilador.enable()
+    try:
+        yield medicao
+    finally:
+        if perfilador is not None:
+            perfilador.disable()
+        medicao['segundos'] = time.perf_counter() - inicio
+        medicao['cpu_segundos'] = time.process_time() - inicio_cpu
+        medicao['rss_depois_mb'] = rss_mb()
+        medicao['rss_pico_processo_mb'] = pico_rss_mb()
+        if instrumentacao is not None:
+            instrumentacao.pilha.pop()
+        if rastrear:
+            atual, pico = tracemalloc.get_traced_memory()
+            pico = max(pico, medicao.pop('_pico_filhas'))
+            medicao['tracemalloc_pico_mb'] = (pico - alocado_antes) / 2**20
+            medicao['tracemalloc_liquido_mb'] = (atual - alocado_antes) / 2**20
+            if mae is not None and '_pico_filhas' in mae:
+                mae['_pico_filhas'] = max(mae['_pico_filhas'], pico)
+        if perfilador is not None:
+            del medicao['_perfilador']
+            medicao['perfil'] = _resumir_perfil(perfilador, caminho, instrumentacao.diretorio_perfis)
+            if mae is not None and '_perfilador' in mae:
+                mae['_perfilador'].enable()
+
+
+@contextmanager
+def etapa(nome, **info):
+    """Mede o trecho e registra na Instrumentacao ativa; sem ela, não faz nada."""
+    instrumentacao = _ativa
+    if instrumentacao is None:
+        yield {}
+        return
+    with medir(nome, **info) as medicao:
+        yield medicao
+    instrumentacao.registrar(dict(medicao, etapa=instrumentacao.caminho(nome)))
+
+
+def registrar(medicao):
+    """Registra uma medição feita em outro processo, sob a etapa atual."""
+    if _ativa is not None:
+        _ativa.registrar(dict(medicao, etapa=_ativa.caminho(medicao['etapa'])))
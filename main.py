@@ -1,305 +1,491 @@
 import pandas as pd
-import re
+import scipy.sparse as sp
 from sklearn.model_selection import train_test_split, StratifiedKFold, cross_val_score, cross_validate
 from sklearn.preprocessing import StandardScaler
 from sklearn.tree import DecisionTreeClassifier
-from sklearn.ensemble import RandomForestClassifier
+from sklearn.ensemble import RandomForestClassifier, HistGradientBoostingClassifier
+from sklearn.linear_model import LogisticRegression
 from sklearn.neighbors import KNeighborsClassifier
 from sklearn.metrics import accuracy_score, precision_score, f1_score
+import argparse
 import joblib
 import json
-import ast
 import numpy as np
 import os
+import time
+from preprocessamento import limpar_dataframe, compactar_textos, COLUNAS_PARA_ESCALAR
+from ingestao import preparar_dados_streaming
+from features import criar_vocabulario, multi_hot_esparso, montar_matriz_esparsa
+from treinamento import treinar_modelos
+from busca_hiperparametros import buscar_hiperparametros
+from cache_preprocessamento import preparar_dados_com_cache
+from artefatos import salvar_modelos, eh_modelo_de_arvores, diretorio_arvores, DIRETORIO_INDICE_SIMILARES, DIRETORIO_TITULOS, \
+    DIRETORIO_VERSOES, ARQUIVO_SELECAO_MODELO
+from manifesto import escrever_manifesto
+from indice_similaridade import IndiceSimilaridade
+from fatores import Importancias
+from cenarios import AgregadosGeneroIdioma
+from titulos import salvar_titulos
+from atualizacao_incremental import salvar_estado_incremental, atualizar_artefatos
+from validacao_cruzada import validacao_cruzada, N_FOLDS
+from custos_modelos import medir_custos, selecionar_modelo, salvar_selecao, imprimir_tabela, METRICA_SELECAO
+from instrumentacao import Instrumentacao, etapa, registrar, ambiente, DIRETORIO_PERFIS
+import preprocessamento
+import features
+import ingestao
+import titulos
+import cache_preprocessamento
+
+
+def preparar_dados_em_memoria(caminho_csv, esparso=False):
+    """
+    Carrega o CSV inteiro na memória, limpa, codifica e divide em treino/teste.
+    Com esparso=True gêneros e idiomas viram uma matriz CSR (ver features.py).
+    """
+    # 1. Carregar CSV
+    with etapa('carregar_csv'):
+        df = pd.read_csv(caminho_csv)
+    print(f"Dataset original: {df.shape[0]} filmes, {df.shape[1]} colunas")
+    linhas_lidas = df.shape[0]
 
-# 1. Carregar CSV
-df = pd.read_csv('imdb_filmes.csv')
-print(f"Dataset original: {df.shape[0]} filmes, {df.shape[1]} colunas")
+    # 2-4. Selecionar colunas úteis, aplicar conversões e tratar dados faltantes (ver preprocessamento.py)
+    df = limpar_dataframe(df)
 
-# 2. Selecionar colunas úteis
-df = df[['title', 'year', 'duration', 'rating', 'votes', 'budget', 'genres', 'languages']]
+    # para a coluna 'budget', se algum valor for nulo, preenchemos com a mediana de todos os orçamentos
+    with etapa('preencher_orcamento'):
+        # A contagem de cada orçamento conhecido deixa a atualização incremental recalcular a mediana
+        contagem = df['budget'].value_counts().sort_index()
+        df['budget'] = df['budget'].fillna(df['budget'].median())
+    incremental = {'linhas_lidas': linhas_lidas,
+                   'orcamentos': (contagem.index.to_numpy(dtype=np.float64), contagem.to_numpy(dtype=np.float64))}
 
-# 3. Funções de conversão (mantidas)
-def converter_duracao(valor):
-    """
-    Converte uma string de duração para um número inteiro 
-    representando o total de minutos.
-    """
-    try:
-        if pd.isna(valor):
-            return None
-        h, m = 0, 0
-        valor = str(valor).strip().lower()
-        if 'h' in valor:
-            partes = valor.split('h')
-            h = int(partes[0].strip())
-            if 'm' in partes[1]:
-                m = int(partes[1].replace('m', '').strip())
-        elif 'm' in valor:
-            m = int(valor.replace('m', '').strip())
-        return h * 60 + m
-    except:
-        return None
-    
-def converter_valor(valor):
-    """
-    Converte uma string que representa um valor numérico para 
-    um float.
-    """
-    try:
-        if pd.isna(valor):
-            return None
-        valor = str(valor).upper()
-        valor_limpo = re.sub(r'[^0-9KM\.]', '', valor)
-        match = re.match(r'^(\d*\.?\d*)([KM]?)$', valor_limpo)
-        if not match:
-            return None
-        numero, multiplicador = match.groups()
-        if numero == '':
-            return None
-        numero = float(numero)
-        if multiplicador == 'K':
-            return numero * 1_000
-        elif multiplicador == 'M':
-            return numero * 1_000_000
-        else:
-            return numero
-    except:
-        return None
-
-def str_para_lista(s):
-    """
-    Converte de forma segura uma string que representa uma lista Python em um objeto de lista real.
-    """
-    try:
-        if pd.isna(s):
-            return []
-        return ast.literal_eval(s)
-    except:
-        return []
+    if esparso:
+        return dict(_preparar_dados_esparsos(df), **incremental)
 
-# 4. Aplicar conversões e tratamento de dados faltantes
+    with etapa('explode_dummies'):
+        # --------- Processando Gêneros ------------
 
-# Aplica a função 'converter_valor' em cada célula da coluna 'votes'. 250k
-df['votes'] = df['votes'].apply(converter_valor)
+        # A função .explode() transforma cada item de uma lista em uma nova linha. Ex: Filme com índice 10 e gêneros ['Action', 'Drama'] vira duas linhas
+        genres_exploded = df.explode('genres')
 
-# Aplica a mesma lógica para a coluna 'budget', convertendo valores como '$1.5M'
-df['budget'] = df['budget'].apply(converter_valor)
+        # pega a coluna de texto e cria uma nova coluna para cada genero e é preenchida com 1 ou 0
+        # (uint8: 1 byte por célula em vez dos 8 do int64; a soma do groupby mantém o dtype)
+        genres_dummies = pd.get_dummies(genres_exploded['genres'], dtype=np.uint8)
 
-# converte a duração para minutos
-df['duration'] = df['duration'].astype(str).apply(converter_duracao)
+        # agrupa as linhas pelo índice original do filme e soma os vetores para criar uma representação final com todos os gêneros de cada filme.
+        genres_dummies = genres_dummies.groupby(genres_exploded.index).sum()
 
 
-# -------------------- tratamento de dados faltantes ------------------------
+        # --- Processando Idiomas ---
 
-# remove as linhas onde as colunas 'year', 'rating' ou 'duration' não tem valor
-df = df.dropna(subset=['year', 'rating', 'duration'])
+        # Repetimos exatamente o mesmo processo de 3 passos para a coluna 'languages'.
+        lang_exploded = df.explode('languages')
+        lang_dummies = pd.get_dummies(lang_exploded['languages'], dtype=np.uint8)
+        lang_dummies = lang_dummies.groupby(lang_exploded.index).sum()
 
-# para a coluna 'votes', se algum valor for nulo após a conversão, preenchemos com 0
-df['votes'] = df['votes'].fillna(0)
 
-# para a coluna 'budget', se algum valor for nulo, preenchemos com a mediana de todos os orçamentos
-df['budget'] = df['budget'].fillna(df['budget'].median())
+        # ------------------------ Montando o DataFrame Final para Modelagem ---------------------------
 
-# converte uma lista propria para o python
-df['languages'] = df['languages'].apply(str_para_lista)
+        # agora colocamos essas novas colunas criadas na base de dados
+        df_processed = pd.concat([df.drop(columns=['genres', 'languages']), genres_dummies, lang_dummies], axis=1)
 
-# aplica a mesma lógica para a coluna 'genres'
-df['genres'] = df['genres'].apply(str_para_lista)
+    with etapa('compactar_tipos'):
+        # Textos com muitos valores repetidos viram category (ver preprocessamento.py)
+        df_processed = compactar_textos(df_processed)
 
-# tratamento de gêneros e idiomas vazios
-filmes_sem_genero = df['genres'].apply(len) == 0
-# a função .any() verifica se existe pelo menos um 'True' na máscara
-if filmes_sem_genero.any():
-    # Isso garante que todos os filmes tenham pelo menos um gênero, evitando problemas em etapas futuras
-    df.loc[filmes_sem_genero, 'genres'] = df.loc[filmes_sem_genero, 'genres'].apply(lambda x: ['Unknown'])
+    # define o alvo que queremos prever
+    y = (df_processed['rating'] >= 7).astype(np.int8)
 
-# aplica a mesma lógica para a coluna de idiomas, colocando 'English'
-filmes_sem_idioma = df['languages'].apply(len) == 0
-if filmes_sem_idioma.any():
-    df.loc[filmes_sem_idioma, 'languages'] = df.loc[filmes_sem_idioma, 'languages'].apply(lambda x: ['English'])
+    # 2. define os dados que usaremos para prever.
+    X = df_processed.drop(columns=['rating', 'title'])
 
+    # Imprime o número final de filmes que serão usados para o treinamento,
+    # após toda a limpeza e pré-processamento.
+    print(f"Dataset final: {df.shape[0]} filmes")
 
-# --------- Processando Gêneros ------------
+    # imprime a distribuição das classes de sucesso e fracasso
+    print(f"Distribuição do target: Sucessos={y.sum()} ({y.mean():.1%}), Não sucessos={(y==0).sum()} ({(y==0).mean():.1%})")
 
-# A função .explode() transforma cada item de uma lista em uma nova linha. Ex: Filme com índice 10 e gêneros ['Action', 'Drama'] vira duas linhas
-genres_exploded = df.explode('genres')
+    # --------------------- Divisão dos Dados em Conjuntos de Treino e Teste ---------------------
 
-# pega a coluna de texto e cria uma nova coluna para cada genero e é preenchida com 1 ou 0
-genres_dummies = pd.get_dummies(genres_exploded['genres'])
+    # divide o dataset em duas partes: uma para treinar o modelo e outra para teste
+    with etapa('dividir'):
+        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
 
-# agrupa as linhas pelo índice original do filme e soma os vetores para criar uma representação final com todos os gêneros de cada filme.
-genres_dummies = genres_dummies.groupby(genres_exploded.index).sum()
+        # Salvar os títulos do conjunto de treino ---
+        # Na ordem das posições de treino, que é o que o KNN e o índice de similares devolvem
+        titulos_treino = df_processed.loc[X_train.index, 'title'].tolist()
 
+    with etapa('escalonar'):
+        # Escalonar os dados
+        scaler = StandardScaler()
 
-# --- Processando Idiomas ---
+        # Cria uma lista das colunas que realmente existem no X_train
+        colunas_existentes = [col for col in COLUNAS_PARA_ESCALAR if col in X_train.columns]
 
-# Repetimos exatamente o mesmo processo de 3 passos para a coluna 'languages'.
-lang_exploded = df.explode('languages')
-lang_dummies = pd.get_dummies(lang_exploded['languages'])
-lang_dummies = lang_dummies.groupby(lang_exploded.index).sum()
+        # --------------------- Aplicação do Escalonamento -----------------------
+        # O scaler calcula em float64 e o resultado volta em float32, a precisão em que as
+        # árvores do sklearn comparam de qualquer forma. Só as colunas numéricas são
+        # substituídas: os indicadores uint8 não são copiados
 
+        # 1. Ajustar e Transformar os Dados de Treino:
+        X_train[colunas_existentes] = scaler.fit_transform(X_train[colunas_existentes].astype('float64')).astype(np.float32)
 
-# ------------------------ Montando o DataFrame Final para Modelagem ---------------------------
+        # 2. Transformar os Dados de Teste:
+        X_test[colunas_existentes] = scaler.transform(X_test[colunas_existentes].astype('float64')).astype(np.float32)
 
-# agora colocamos essas novas colunas criadas na base de dados
-df_processed = df.drop(columns=['genres', 'languages'])
-df_processed = pd.concat([df.drop(columns=['genres', 'languages']), genres_dummies, lang_dummies], axis=1)
+    return {
+        'X_train': X_train,
+        'X_test': X_test,
+        'y_train': y_train,
+        'y_test': y_test,
+        'scaler': scaler,
+        'generos': genres_dummies.columns.tolist(),
+        'idiomas': lang_dummies.columns.tolist(),
+        'colunas': X_train.columns.tolist(),
+        'titulos_treino': titulos_treino,
+        **incremental,
+    }
 
 
-# salva cada indice que foi criado e o filme referente a ele
-movie_titles = df_processed[['title']].to_dict()['title']
+def _preparar_dados_esparsos(df):
+    """Mesmo resultado do caminho denso, mas com X_train/X_test em CSR."""
+    # Vocabulários na mesma ordem das colunas do get_dummies
+    generos = criar_vocabulario(df['genres'])
+    idiomas = criar_vocabulario(df['languages'])
 
-# define o alvo que queremos prever
-y = (df_processed['rating'] >= 7).astype(int)
+    y = (df['rating'] >= 7).astype(np.int8)
 
-# 2. define os dados que usaremos para prever.
-X = df_processed.drop(columns=['rating', 'title'])
+    print(f"Dataset final: {df.shape[0]} filmes")
+    print(f"Distribuição do target: Sucessos={y.sum()} ({y.mean():.1%}), Não sucessos={(y==0).sum()} ({(y==0).mean():.1%})")
 
-# Imprime o número final de filmes que serão usados para o treinamento,
-# após toda a limpeza e pré-processamento.
-print(f"Dataset final: {df.shape[0]} filmes")
+    # A divisão estratificada só depende de y, então dividir as posições dá os mesmos conjuntos do caminho denso
+    with etapa('dividir'):
+        pos_treino, pos_teste = train_test_split(np.arange(len(df)), test_size=0.2, random_state=42, stratify=y)
 
-# imprime a distribuição das classes de sucesso e fracasso
-print(f"Distribuição do target: Sucessos={y.sum()} ({y.mean():.1%}), Não sucessos={(y==0).sum()} ({(y==0).mean():.1%})")
+    with etapa('escalonar'):
+        numericas = df[COLUNAS_PARA_ESCALAR].astype('float64')
+        scaler = StandardScaler()
+        numericas_treino = scaler.fit_transform(numericas.iloc[pos_treino]).astype(np.float32)
+        numericas_teste = scaler.transform(numericas.iloc[pos_teste]).astype(np.float32)
 
-# --------------------- Divisão dos Dados em Conjuntos de Treino e Teste ---------------------
+    with etapa('multi_hot_esparso'):
+        # Indicadores em float32, como as numéricas: a CSR inteira fica em um dtype só
+        matriz_generos = multi_hot_esparso(df['genres'], generos, dtype=np.float32)
+        matriz_idiomas = multi_hot_esparso(df['languages'], idiomas, dtype=np.float32)
 
-# divide o dataset em duas partes: uma para treinar o modelo e outra para teste
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+    return {
+        'X_train': montar_matriz_esparsa(numericas_treino, matriz_generos[pos_treino], matriz_idiomas[pos_treino]),
+        'X_test': montar_matriz_esparsa(numericas_teste, matriz_generos[pos_teste], matriz_idiomas[pos_teste]),
+        'y_train': y.iloc[pos_treino],
+        'y_test': y.iloc[pos_teste],
+        'scaler': scaler,
+        'generos': generos,
+        'idiomas': idiomas,
+        'colunas': COLUNAS_PARA_ESCALAR + generos + idiomas,
+        'titulos_treino': df['title'].iloc[pos_treino].tolist(),
+    }
 
-# Salvar os índices do conjunto de treino ---
-# Estes são os índices originais do DataFrame que foram para o treino
-train_indices = X_train.index.tolist()
 
-# Escalonar os dados
-scaler = StandardScaler()
+def criar_modelos(esparso=False):
+    """
+    Instancia os modelos que serão treinados. Os três últimos são candidatos mais
+    leves para produção (ver custos_modelos.py); o HistGradientBoosting não aceita
+    matriz esparsa e fica de fora com esparso=True.
+    """
+    modelos = {
+        'Decision Tree': DecisionTreeClassifier(random_state=42),
+        'Random Forest': RandomForestClassifier(random_state=42, n_estimators=100),
+        'KNN': KNeighborsClassifier(n_neighbors=5),
+        'Shallow Forest': RandomForestClassifier(random_state=42, n_estimators=30, max_depth=8),
+        'Hist Gradient Boosting': HistGradientBoostingClassifier(random_state=42),
+        'Logistic Regression': LogisticRegression(max_iter=1000),
+    }
+    if esparso:
+        del modelos['Hist Gradient Boosting']
+    return modelos
+
+
+def modelos_configurados(melhores_parametros=None, esparso=False):
+    """criar_modelos() com os parâmetros escolhidos pela busca, quando houver."""
+    modelos = criar_modelos(esparso)
+    for nome, busca in (melhores_parametros or {}).items():
+        modelos[nome].set_params(**busca['parametros'])
+    return modelos
+
+
+def treinar_e_avaliar(X_train_scaled, X_test_scaled, y_train, y_test, colunas, cpus=None, processos=None,
+                      melhores_parametros=None):
+    """
+    Treina os três modelos (em paralelo, ver treinamento.py) e calcula as métricas no conjunto de teste.
+    melhores_parametros vem da busca de hiperparâmetros; sem ele os modelos usam os parâmetros fixos.
+    """
+    print(f"\n{'='*60}")
+    print("TREINANDO E AVALIANDO TODOS OS MODELOS NO CONJUNTO DE TESTE")
+    print(f"{'='*60}")
+
+    # Definir os modelos
+    modelos = modelos_configurados(melhores_parametros, esparso=sp.issparse(X_train_scaled))
 
-# Define quais colunas do nosso DataFrame devem ser escalonadas.
-colunas_para_escalar = ['year', 'duration', 'votes', 'budget']
+    # Treinar os modelos
+    # compara os dados de treino com os dados corretos para buscar padrões e
+    # faz previsões em dados que ele nunca viu
+    with etapa('treinar'):
+        resultados = treinar_modelos(modelos, X_train_scaled, y_train, X_test_scaled, cpus=cpus, processos=processos)
+        # fit e predict rodam nos processos do pool: as medições voltam junto com os modelos
+        for nome, (_, _, medicao_fit, medicao_predict) in resultados.items():
+            registrar(medicao_fit)
+            registrar(medicao_predict)
 
-# Cria uma lista das colunas que realmente existem no X_train
-colunas_existentes = [col for col in colunas_para_escalar if col in X_train.columns]
+    # Dicionários para guardar os artefatos
+    modelos_treinados = {}
+    metricas = {}
+    feature_importances = {}
 
-# Cria cópias dos DataFrames de treino
-X_train_scaled = X_train.copy()
-X_test_scaled = X_test.copy()
+    for nome, (modelo, y_pred, medicao_fit, medicao_predict) in resultados.items():
+        print(f"--- {nome} (treino {medicao_fit['segundos']:.2f}s | previsão {medicao_predict['segundos']:.2f}s) ---")
+        modelos_treinados[nome] = modelo
 
-# Converte para o tipo 'float64' para evitar erros no pandas
-for col in colunas_existentes:
-    X_train_scaled[col] = X_train_scaled[col].astype('float64')
-    X_test_scaled[col] = X_test_scaled[col].astype('float64')
+        # Comparamos as previsões do y_pred com os resultados y_test e calculamos métricas de perfomance
+        acc = accuracy_score(y_test, y_pred)
+        prec = precision_score(y_test, y_pred)
 
-# --------------------- Aplicação do Escalonamento -----------------------
+        # F1-Score: Uma média harmônica entre Precisão e Recall
+        f1 = f1_score(y_test, y_pred)
 
-# 1. Ajustar e Transformar os Dados de Treino:
-X_train_scaled.loc[:, colunas_existentes] = scaler.fit_transform(X_train[colunas_existentes])
+        # Armazena as métricas calculadas em um dicionário, associadas ao nome do modelo.
+        metricas[nome] = {'accuracy': acc, 'precision': prec, 'f1_score': f1}
+        if melhores_parametros and nome in melhores_parametros:
+            metricas[nome]['busca_hiperparametros'] = melhores_parametros[nome]
 
-# 2. Transformar os Dados de Teste:
-X_test_scaled.loc[:, colunas_existentes] = scaler.transform(X_test[colunas_existentes])
+        print(f"Modelo {nome} treinado e avaliado.")
+        print(f"Acurácia: {acc:.3f} | Precisão: {prec:.3f} | F1-Score: {f1:.3f}")
 
-# ===== TREINAMENTO E AVALIAÇÃO DE TODOS OS MODELOS =====
+        # Extrair Feature Importantes
+        # Apenas para modelos baseados em árvores
+        if hasattr(modelo, 'feature_importances_'):
+            # Criar um dicionário mapeando o nome da feature à sua importância
+            importances = dict(zip(colunas, modelo.feature_importances_))
+            feature_importances[nome] = importances
+            print(f"Feature importances extraídas para {nome}.")
 
-print(f"\n{'='*60}")
-print("TREINANDO E AVALIANDO TODOS OS MODELOS NO CONJUNTO DE TESTE")
-print(f"{'='*60}")
+        print("-" * 50)
 
-# Definir os modelos
-modelos = {
-    'Decision Tree': DecisionTreeClassifier(random_state=42),
-    'Random Forest': RandomForestClassifier(random_state=42, n_estimators=100),
-    'KNN': KNeighborsClassifier(n_neighbors=5)
-}
+    return modelos_treinados, metricas, feature_importances
 
-# Dicionários para guardar os artefatos
-modelos_treinados = {}
-metricas = {}
-feature_importances = {}
 
-for nome, modelo in modelos.items():
-    print(f"--- Treinando {nome} ---")
-    
-    # Treinar o modelo
-    # compara os dados de treino com os dados corretos para buscar padrões
-    modelo.fit(X_train_scaled, y_train)
-    modelos_treinados[nome] = modelo
-    
-    # faz previsões em dados que ele nunca viu
-    y_pred = modelo.predict(X_test_scaled)
-    
-    # Comparamos as previsões do y_pred com os resultados y_test e calculamos métricas de perfomance
-    acc = accuracy_score(y_test, y_pred)
-    prec = precision_score(y_test, y_pred)
-    
-    # F1-Score: Uma média harmônica entre Precisão e Recall
-    f1 = f1_score(y_test, y_pred)
-    
-    # Armazena as métricas calculadas em um dicionário, associadas ao nome do modelo.
-    metricas[nome] = {'accuracy': acc, 'precision': prec, 'f1_score': f1}
-    
-    print(f"Modelo {nome} treinado e avaliado.")
-    print(f"Acurácia: {acc:.3f} | Precisão: {prec:.3f} | F1-Score: {f1:.3f}")
-    
-    # Extrair Feature Importantes
-    # Apenas para modelos baseados em árvores
-    if hasattr(modelo, 'feature_importances_'):
-        # Criar um dicionário mapeando o nome da feature à sua importância
-        importances = dict(zip(X_train_scaled.columns, modelo.feature_importances_))
-        feature_importances[nome] = importances
-        print(f"Feature importances extraídas para {nome}.")
-    
-    print("-" * 50)
-
-
-# ===== SALVANDO TODOS OS ARTEFATOS =====
-
-print(f"\n{'='*40}")
-print("SALVANDO TODOS OS ARTEFATOS")
-print(f"{'='*40}")
-
-# Criar um diretório para salvar os modelos se não existir
-output_dir = "artefatos_modelo"
-os.makedirs(output_dir, exist_ok=True)
-
-# Salvar o dicionário de modelos treinados
-caminho_modelos = os.path.join(output_dir, 'todos_os_modelos.joblib')
-joblib.dump(modelos_treinados, caminho_modelos)
-print(f"✔ Dicionário com todos os modelos treinados salvo em: {caminho_modelos}")
-
-# Salvar o scaler
-caminho_scaler = os.path.join(output_dir, 'scaler.joblib')
-joblib.dump(scaler, caminho_scaler)
-print(f"✔ Scaler salvo em: {caminho_scaler}")
-
-# Salvar listas de features
-generos = genres_dummies.columns.tolist()
-idiomas = lang_dummies.columns.tolist()
-
-caminho_generos = os.path.join(output_dir, 'generos_lista.json')
-with open(caminho_generos, 'w') as f:
-    json.dump(sorted(generos), f)
-print(f"✔ Lista de gêneros salva em: {caminho_generos}")
-
-caminho_idiomas = os.path.join(output_dir, 'idiomas_lista.json')
-with open(caminho_idiomas, 'w') as f:
-    json.dump(sorted(idiomas), f)
-print(f"✔ Lista de idiomas salva em: {caminho_idiomas}")
-
-# Salvar as métricas de performance
-caminho_metricas = os.path.join(output_dir, 'metricas_modelos.json')
-with open(caminho_metricas, 'w') as f:
-    json.dump(metricas, f, indent=2)
-print(f"✔ Métricas de performance salvas em: {caminho_metricas}")
-
-caminho_importances = os.path.join(output_dir, 'feature_importances.json')
-with open(caminho_importances, 'w') as f:
-    json.dump(feature_importances, f, indent=2)
-print(f"✔ Importância das features salva em: {caminho_importances}")
-
-with open(os.path.join(output_dir, 'movie_titles.json'), 'w') as f:
-    json.dump(movie_titles, f, indent=2)
-print("✔ Dicionário de títulos de filmes salvo.")
-
-with open(os.path.join(output_dir, 'train_indices.json'), 'w') as f:
-    json.dump(train_indices, f)
-print("✔ Índices do conjunto de treino salvos.")
\ No newline at end of file
+def salvar_artefatos(output_dir, dados, modelos_treinados, metricas, feature_importances, versao=None,
+                     latencia_max_ms=None, tamanho_max_mb=None, metrica_selecao=METRICA_SELECAO):
+    """
+    Grava modelos, scaler e metadados usados pela interface em output_dir, com o manifesto da versão.
+    Com latencia_max_ms/tamanho_max_mb, grava também o modelo escolhido para esse orçamento.
+    """
+    print(f"\n{'='*40}")
+    print("SALVANDO TODOS OS ARTEFATOS")
+    print(f"{'='*40}")
+
+    # Criar um diretório para salvar os modelos se não existir
+    os.makedirs(output_dir, exist_ok=True)
+
+    # Salvar cada modelo treinado em um arquivo próprio (a interface carrega só os que usar)
+    with etapa('modelos'):
+        lista_modelos = salvar_modelos(output_dir, modelos_treinados)
+    for nome, arquivo in lista_modelos.items():
+        print(f"✔ Modelo {nome} salvo em: {os.path.join(output_dir, arquivo)}")
+        # Árvores exportadas em arrays contíguos para o motor de inferência (motor_arvores.py)
+        if eh_modelo_de_arvores(modelos_treinados[nome]):
+            print(f"✔ Árvores de {nome} achatadas em: {os.path.join(output_dir, diretorio_arvores(nome))}")
+
+    # Índice de busca aproximada para o painel de filmes similares: cada consulta
+    # varre só alguns grupos de filmes em vez do treino inteiro
+    inicio = time.perf_counter()
+    caminho_indice = os.path.join(output_dir, DIRETORIO_INDICE_SIMILARES)
+    with etapa('indice_similares'):
+        indice = IndiceSimilaridade.construir(dados['X_train'], caminho_indice)
+    print(f"✔ Índice de filmes similares ({indice.n_listas} listas) salvo em: {caminho_indice} "
+          f"({time.perf_counter() - inicio:.1f}s)")
+
+    # Salvar o scaler
+    caminho_scaler = os.path.join(output_dir, 'scaler.joblib')
+    joblib.dump(dados['scaler'], caminho_scaler)
+    print(f"✔ Scaler salvo em: {caminho_scaler}")
+
+    # Salvar listas de features
+    caminho_generos = os.path.join(output_dir, 'generos_lista.json')
+    with open(caminho_generos, 'w') as f:
+        json.dump(sorted(dados['generos']), f)
+    print(f"✔ Lista de gêneros salva em: {caminho_generos}")
+
+    caminho_idiomas = os.path.join(output_dir, 'idiomas_lista.json')
+    with open(caminho_idiomas, 'w') as f:
+        json.dump(sorted(dados['idiomas']), f)
+    print(f"✔ Lista de idiomas salva em: {caminho_idiomas}")
+
+    # Salvar a ordem das colunas: modelos treinados com matriz esparsa não guardam feature_names_in_
+    caminho_colunas = os.path.join(output_dir, 'colunas_modelo.json')
+    with open(caminho_colunas, 'w') as f:
+        json.dump(dados['colunas'], f)
+    print(f"✔ Ordem das colunas do modelo salva em: {caminho_colunas}")
+
+    # Tamanho, abertura e latência de cada modelo como a interface o abre (ver custos_modelos.py)
+    with etapa('custos_modelos'):
+        custos = medir_custos(output_dir, lista_modelos, dados['X_test'], dados['colunas'])
+    for nome, custos_modelo in custos.items():
+        metricas[nome]['custos'] = custos_modelo
+    print(f"\n{'='*40}\nCUSTO DOS MODELOS\n{'='*40}")
+    selecao = None
+    if latencia_max_ms is not None or tamanho_max_mb is not None:
+        try:
+            selecao = selecionar_modelo(metricas, latencia_max_ms, tamanho_max_mb, metrica_selecao)
+        except ValueError as e:
+            print(f"AVISO: {e}")
+    imprimir_tabela(metricas, metrica_selecao, selecao)
+    caminho_selecao = os.path.join(output_dir, ARQUIVO_SELECAO_MODELO)
+    if selecao:
+        print(f"✔ Modelo padrão para o orçamento ({selecao['modelo']}) salvo em: {salvar_selecao(output_dir, selecao)}")
+    elif os.path.exists(caminho_selecao):
+        # A seleção de um treino anterior não vale para estes modelos
+        os.remove(caminho_selecao)
+
+    # Salvar as métricas de performance
+    caminho_metricas = os.path.join(output_dir, 'metricas_modelos.json')
+    with open(caminho_metricas, 'w') as f:
+        json.dump(metricas, f, indent=2)
+    print(f"✔ Métricas de performance salvas em: {caminho_metricas}")
+
+    # Importâncias em arrays alinhados às colunas, com o ranking dos campos numéricos pré-calculado
+    caminho_importances = Importancias.de_dicionario(feature_importances, dados['colunas']).salvar(output_dir)
+    print(f"✔ Importância das features salva em: {caminho_importances}")
+
+    # Filmes de treino e sucessos por par gênero × idioma, mostrados na análise "E se..." (cenarios.py)
+    with etapa('agregados_generos_idiomas'):
+        agregados = AgregadosGeneroIdioma.de_matriz(dados['X_train'], dados['y_train'], dados['colunas'],
+                                                    dados['generos'], dados['idiomas'])
+    print(f"✔ Tabela gênero × idioma ({int((agregados.filmes > 0).sum())} pares com filmes) salva em: "
+          f"{agregados.salvar(output_dir)}")
+
+    # No modo streaming os títulos já foram gravados em blocos durante a ingestão
+    if dados['titulos_treino'] is not None:
+        caminho_titulos = salvar_titulos(os.path.join(output_dir, DIRETORIO_TITULOS), dados['titulos_treino'])
+        print(f"✔ Títulos dos filmes de treino salvos em: {caminho_titulos}")
+
+    # Conjunto de teste e estatísticas acumuladas, para `--atualizar` com filmes novos
+    if dados.get('orcamentos') is None:
+        print("⚠ Dados sem as estatísticas da atualização incremental (cache antigo?); --atualizar ficará indisponível")
+    else:
+        with etapa('estado_incremental'):
+            caminho_estado = salvar_estado_incremental(output_dir, dados)
+        print(f"✔ Estado da atualização incremental salvo em: {caminho_estado}")
+
+    # Por último: hashes de todos os arquivos acima, conferidos pela interface na abertura
+    with etapa('manifesto'):
+        caminho_manifesto = escrever_manifesto(output_dir, versao=versao, ambiente=ambiente())
+    print(f"✔ Manifesto dos artefatos salvo em: {caminho_manifesto}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Treina os modelos do CineScope e salva os artefatos.")
+    parser.add_argument('--csv', default='imdb_filmes.csv', help="Caminho do dataset do IMDb.")
+    parser.add_argument('--saida', default='artefatos_modelo', help="Diretório onde os artefatos serão salvos.")
+    parser.add_argument('--streaming', action='store_true',
+                        help="Lê o CSV em chunks, com memória limitada, em vez de carregá-lo inteiro.")
+    parser.add_argument('--chunksize', type=int, default=100_000, help="Linhas por chunk no modo streaming.")
+    parser.add_argument('--versao', default=None,
+                        help="Grava os artefatos como uma versão à parte, em <saida>/versoes/<VERSAO>, ao lado das outras.")
+    parser.add_argument('--esparso', action='store_true',
+                        help="Monta gêneros e idiomas como matriz esparsa CSR em vez de colunas densas.")
+    parser.add_argument('--cpus', type=int, default=None,
+                        help="Orçamento total de CPUs para o treinamento (padrão: todas).")
+    parser.add_argument('--processos', type=int, default=None,
+                        help="Quantos modelos treinar ao mesmo tempo; as CPUs restantes viram n_jobs interno.")
+    parser.add_argument('--cache-preprocessamento', default='cache_preprocessamento',
+                        help="Diretório do cache do pré-processamento (chaveado pelo hash do CSV, do código e das opções).")
+    parser.add_argument('--reconstruir-cache', action='store_true',
+                        help="Ignora o cache do pré-processamento e refaz a limpeza e a codificação.")
+    parser.add_argument('--buscar-hiperparametros', action='store_true',
+                        help="Escolhe os hiperparâmetros por successive halving com validação cruzada antes do treino final.")
+    parser.add_argument('--cache-busca', default=None,
+                        help="Diretório do cache de avaliações da busca (padrão: <saida>/cache_busca).")
+    parser.add_argument('--folds', type=int, default=N_FOLDS,
+                        help="Folds da validação cruzada gravada nas métricas (0 desliga).")
+    parser.add_argument('--latencia-max-ms', type=float, default=None,
+                        help="Orçamento de latência (p99 de uma linha): grava o melhor modelo que cabe nele como padrão.")
+    parser.add_argument('--tamanho-max-mb', type=float, default=None,
+                        help="Orçamento de tamanho em disco do modelo padrão, em MB.")
+    parser.add_argument('--metrica-selecao', default=METRICA_SELECAO, choices=['accuracy', 'precision', 'f1_score'],
+                        help="Métrica usada para escolher o modelo padrão dentro do orçamento.")
+    parser.add_argument('--tracemalloc', action='store_true',
+                        help="Mede o pico de alocações de cada etapa com tracemalloc (deixa o treino mais lento).")
+    parser.add_argument('--perfil', action='store_true',
+                        help="Roda o cProfile em cada etapa e grava os .prof em <saida>/perfis.")
+    parser.add_argument('--atualizar', default=None, metavar='CSV_NOVO',
+                        help="Atualiza os artefatos de --saida só com os filmes deste CSV, sem treinar do zero.")
+    parser.add_argument('--arvores-novas', type=int, default=None,
+                        help="Árvores acrescentadas ao Random Forest no --atualizar (padrão: proporcional às linhas novas).")
+    args = parser.parse_args()
+    if args.versao:
+        args.saida = os.path.join(args.saida, DIRETORIO_VERSOES, args.versao)
+
+    # Tempo e memória de cada etapa vão para <saida>/relatorio_etapas.json (ver instrumentacao.py)
+    instrumentacao = Instrumentacao(usar_tracemalloc=args.tracemalloc, perfil=args.perfil,
+                                    diretorio_perfis=os.path.join(args.saida, DIRETORIO_PERFIS))
+    with instrumentacao:
+        tamanho = executar(args)
+    instrumentacao.imprimir_resumo()
+    caminho_relatorio = instrumentacao.salvar(args.saida, argumentos=vars(args),
+                                              csv_bytes=os.path.getsize(args.atualizar or args.csv), **tamanho)
+    print(f"✔ Relatório das etapas salvo em: {caminho_relatorio}")
+
+
+def executar(args):
+    """Pré-processamento, busca opcional, treino e gravação dos artefatos. Retorna o tamanho do problema."""
+    if args.atualizar:
+        return atualizar_artefatos(args.atualizar, args.saida, arvores_novas=args.arvores_novas, cpus=args.cpus)
+
+    def preparar():
+        if args.streaming:
+            return preparar_dados_streaming(args.csv, args.saida, chunksize=args.chunksize)
+        return preparar_dados_em_memoria(args.csv, esparso=args.esparso)
+
+    # A chave do cache cobre o CSV, o código que o transforma e as opções que mudam o resultado
+    config = {'streaming': args.streaming, 'esparso': args.esparso,
+              'chunksize': args.chunksize if args.streaming else None}
+    # titulos e cache_preprocessamento definem o formato da entrada gravada (offsets/blob dos títulos, arrays)
+    codigo = [preprocessamento, features, ingestao, titulos, cache_preprocessamento,
+              preparar_dados_em_memoria, _preparar_dados_esparsos]
+    with etapa('preparar_dados'):
+        dados = preparar_dados_com_cache(args.csv, args.saida, args.cache_preprocessamento, config, codigo,
+                                         preparar, reconstruir=args.reconstruir_cache)
+
+    melhores_parametros = None
+    if args.buscar_hiperparametros:
+        diretorio_cache = args.cache_busca or os.path.join(args.saida, 'cache_busca')
+        with etapa('busca_hiperparametros'):
+            melhores_parametros = buscar_hiperparametros(criar_modelos(), dados['X_train'], dados['y_train'],
+                                                         diretorio_cache, cpus=args.cpus)
+
+    modelos_treinados, metricas, feature_importances = treinar_e_avaliar(
+        dados['X_train'], dados['X_test'], dados['y_train'], dados['y_test'], dados['colunas'],
+        cpus=args.cpus, processos=args.processos, melhores_parametros=melhores_parametros)
+
+    if args.folds > 1:
+        print(f"\n{'='*60}\nVALIDAÇÃO CRUZADA ({args.folds} FOLDS NO CONJUNTO DE TREINO)\n{'='*60}")
+        with etapa('validacao_cruzada'):
+            modelos = modelos_configurados(melhores_parametros, esparso=sp.issparse(dados['X_train']))
+            resumo = validacao_cruzada(modelos, dados['X_train'], dados['y_train'], dados['scaler'], dados['colunas'],
+                                       n_folds=args.folds, cpus=args.cpus)
+        for nome, resumo_modelo in resumo.items():
+            metricas[nome]['validacao_cruzada'] = resumo_modelo
+
+    with etapa('salvar_artefatos'):
+        salvar_artefatos(args.saida, dados, modelos_treinados, metricas, feature_importances, versao=args.versao,
+                         latencia_max_ms=args.latencia_max_ms, tamanho_max_mb=args.tamanho_max_mb,
+                         metrica_selecao=args.metrica_selecao)
+
+    # Tamanho do problema, para comparar relatórios de datasets diferentes
+    return {'linhas_treino': dados['X_train'].shape[0], 'linhas_teste': dados['X_test'].shape[0],
+            'colunas': len(dados['colunas'])}
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+import hashlib
+import json
+import os
+import time
+import sklearn
+from artefatos import carregar_json, ARQUIVO_LISTA_MODELOS, ARQUIVO_MANIFESTO, DIRETORIO_VERSOES, \
+    DIRETORIO_ESTADO_INCREMENTAL, ARQUIVO_SELECAO_MODELO
+
+# ==================== MANIFESTO DOS ARTEFATOS ====================
+# main.py grava manifesto.json junto dos artefatos. Ele guarda o tamanho e o
+# SHA-256 de cada arquivo, a ordem das colunas, o tamanho dos vocabulários e as
+# versões das bibliotecas. A interface confere o manifesto na abertura sem
+# desserializar nenhum modelo. Um scaler, um modelo ou uma lista de colunas
+# vindos de outro treino são recusados ali, e não no meio de uma previsão.
+#
+# A conferência da abertura é barata: compara o tamanho de todos os arquivos e
+# o hash só dos menores que LIMITE_HASH_ABERTURA (JSONs, scaler, offsets). Os
+# arquivos grandes (modelos, árvores, índice) ficam para a conferência completa
+# (`python manifesto.py artefatos_modelo --completo`).
+#
+# Cada versão é um diretório de artefatos com o seu manifesto: o principal
+# (artefatos_modelo) e os de artefatos_modelo/versoes/<nome> (main.py --versao).
+
+TAMANHO_BLOCO_HASH = 1 << 20
+LIMITE_HASH_ABERTURA = 1 << 20
+# Não fazem parte da versão: o relatório e os perfis do treino, o cache da busca,
+# o estado da atualização incremental, as outras versões e a seleção por orçamento
+IGNORADOS = {ARQUIVO_MANIFESTO, 'relatorio_etapas.json', 'perfis', 'cache_busca', DIRETORIO_ESTADO_INCREMENTAL,
+             DIRETORIO_VERSOES, ARQUIVO_SELECAO_MODELO}
+
+
+def hash_arquivo(caminho):
+    h = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(TAMANHO_BLOCO_HASH), b''):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def arquivos_da_versao(diretorio):
+    """Caminhos relativos (com '/') dos arquivos que formam a versão, em ordem."""
+    caminhos = []
+    for raiz, subdiretorios, arquivos in os.walk(diretorio):
+        if raiz == diretorio:
+            subdiretorios[:] = [nome for nome in subdiretorios if nome not in IGNORADOS and not nome.endswith('.tmp')]
+            arquivos = [nome for nome in arquivos if nome not in IGNORADOS and not nome.endswith('.tmp')]
+        caminhos.extend(os.path.relpath(os.path.join(raiz, nome), diretorio).replace(os.sep, '/') for nome in arquivos)
+    return sorted(caminhos)
+
+
+def ler_manifesto(diretorio):
+    """O manifesto do diretório, ou None em artefatos antigos."""
+    if not os.path.exists(os.path.join(diretorio, ARQUIVO_MANIFESTO)):
+        return None
+    return carregar_json(diretorio, ARQUIVO_MANIFESTO)
+
+
+def escrever_manifesto(diretorio, versao=None, origem='main.py', ambiente=None):
+    """
+    Grava o manifesto dos artefatos em `diretorio` (depois de todos os arquivos).
+    versao: nome da versão (padrão: data e hora). ambiente: versões das bibliotecas
+    (padrão: só o sklearn). Retorna o caminho do manifesto.
+    """
+    colunas = carregar_json(diretorio, 'colunas_modelo.json')
+    manifesto = {
+        'versao': versao or time.strftime('%Y%m%d-%H%M%S'),
+        'criado_em': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'origem': origem,
+        'ambiente': ambiente or {'sklearn': sklearn.__version__},
+        'modelos': carregar_json(diretorio, ARQUIVO_LISTA_MODELOS),
+        'colunas': colunas,
+        'n_colunas': len(colunas),
+        'n_generos': len(carregar_json(diretorio, 'generos_lista.json')),
+        'n_idiomas': len(carregar_json(diretorio, 'idiomas_lista.json')),
+        'arquivos': {},
+    }
+    for relativo in arquivos_da_versao(diretorio):
+        caminho = os.path.join(diretorio, relativo)
+        manifesto['arquivos'][relativo] = {'bytes': os.path.getsize(caminho), 'sha256': hash_arquivo(caminho)}
+
+    caminho = os.path.join(diretorio, ARQUIVO_MANIFESTO)
+    with open(caminho + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifesto, f, indent=2)
+    os.replace(caminho + '.tmp', caminho)
+    return caminho
+
+
+def validar_manifesto(diretorio, completo=False):
+    """
+    Confere os artefatos contra o manifesto sem abrir os modelos.
+    Retorna (manifesto, avisos), com manifesto None em artefatos antigos, e
+    levanta ValueError com a lista de problemas se algum arquivo não bate.
+    """
+    manifesto = ler_manifesto(diretorio)
+    if manifesto is None:
+        return None, [f"{diretorio} não tem {ARQUIVO_MANIFESTO}: os artefatos não foram conferidos"]
+
+    problemas = []
+    for relativo, esperado in manifesto['arquivos'].items():
+        caminho = os.path.join(diretorio, relativo)
+        if not os.path.exists(caminho):
+            problemas.append(f"{relativo}: ausente")
+        elif os.path.getsize(caminho) != esperado['bytes']:
+            problemas.append(f"{relativo}: {os.path.getsize(caminho)} bytes, o manifesto registra {esperado['bytes']}")
+        elif (completo or esperado['bytes'] <= LIMITE_HASH_ABERTURA) and hash_arquivo(caminho) != esperado['sha256']:
+            problemas.append(f"{relativo}: conteúdo diferente do registrado (sha256)")
+    # Modelos listados sem arquivo no manifesto vieram de fora do treino que o gravou
+    for nome, arquivo in carregar_json(diretorio, ARQUIVO_LISTA_MODELOS).items():
+        if arquivo not in manifesto['arquivos']:
+            problemas.append(f"modelo {nome} ({arquivo}) não faz parte do manifesto")
+    if problemas:
+        raise ValueError(f"Artefatos em {diretorio} não batem com o manifesto da versão "
+                         f"{manifesto['versao']}:\n  " + "\n  ".join(problemas))
+
+    avisos = []
+    # O que depende da versão do scikit-learn, além de desserializar os joblib:
+    # - motor_arvores achata os atributos de tree_ (feature, threshold, filhos,
+    #   value normalizado) e repete a comparação em float32 do sklearn; se uma
+    #   versão nova mudar isso, `python motor_arvores.py` passa a divergir;
+    # - atualizacao_incremental grava campos privados (Tree.__setstate__,
+    #   _fit_X/_y do KNN) e por isso recusa atualizar com outra versão.
+    if manifesto['ambiente'].get('sklearn') != sklearn.__version__:
+        avisos.append(f"versão {manifesto['versao']} treinada com scikit-learn {manifesto['ambiente'].get('sklearn')}, "
+                      f"instalado {sklearn.__version__}")
+    return manifesto, avisos
+
+
+def listar_versoes(base_path):
+    """
+    {nome da versão: diretório}: primeiro o diretório principal, depois os de
+    base_path/versoes, do mais recente para o mais antigo.
+    """
+    versoes = {}
+    manifesto = ler_manifesto(base_path)
+    versoes[manifesto['versao'] if manifesto else os.path.basename(os.path.normpath(base_path))] = base_path
+
+    diretorio_versoes = os.path.join(base_path, DIRETORIO_VERSOES)
+    if os.path.isdir(diretorio_versoes):
+        outras = [os.path.join(diretorio_versoes, nome) for nome in os.listdir(diretorio_versoes)]
+        outras = [caminho for caminho in outras if os.path.exists(os.path.join(caminho, ARQUIVO_MANIFESTO))]
+        outras.sort(key=lambda caminho: ler_manifesto(caminho)['criado_em'], reverse=True)
+        for caminho in outras:
+            versoes.setdefault(os.path.basename(caminho), caminho)
+    return versoes
+
+
+if __name__ == "__main__":
+    # Confere todas as versões (ou grava o manifesto de artefatos antigos):
+    #   python manifesto.py [artefatos_modelo] [--completo] [--escrever]
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Confere os artefatos do CineScope contra os manifestos.")
+    parser.add_argument('artefatos', nargs='?', default='artefatos_modelo')
+    parser.add_argument('--completo', action='store_true', help="Confere o hash de todos os arquivos, não só o tamanho.")
+    parser.add_argument('--escrever', action='store_true',
+                        help="Grava o manifesto do diretório a partir dos arquivos atuais (artefatos antigos).")
+    args = parser.parse_args()
+
+    if args.escrever:
+        print(f"✔ Manifesto salvo em: {escrever_manifesto(args.artefatos)}")
+
+    print(f"{'='*40}\nVersões em {args.artefatos}\n{'='*40}")
+    falhas = 0
+    for nome, diretorio in listar_versoes(args.artefatos).items():
+        inicio = time.perf_counter()
+        try:
+            manifesto, avisos = validar_manifesto(diretorio, completo=args.completo)
+        except ValueError as e:
+            falhas += 1
+            print(f"✘ {nome}: {e}")
+            continue
+        decorrido = (time.perf_counter() - inicio) * 1000
+        if manifesto is not None:
+            tamanho = sum(arquivo['bytes'] for arquivo in manifesto['arquivos'].values()) / 1e6
+            print(f"✔ {nome} ({diretorio}): {len(manifesto['arquivos'])} arquivos, {tamanho:.1f} MB, "
+                  f"{manifesto['n_colunas']} colunas | criado em {manifesto['criado_em']} | conferido em {decorrido:.1f} ms")
+        for aviso in avisos:
+            print(f"  AVISO: {aviso}")
+    raise SystemExit(1 if falhas else 0)
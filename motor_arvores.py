@@ -0,0 +1,320 @@
+import numpy as np
+import joblib
+import json
+import os
+import shutil
+import threading
+
+# ==================== ÁRVORES EM ARRAYS CONTÍGUOS ====================
+# O sklearn copia os nós de cada árvore para a memória do processo ao
+# desserializar (Tree.__setstate__), então mmap_mode não ajuda com a Decision
+# Tree e o Random Forest. Aqui todas as árvores de um modelo são achatadas em
+# poucos arrays contíguos (feature, threshold, filhos, valor), gravados como .npy
+# e abertos com mmap: vários processos de inferência compartilham as mesmas
+# páginas pelo cache do sistema operacional.
+#
+# Para prever, todas as árvores descem juntas numa descida vetorizada em NumPy,
+# sem a validação e o despacho por árvore do predict do sklearn. Isso só compensa
+# em lotes pequenos (a interface, o servidor): em lotes grandes o código
+# compilado do sklearn ganha, então o predict_proba passa para o estimador
+# original, carregado do joblib na primeira vez que precisar. O motor só lê os
+# atributos públicos de tree_ ao achatar (de_sklearn); a dependência da versão
+# do sklearn está anotada junto do aviso de versão em manifesto.py.
+
+ARRAYS = ('feature', 'threshold', 'esquerda', 'direita', 'valor', 'raizes', 'classes')
+
+# Acima deste número de pares (linha, árvore) o predict_proba do sklearn é mais
+# rápido que a descida em NumPy, ou perto disso (medido em python motor_arvores.py:
+# a Decision Tree empata perto de 2 mil linhas, o Random Forest de 100 árvores
+# entre 100 e 300, a Shallow Forest de 30 árvores entre 300 e 1000)
+PARES_MAXIMOS_MOTOR = 1 << 11
+# Pares (linha, árvore) descidos de uma vez em NumPy, para limitar os arrays temporários
+PARES_POR_BLOCO = 1 << 18
+
+
+class EnsembleArvores:
+    """Decision Tree ou Random Forest achatado, com predict/predict_proba iguais aos do sklearn."""
+
+    def __init__(self, feature, threshold, esquerda, direita, valor, raizes, classes, profundidade_maxima, n_features=None,
+                 estimador=None):
+        self.feature = feature
+        self.threshold = threshold
+        # Índices globais dos filhos; -1 marca uma folha
+        self.esquerda = esquerda
+        self.direita = direita
+        # Proporção de cada classe em cada nó (linhas somam 1)
+        self.valor = valor
+        self.raizes = raizes
+        self.classes_ = classes
+        self.profundidade_maxima = profundidade_maxima
+        self.n_features_in_ = n_features if n_features is not None else int(np.max(feature)) + 1
+        # Estimador do sklearn (ou o caminho do joblib dele) para os lotes grandes;
+        # None: tudo pela descida em NumPy
+        self.estimador = estimador
+        self._trava_estimador = threading.Lock()
+
+    @property
+    def n_arvores(self):
+        return len(self.raizes)
+
+    @classmethod
+    def de_sklearn(cls, modelo):
+        """Achata um DecisionTreeClassifier ou RandomForestClassifier treinado."""
+        arvores = [est.tree_ for est in modelo.estimators_] if hasattr(modelo, 'estimators_') else [modelo.tree_]
+        tamanhos = np.array([arvore.node_count for arvore in arvores])
+        raizes = np.concatenate(([0], np.cumsum(tamanhos)[:-1])).astype(np.int64)
+
+        def filhos(atributo):
+            # Desloca os índices de cada árvore para a posição dela no array global
+            partes = []
+            for arvore, inicio in zip(arvores, raizes):
+                filho = getattr(arvore, atributo).astype(np.int64)
+                partes.append(np.where(filho < 0, -1, filho + inicio))
+            return np.concatenate(partes)
+
+        valor = np.concatenate([arvore.value[:, 0, :] for arvore in arvores]).astype(np.float64)
+        valor /= valor.sum(axis=1, keepdims=True)
+
+        return cls(
+            feature=np.concatenate([arvore.feature for arvore in arvores]).astype(np.int64),
+            threshold=np.concatenate([arvore.threshold for arvore in arvores]).astype(np.float64),
+            esquerda=filhos('children_left'),
+            direita=filhos('children_right'),
+            valor=valor,
+            raizes=raizes,
+            classes=np.asarray(modelo.classes_),
+            profundidade_maxima=int(max(arvore.max_depth for arvore in arvores)),
+            n_features=int(modelo.n_features_in_),
+            estimador=modelo,
+        )
+
+    def salvar(self, diretorio):
+        """
+        Grava em um diretório ao lado e troca no fim: os arrays antigos podem estar
+        mapeados por uma interface aberta e continuam válidos até ela fechá-los.
+        """
+        temporario = diretorio + '.tmp'
+        shutil.rmtree(temporario, ignore_errors=True)
+        os.makedirs(temporario)
+        for nome in ARRAYS:
+            valor = self.classes_ if nome == 'classes' else getattr(self, nome)
+            np.save(os.path.join(temporario, f'{nome}.npy'), valor)
+        with open(os.path.join(temporario, 'metadados.json'), 'w', encoding='utf-8') as f:
+            json.dump({'profundidade_maxima': self.profundidade_maxima, 'n_features': self.n_features_in_}, f)
+        shutil.rmtree(diretorio, ignore_errors=True)
+        os.replace(temporario, diretorio)
+
+    @classmethod
+    def carregar(cls, diretorio, mmap_mode='r', arquivo_estimador=None):
+        """
+        Abre os arrays mapeados em memória (somente leitura por padrão).
+        arquivo_estimador: joblib do modelo original, só lido no primeiro lote grande.
+        """
+        with open(os.path.join(diretorio, 'metadados.json'), 'r', encoding='utf-8') as f:
+            metadados = json.load(f)
+        arrays = {nome: np.load(os.path.join(diretorio, f'{nome}.npy'), mmap_mode=mmap_mode) for nome in ARRAYS}
+        return cls(**arrays, profundidade_maxima=metadados['profundidade_maxima'],
+                   n_features=metadados.get('n_features'), estimador=arquivo_estimador)
+
+    def _descer(self, X, arvores):
+        """
+        Folhas de todas as linhas de X nas árvores [arvores.start, arvores.stop), em NumPy.
+        Cada par (linha, árvore) sai do conjunto ativo ao chegar numa folha, então o
+        custo acompanha o comprimento real dos caminhos e não a profundidade máxima.
+        """
+        n, n_arvores = len(X), arvores.stop - arvores.start
+        resultado = np.empty(n * n_arvores, dtype=np.int64)
+        # Par p = (árvore p // n, linha p % n), na ordem de folhas()
+        posicao = np.arange(n * n_arvores)
+        nos = np.repeat(np.asarray(self.raizes[arvores.start:arvores.stop]), n)
+        # X achatado: um único gather por nível em vez da indexação 2D
+        valores = X.ravel()
+        base = np.tile(np.arange(n) * X.shape[1], n_arvores)
+        while len(nos):
+            esquerda = self.esquerda[nos]
+            folha = esquerda < 0
+            if folha.any():
+                resultado[posicao[folha]] = nos[folha]
+                ativo = ~folha
+                nos, posicao, base, esquerda = nos[ativo], posicao[ativo], base[ativo], esquerda[ativo]
+            vai_para_esquerda = valores[base + self.feature[nos]] <= self.threshold[nos]
+            nos = np.where(vai_para_esquerda, esquerda, self.direita[nos])
+        return resultado.reshape(n_arvores, n)
+
+    def folhas(self, X):
+        """Índice global da folha atingida por cada linha em cada árvore: (n_arvores, n_linhas)."""
+        # O sklearn compara em float32 contra o threshold em float64
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        n = len(X)
+        # Uma linha contígua por árvore: a soma do predict_proba lê sem saltos
+        folhas = np.empty((self.n_arvores, n), dtype=np.int64)
+        # Blocos de linhas x árvores com até PARES_POR_BLOCO pares
+        arvores_por_bloco = max(1, min(self.n_arvores, PARES_POR_BLOCO // max(n, 1)))
+        for inicio in range(0, self.n_arvores, arvores_por_bloco):
+            arvores = range(inicio, min(inicio + arvores_por_bloco, self.n_arvores))
+            folhas[arvores.start:arvores.stop] = self._descer(X, arvores)
+        return folhas
+
+    def _estimador_sklearn(self):
+        """O estimador original, lido do joblib na primeira chamada (entre threads, uma leitura só)."""
+        with self._trava_estimador:
+            if isinstance(self.estimador, (str, os.PathLike)):
+                self.estimador = joblib.load(self.estimador)
+            return self.estimador
+
+    def contribuicoes(self, X, classe=1):
+        """
+        Contribuição de cada feature para a probabilidade de `classe` em cada linha
+        (decomposição pelo caminho nas árvores): cada divisão soma a variação da
+        probabilidade entre o nó e o filho escolhido na feature usada.
+        Devolve (vies, contrib) com predict_proba[:, classe] == vies + contrib.sum(axis=1)
+        a menos de arredondamento; vies é a média das raízes (a taxa base do treino).
+        """
+        X = np.asarray(X, dtype=np.float32)
+        coluna = list(np.asarray(self.classes_)).index(classe)
+        valor = self.valor[:, coluna]
+        n, n_features = len(X), self.n_features_in_
+        nos = np.repeat(np.asarray(self.raizes)[None, :], n, axis=0)
+        linhas = np.arange(n)[:, None]
+        contrib = np.zeros(n * n_features)
+        # A mesma descida de folhas(), acumulando a variação de cada passo
+        for _ in range(self.profundidade_maxima):
+            esquerda = self.esquerda[nos]
+            ativos = esquerda >= 0
+            if not ativos.any():
+                break
+            feature = self.feature[nos]
+            vai_para_esquerda = X[linhas, feature] <= self.threshold[nos]
+            filhos = np.where(ativos, np.where(vai_para_esquerda, esquerda, self.direita[nos]), nos)
+            variacao = valor[filhos] - valor[nos]
+            posicoes = (linhas * n_features + feature)[ativos]
+            contrib += np.bincount(posicoes, weights=variacao[ativos], minlength=n * n_features)
+            nos = filhos
+        vies = float(np.mean(valor[np.asarray(self.raizes)]))
+        return vies, contrib.reshape(n, n_features) / self.n_arvores
+
+    def predict_proba(self, X):
+        if self.estimador is not None and len(X) * self.n_arvores > PARES_MAXIMOS_MOTOR:
+            estimador = self._estimador_sklearn()
+            if hasattr(estimador, 'feature_names_in_') and not hasattr(X, 'columns'):
+                import pandas as pd
+                X = pd.DataFrame(np.asarray(X), columns=estimador.feature_names_in_, copy=False)
+            return estimador.predict_proba(X)
+        folhas = self.folhas(X)
+        # Soma árvore a árvore, na mesma ordem do sklearn, para bater até o último bit
+        proba = np.zeros((folhas.shape[1], self.valor.shape[1]))
+        for t in range(self.n_arvores):
+            proba += self.valor[folhas[t]]
+        return proba / self.n_arvores
+
+    def predict(self, X):
+        return np.asarray(self.classes_)[np.argmax(self.predict_proba(X), axis=1)]
+
+
+def _entrada_aleatoria(rng, modelo, n):
+    """Lote de n linhas no formato do treino: 4 numéricas padronizadas e o multi-hot esparso."""
+    X = rng.normal(size=(n, modelo.n_features_in_))
+    X[:, 4:] = rng.random((n, modelo.n_features_in_ - 4)) < 0.05
+    return X
+
+
+def divergencias_sklearn(modelo, motor, X):
+    """Descrições do que o motor prevê diferente do estimador `modelo` em X (lista vazia: idênticos)."""
+    import pandas as pd
+    entrada = pd.DataFrame(X, columns=modelo.feature_names_in_) if hasattr(modelo, 'feature_names_in_') else X
+    problemas = []
+    if not np.array_equal(motor.predict_proba(X), modelo.predict_proba(entrada)):
+        problemas.append('predict_proba')
+    if not np.array_equal(motor.predict(X), modelo.predict(entrada)):
+        problemas.append('predict')
+    vies, contrib = motor.contribuicoes(X)
+    if not np.allclose(vies + contrib.sum(axis=1), motor.predict_proba(X)[:, 1]):
+        problemas.append('contribuições não somam a probabilidade')
+    return problemas
+
+
+def _motores(diretorio_artefatos, nome, arquivo):
+    """O motor como carregar_modelo o abre (lotes grandes no estimador) e só com a descida em NumPy."""
+    from artefatos import diretorio_arvores
+    caminho = os.path.join(diretorio_artefatos, diretorio_arvores(nome))
+    return {'motor': EnsembleArvores.carregar(caminho, arquivo_estimador=os.path.join(diretorio_artefatos, arquivo)),
+            'descida NumPy': EnsembleArvores.carregar(caminho)}
+
+
+def verificar_equivalencia(diretorio_artefatos, lotes=(1, 100, 10_000), seed=0):
+    """
+    Confere cada modelo achatado em `diretorio_artefatos` contra o estimador do
+    sklearn em cada tamanho de lote, tanto o motor completo quanto a descida em
+    NumPy sozinha (que o motor só usa nos lotes pequenos). Retorna as
+    divergências como textos; lista vazia se tudo bate.
+    """
+    from artefatos import listar_modelos, carregar_modelo, diretorio_arvores
+    rng = np.random.default_rng(seed)
+    divergencias = []
+    for nome, arquivo in listar_modelos(diretorio_artefatos).items():
+        if not os.path.isdir(os.path.join(diretorio_artefatos, diretorio_arvores(nome))):
+            continue
+        modelo = carregar_modelo(diretorio_artefatos, nome, arquivo, mapeado=False)
+        for rotulo, motor in _motores(diretorio_artefatos, nome, arquivo).items():
+            for n in lotes:
+                for problema in divergencias_sklearn(modelo, motor, _entrada_aleatoria(rng, modelo, n)):
+                    divergencias.append(f"{nome}: {problema} com lote de {n} ({rotulo})")
+    return divergencias
+
+
+if __name__ == "__main__":
+    # Confere se o modelo achatado prevê igual ao sklearn em cada tamanho de lote
+    # e compara a latência do predict_proba: o sklearn, o motor (que passa os
+    # lotes acima de PARES_MAXIMOS_MOTOR pares para o estimador) e a descida em
+    # NumPy em todos os lotes, para reavaliar o limite. A conferência também roda
+    # na seção "equivalencia" do benchmark.py; aqui sai com código 1 se divergir:
+    #   python motor_arvores.py [diretorio_artefatos] [--lotes 1 100 10000]
+    import argparse
+    import sys
+    import time
+    import pandas as pd
+    from artefatos import listar_modelos, carregar_modelo, diretorio_arvores
+
+    parser = argparse.ArgumentParser(description="Equivalência e latência do motor de árvores contra o sklearn.")
+    parser.add_argument('artefatos', nargs='?', default='artefatos_modelo')
+    parser.add_argument('--lotes', type=int, nargs='+', default=[1, 10, 100, 1000, 10_000])
+    parser.add_argument('--repeticoes', type=int, default=5, help="Melhor de N execuções (lotes grandes rodam uma vez).")
+    args = parser.parse_args()
+
+    def melhor_tempo(funcao, repeticoes):
+        funcao()
+        tempos = []
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            funcao()
+            tempos.append(time.perf_counter() - inicio)
+        return min(tempos) * 1000
+
+    rng = np.random.default_rng(0)
+    total_divergencias = 0
+    for nome, arquivo in listar_modelos(args.artefatos).items():
+        if not os.path.isdir(os.path.join(args.artefatos, diretorio_arvores(nome))):
+            continue
+        modelo = carregar_modelo(args.artefatos, nome, arquivo, mapeado=False)
+        motores = _motores(args.artefatos, nome, arquivo)
+        print(f"\n{'='*40}\n{nome}: {motores['motor'].n_arvores} árvore(s)\n{'='*40}")
+        print(f"{'Lote':>8}{'sklearn (ms)':>15}" + "".join(f"{rotulo + ' (ms)':>22}" for rotulo in motores))
+        divergencias = 0
+        for n in args.lotes:
+            X = _entrada_aleatoria(rng, modelo, n)
+            entrada = pd.DataFrame(X, columns=modelo.feature_names_in_) if hasattr(modelo, 'feature_names_in_') else X
+            for rotulo, motor in motores.items():
+                for problema in divergencias_sklearn(modelo, motor, X):
+                    print(f"✘ DIVERGÊNCIA: {rotulo} com lote de {n}: {problema}")
+                    divergencias += 1
+            repeticoes = args.repeticoes if n <= 10_000 else 1
+            tempos = [melhor_tempo(lambda: modelo.predict_proba(entrada), repeticoes)]
+            tempos += [melhor_tempo(lambda: motor.predict_proba(X), repeticoes) for motor in motores.values()]
+            print(f"{n:>8}{tempos[0]:>15.2f}" + "".join(f"{t:>22.2f}" for t in tempos[1:]))
+
+        status = "✔" if not divergencias else "✘ DIVERGÊNCIA"
+        print(f"{status} predict/predict_proba idênticos ao sklearn e contribuições somando a probabilidade: "
+              f"{divergencias == 0}")
+        total_divergencias += divergencias
+    if total_divergencias:
+        sys.exit(1)
@@ -0,0 +1,343 @@
+import pandas as pd
+import numpy as np
+import re
+import ast
+from instrumentacao import etapa
+
+# ==================== CONVERSORES POR LINHA (REFERÊNCIA) ====================
+# Versões originais, aplicadas célula a célula. Continuam aqui como referência
+# de comportamento e como fallback para as poucas linhas fora do caminho rápido.
+
+def converter_duracao(valor):
+    """
+    Converte uma string de duração para um número inteiro
+    representando o total de minutos.
+    """
+    try:
+        if pd.isna(valor):
+            return None
+        h, m = 0, 0
+        valor = str(valor).strip().lower()
+        if 'h' in valor:
+            partes = valor.split('h')
+            h = int(partes[0].strip())
+            if 'm' in partes[1]:
+                m = int(partes[1].replace('m', '').strip())
+        elif 'm' in valor:
+            m = int(valor.replace('m', '').strip())
+        return h * 60 + m
+    except:
+        return None
+
+def converter_valor(valor):
+    """
+    Converte uma string que representa um valor numérico para
+    um float.
+    """
+    try:
+        if pd.isna(valor):
+            return None
+        valor = str(valor).upper()
+        valor_limpo = re.sub(r'[^0-9KM\.]', '', valor)
+        match = re.match(r'^(\d*\.?\d*)([KM]?)$', valor_limpo)
+        if not match:
+            return None
+        numero, multiplicador = match.groups()
+        if numero == '':
+            return None
+        numero = float(numero)
+        if multiplicador == 'K':
+            return numero * 1_000
+        elif multiplicador == 'M':
+            return numero * 1_000_000
+        else:
+            return numero
+    except:
+        return None
+
+def str_para_lista(s):
+    """
+    Converte de forma segura uma string que representa uma lista Python em um objeto de lista real.
+    """
+    try:
+        if pd.isna(s):
+            return []
+        return ast.literal_eval(s)
+    except:
+        return []
+
+
+# ==================== CONVERSORES VETORIZADOS ====================
+# Mesmos resultados das funções acima, mas operando na coluna inteira com os
+# acessores .str do pandas e NumPy, sem chamar Python/regex para cada célula.
+
+MULTIPLICADORES = {'': 1.0, 'K': 1_000.0, 'M': 1_000_000.0}
+
+# Lista "bem formada" como aparece no CSV do IMDb: ['Action', 'Drama'].
+# Sem barras invertidas e sem aspas internas o literal_eval devolve exatamente
+# o texto entre as aspas, então podemos separar direto com str.split. Quebras de
+# linha e o caractere nulo ficam de fora: dentro das aspas o literal_eval os recusa.
+PADRAO_LISTA_SIMPLES = r"^\['[^'\\\n\r\x00]*'(?:, '[^'\\\n\r\x00]*')*\]$"
+
+def _por_valores_unicos(converter_unicos):
+    """
+    Aplica o conversor apenas aos valores distintos da coluna e espalha o
+    resultado de volta com um take do NumPy. Colunas como 'votes', 'duration'
+    e 'genres' repetem poucos valores em milhões de linhas.
+    Fora do contrato: textos com o caractere nulo. O factorize do pandas os corta
+    no '\x00' ('a\x00b' e 'a\x00c' viram o mesmo valor), e separá-los custaria
+    mais uma passada pela coluna inteira.
+    """
+    def converter(serie):
+        codigos, unicos = pd.factorize(serie, use_na_sentinel=True)
+        convertidos = converter_unicos(pd.Series(unicos, dtype=object))
+        valores = convertidos.to_numpy()
+        if valores.dtype == object:
+            # Nulos (código -1) viram lista vazia nas colunas de listas
+            valores = np.append(valores, None)
+            valores[-1] = []
+        else:
+            valores = np.append(valores, np.nan)
+        return pd.Series(valores[codigos], index=serie.index, dtype=valores.dtype)
+    converter.__doc__ = converter_unicos.__doc__
+    return converter
+
+def _int_ou_nan(texto):
+    try:
+        return float(int(texto))
+    except ValueError:
+        return np.nan
+
+def _texto_para_inteiro(texto):
+    """
+    Equivalente vetorizado de int(texto) para textos já sem espaços nas pontas.
+    Textos que int() rejeitaria viram NaN. O caminho rápido cobre [+-]?[0-9]+;
+    o que int() também aceita fora dele (sublinhados como '1_0', dígitos
+    Unicode como '٣') passa pelo próprio int(), texto a texto.
+    """
+    valido = texto.str.fullmatch(r'[+-]?[0-9]+').fillna(False).astype(bool)
+    resultado = pd.to_numeric(texto.where(valido), errors='coerce').astype('float64')
+    restantes = (texto.notna() & ~valido & (texto != '')).to_numpy(dtype=bool)
+    if restantes.any():
+        resultado[restantes] = texto[restantes].map(_int_ou_nan).to_numpy(dtype='float64')
+    return resultado
+
+@_por_valores_unicos
+def converter_valor_vetorizado(serie):
+    """
+    Versão vetorizada de converter_valor: '250K' -> 250000.0, '$1.5M' -> 1500000.0.
+    Retorna uma Series float64 com NaN onde a conversão falha.
+    """
+    nulos = serie.isna()
+    texto = serie.astype(str).str.upper()
+    texto_limpo = texto.str.replace(r'[^0-9KM\.]', '', regex=True)
+    partes = texto_limpo.str.extract(r'^(\d*\.?\d*)([KM]?)$')
+
+    # pd.to_numeric rejeita '' e '.', assim como float() faria
+    numero = pd.to_numeric(partes[0], errors='coerce')
+    fator = partes[1].map(MULTIPLICADORES)
+
+    resultado = numero.to_numpy(dtype='float64') * fator.to_numpy(dtype='float64')
+    resultado[nulos.to_numpy()] = np.nan
+    return pd.Series(resultado, index=serie.index, dtype='float64')
+
+@_por_valores_unicos
+def converter_duracao_vetorizado(serie):
+    """
+    Versão vetorizada de converter_duracao: '2h 15m' -> 135.
+    Retorna uma Series float64 com NaN onde a conversão falha.
+    """
+    nulos = serie.isna()
+    texto = serie.astype(str).str.strip().str.lower()
+
+    tem_h = texto.str.contains('h', regex=False).to_numpy()
+    tem_m = texto.str.contains('m', regex=False).to_numpy()
+
+    # Caso 'Xh Ym': apenas o trecho entre o 1º e o 2º 'h' conta, como em valor.split('h')
+    partes = texto.str.extract(r'^([^h]*)h([^h]*)')
+    horas = _texto_para_inteiro(partes[0].str.strip()).to_numpy(dtype='float64')
+    minutos_apos_h = np.where(
+        partes[1].str.contains('m', regex=False).fillna(False).to_numpy(dtype=bool),
+        _texto_para_inteiro(partes[1].str.replace('m', '', regex=False).str.strip()).to_numpy(dtype='float64'),
+        0.0,
+    )
+
+    # Caso só com minutos: 'Ym'
+    minutos = _texto_para_inteiro(texto.str.replace('m', '', regex=False).str.strip()).to_numpy(dtype='float64')
+
+    resultado = np.where(tem_h, horas * 60 + minutos_apos_h, np.where(tem_m, minutos, 0.0))
+    resultado[nulos.to_numpy()] = np.nan
+    return pd.Series(resultado, index=serie.index, dtype='float64')
+
+@_por_valores_unicos
+def str_para_lista_vetorizado(serie):
+    """
+    Versão vetorizada de str_para_lista para as colunas 'genres' e 'languages'.
+    Linhas no formato padrão são separadas com str.split; o restante (aspas
+    duplas, escapes, textos inválidos) cai no literal_eval de str_para_lista.
+    """
+    resultado = pd.Series([[] for _ in range(len(serie))], index=serie.index, dtype=object)
+
+    texto = serie.astype(str)
+    nao_nulos = serie.notna().to_numpy()
+    vazias = nao_nulos & (texto == '[]').to_numpy()
+    simples = nao_nulos & ~vazias & texto.str.match(PADRAO_LISTA_SIMPLES).fillna(False).to_numpy(dtype=bool)
+
+    if simples.any():
+        # "['Action', 'Drama']" -> "Action', 'Drama" -> ['Action', 'Drama']
+        resultado[simples] = texto[simples].str.slice(2, -2).str.split("', '", regex=False)
+
+    restantes = nao_nulos & ~vazias & ~simples
+    if restantes.any():
+        resultado[restantes] = serie[restantes].map(str_para_lista)
+
+    return resultado
+
+
+
+# ==================== LIMPEZA DO DATAFRAME ====================
+
+# Colunas do CSV do IMDb usadas no treinamento
+COLUNAS_UTEIS = ['title', 'year', 'duration', 'rating', 'votes', 'budget', 'genres', 'languages']
+
+# Colunas numéricas que passam pelo StandardScaler
+COLUNAS_PARA_ESCALAR = ['year', 'duration', 'votes', 'budget']
+
+def limpar_dataframe(df):
+    """
+    Seleciona as colunas úteis, converte os textos e trata os dados faltantes.
+    Não preenche o 'budget': a mediana depende do dataset inteiro, então quem
+    chama decide como obtê-la (direto no DataFrame ou acumulada em chunks).
+    """
+    df = df[COLUNAS_UTEIS].copy()
+
+    with etapa('converter_numericos'):
+        # Converte a coluna 'votes' inteira de uma vez. 250k
+        df['votes'] = converter_valor_vetorizado(df['votes'])
+
+        # Aplica a mesma lógica para a coluna 'budget', convertendo valores como '$1.5M'
+        df['budget'] = converter_valor_vetorizado(df['budget'])
+
+        # converte a duração para minutos
+        df['duration'] = converter_duracao_vetorizado(df['duration'].astype(str))
+
+    with etapa('remover_e_preencher'):
+        # remove as linhas onde as colunas 'year', 'rating' ou 'duration' não tem valor
+        df = df.dropna(subset=['year', 'rating', 'duration'])
+
+        # para a coluna 'votes', se algum valor for nulo após a conversão, preenchemos com 0
+        df['votes'] = df['votes'].fillna(0)
+
+    with etapa('converter_listas'):
+        # converte uma lista propria para o python
+        df['languages'] = str_para_lista_vetorizado(df['languages'])
+
+        # aplica a mesma lógica para a coluna 'genres'
+        df['genres'] = str_para_lista_vetorizado(df['genres'])
+
+    with etapa('preencher_listas_vazias'):
+        # tratamento de gêneros e idiomas vazios
+        filmes_sem_genero = df['genres'].str.len() == 0
+        # a função .any() verifica se existe pelo menos um 'True' na máscara
+        if filmes_sem_genero.any():
+            # Isso garante que todos os filmes tenham pelo menos um gênero, evitando problemas em etapas futuras
+            df.loc[filmes_sem_genero, 'genres'] = df.loc[filmes_sem_genero, 'genres'].apply(lambda x: ['Unknown'])
+
+        # aplica a mesma lógica para a coluna de idiomas, colocando 'English'
+        filmes_sem_idioma = df['languages'].str.len() == 0
+        if filmes_sem_idioma.any():
+            df.loc[filmes_sem_idioma, 'languages'] = df.loc[filmes_sem_idioma, 'languages'].apply(lambda x: ['English'])
+
+    return df
+
+
+# ==================== TIPOS COMPACTOS ====================
+
+# Fração máxima de valores distintos para um texto virar category: acima dela os
+# códigos mais uma cópia de cada texto ocupam quase o mesmo que a coluna original
+FRACAO_MAXIMA_CATEGORIAS = 0.5
+
+def compactar_textos(df):
+    """
+    Troca as colunas de texto com muitos valores repetidos por category (códigos
+    inteiros + um texto por valor distinto). Colunas de listas ficam como estão.
+    """
+    for coluna in df.columns:
+        serie = df[coluna]
+        if isinstance(serie.dtype, pd.CategoricalDtype) or not pd.api.types.is_string_dtype(serie):
+            continue
+        if serie.nunique() <= FRACAO_MAXIMA_CATEGORIAS * len(serie):
+            df[coluna] = serie.astype('category')
+    return df
+
+
+def verificar_equivalencia(n=200_000, seed=42):
+    """
+    Compara cada conversor vetorizado com o original por linha em `n` valores
+    sorteados (formatos do CSV real misturados a casos de borda e malformados).
+    Retorna [{'nome', 'iguais', 'segundos_por_linha', 'segundos_vetorizado'}, ...].
+    """
+    import time
+
+    rng = np.random.default_rng(seed)
+
+    # Casos de borda e malformados, misturados a valores no formato do CSV real
+    bordas_valor = ['250K', '1.5M', '$1.5M', '$15,000,000', '1,234', '12.3K', '.5M', '7',
+                    '.', 'K', '', 'abc', '$ 2 M', '1.2.3', '1_000', '١٢K', np.nan, 3500.0]
+    bordas_duracao = ['2h 15m', '1h', '45m', '2h', ' 1H 5M ', 'h 5m', '2h xm', '3h 10m 2h',
+                      '120', '', 'nan', 'abc', '-1h 5m', '+2h', '1 h 2 m', '1_0m', '1h 1_0m', '٣m', '١h ٢m',
+                      '_1m', '1__0m', np.nan]
+    bordas_lista = ["['Action', 'Drama']", "['English']", '[]', "[\"Children's\", 'Drama']",
+                    "['Comedy','Romance']", "['It\\'s']", 'Action', "['A', 'B'", '', "['a\nb']", "['a\rb']",
+                    "['a', 'b\nc']", np.nan]
+
+    generos = ['Action', 'Adventure', 'Comedy', 'Crime', 'Drama', 'Horror', 'Romance', 'Thriller']
+    votos = [f"{k}K" for k in rng.integers(1, 999, 2_000)] + [f"{m / 10:.1f}M" for m in rng.integers(10, 30, 20)]
+    orcamentos = [f"${v:,}" for v in rng.integers(1, 300, 500) * 100_000] + [f"${m}M" for m in range(1, 300)]
+    duracoes = [f"{h}h {m}m" for h in range(0, 4) for m in range(1, 60)] + [f"{h}h" for h in range(1, 4)]
+    listas = [str(sorted(set(rng.choice(generos, rng.integers(1, 4))))) for _ in range(300)]
+
+    def gerar(realistas, bordas):
+        valores = pd.array(realistas + bordas, dtype=object)
+        return pd.Series(valores[rng.integers(0, len(valores), n)])
+
+    casos = [
+        ('converter_valor', converter_valor, converter_valor_vetorizado, gerar(votos + orcamentos, bordas_valor)),
+        ('converter_duracao', converter_duracao, converter_duracao_vetorizado, gerar(duracoes, bordas_duracao).astype(str)),
+        ('str_para_lista', str_para_lista, str_para_lista_vetorizado, gerar(listas, bordas_lista)),
+    ]
+
+    resultados = []
+    for nome, por_linha, vetorizado, serie in casos:
+        inicio = time.perf_counter()
+        esperado = serie.apply(por_linha)
+        tempo_linha = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        obtido = vetorizado(serie)
+        tempo_vetorizado = time.perf_counter() - inicio
+
+        if nome == 'str_para_lista':
+            iguais = esperado.tolist() == obtido.tolist()
+        else:
+            iguais = bool(np.allclose(esperado.astype('float64'), obtido, equal_nan=True))
+        resultados.append({'nome': nome, 'iguais': iguais, 'segundos_por_linha': tempo_linha,
+                           'segundos_vetorizado': tempo_vetorizado})
+    return resultados
+
+
+if __name__ == "__main__":
+    # Verificação de equivalência e comparação de tempo contra as funções por linha
+    # (também roda na seção "equivalencia" do benchmark.py); sai com código 1 se divergir:
+    #   python preprocessamento.py [numero_de_linhas]
+    import sys
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    print(f"Comparando conversores em {n} linhas")
+    resultados = verificar_equivalencia(n)
+    for r in resultados:
+        status = "✔" if r['iguais'] else "✘ DIVERGÊNCIA"
+        print(f"{status} {r['nome']}: por linha {r['segundos_por_linha']:.3f}s | vetorizado {r['segundos_vetorizado']:.3f}s "
+              f"| ganho {r['segundos_por_linha'] / r['segundos_vetorizado']:.1f}x")
+    if not all(r['iguais'] for r in resultados):
+        sys.exit(1)
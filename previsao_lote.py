@@ -0,0 +1,127 @@
+import numpy as np
+import pandas as pd
+import argparse
+import joblib
+import os
+import time
+from artefatos import listar_modelos, carregar_modelo, carregar_json, entrada_do_modelo
+from codificador import CodificadorLinha, COLUNAS_NUMERICAS, dentro_das_faixas
+from fatores import Importancias
+
+# ==================== PREVISÃO EM LOTE ====================
+# Pontua um catálogo inteiro sem a interface: o CSV de entrada é lido em blocos
+# de tamanho fixo, cada bloco é codificado de uma vez (CodificadorLinha.codificar_lote)
+# e as previsões de cada modelo são anexadas ao CSV de saída assim que o bloco
+# termina, então a memória não cresce com o tamanho do arquivo.
+#
+# Entrada: colunas year, duration, votes, budget, genre, language.
+# Saída: as colunas de entrada mais, para cada modelo,
+#   <modelo>_previsao       1 = sucesso, 0 = fracasso
+#   <modelo>_probabilidade  probabilidade de sucesso
+#   <modelo>_fatores        os 3 fatores mais importantes para a linha (como na interface)
+
+COLUNAS_ENTRADA = COLUNAS_NUMERICAS + ['genre', 'language']
+
+
+def _prefixo(nome):
+    return nome.lower().replace(' ', '_')
+
+
+def _entradas_validas(chunk):
+    """
+    Converte os campos numéricos; linhas com algum valor faltando, inválido ou fora
+    das faixas que a interface e o servidor aceitam (codificador.REGRAS_NUMERICAS)
+    não são pontuadas.
+    """
+    numericas = chunk[COLUNAS_NUMERICAS].apply(pd.to_numeric, errors='coerce')
+    # Infinitos também ficam de fora, como no servidor
+    validas = np.isfinite(numericas).all(axis=1) & chunk['genre'].notna() & chunk['language'].notna()
+    return numericas, validas.to_numpy() & dentro_das_faixas(numericas)
+
+
+def prever_lote(caminho_entrada, caminho_saida, base_path='artefatos_modelo', nomes_modelos=None, chunksize=50_000):
+    """
+    Pontua todas as linhas de `caminho_entrada` com os modelos escolhidos
+    (padrão: todos os listados nos artefatos) e grava em `caminho_saida`.
+    Retorna {'linhas': ..., 'invalidas': ..., 'segundos': ..., 'linhas_por_segundo': ...}.
+    """
+    lista = listar_modelos(base_path)
+    nomes_modelos = nomes_modelos or list(lista)
+    desconhecidos = [nome for nome in nomes_modelos if nome not in lista]
+    if desconhecidos:
+        raise ValueError(f"Modelo(s) não encontrado(s) em {base_path}: {desconhecidos}. Disponíveis: {list(lista)}")
+
+    scaler = joblib.load(os.path.join(base_path, 'scaler.joblib'))
+    colunas = carregar_json(base_path, 'colunas_modelo.json')
+    codificador = CodificadorLinha(colunas, scaler)
+    importancias = Importancias.carregar(base_path)
+    # Em lote vale pagar a desserialização completa: a travessia das árvores do
+    # sklearn (em C) é bem mais rápida em blocos grandes que a de motor_arvores
+    modelos = {nome: carregar_modelo(base_path, nome, lista[nome], mapeado=False) for nome in nomes_modelos}
+
+    print(f"{'='*40}\nPrevisão em lote: {caminho_entrada} -> {caminho_saida}\n{'='*40}")
+    print(f"Modelos: {', '.join(nomes_modelos)} | blocos de {chunksize} linhas")
+
+    total, invalidas = 0, 0
+    inicio = time.perf_counter()
+    temporario = caminho_saida + '.tmp'
+    with open(temporario, 'w', encoding='utf-8', newline='') as saida:
+        for i, chunk in enumerate(pd.read_csv(caminho_entrada, chunksize=chunksize,
+                                              dtype={'genre': object, 'language': object})):
+            faltando = [c for c in COLUNAS_ENTRADA if c not in chunk.columns]
+            if faltando:
+                raise ValueError(f"Colunas ausentes em {caminho_entrada}: {faltando}")
+
+            numericas, validas = _entradas_validas(chunk)
+            X = codificador.codificar_lote(numericas[validas], chunk['genre'][validas], chunk['language'][validas])
+            resultado = chunk.copy()
+            for nome, modelo in modelos.items():
+                entrada = entrada_do_modelo(modelo, X, colunas)
+                proba = modelo.predict_proba(entrada) if len(X) else np.empty((0, 2))
+                classes = np.asarray(modelo.classes_)
+                previsao = np.full(len(chunk), pd.NA, dtype=object)
+                probabilidade = np.full(len(chunk), np.nan)
+                previsao[validas] = classes[np.argmax(proba, axis=1)]
+                probabilidade[validas] = proba[:, list(classes).index(1)]
+                resultado[f'{_prefixo(nome)}_previsao'] = pd.array(previsao, dtype='Int8')
+                resultado[f'{_prefixo(nome)}_probabilidade'] = probabilidade
+                if nome in importancias:
+                    fatores = np.full(len(chunk), '', dtype=object)
+                    genero, idioma = chunk['genre'][validas], chunk['language'][validas]
+                    campos = importancias.top_fatores_lote(nome, genero, idioma)
+                    # 'genero'/'idioma' viram 'genero:<nome>'/'idioma:<nome>' na saída
+                    rotulos = np.where(campos == 'genero', 'genero:' + genero.astype(str).to_numpy()[:, None], campos)
+                    rotulos = np.where(campos == 'idioma', 'idioma:' + idioma.astype(str).to_numpy()[:, None], rotulos)
+                    fatores[validas] = ['|'.join(linha) for linha in rotulos]
+                    resultado[f'{_prefixo(nome)}_fatores'] = fatores
+
+            resultado.to_csv(saida, header=(i == 0), index=False)
+            total += len(chunk)
+            invalidas += int((~validas).sum())
+            decorrido = time.perf_counter() - inicio
+            print(f"  bloco {i + 1}: {total} linhas | {total / decorrido:,.0f} linhas/s")
+    os.replace(temporario, caminho_saida)
+
+    segundos = time.perf_counter() - inicio
+    resumo = {'linhas': total, 'invalidas': invalidas, 'segundos': segundos,
+              'linhas_por_segundo': total / segundos if segundos else float('inf')}
+    print(f"✔ {total} linhas pontuadas em {segundos:.2f}s ({resumo['linhas_por_segundo']:,.0f} linhas/s)"
+          + (f" | {invalidas} linha(s) inválida(s) sem previsão" if invalidas else ""))
+    print(f"✔ Previsões salvas em: {caminho_saida}")
+    return resumo
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pontua um CSV de filmes com os modelos treinados do CineScope.")
+    parser.add_argument('entrada', help="CSV com as colunas year, duration, votes, budget, genre, language.")
+    parser.add_argument('saida', help="CSV de saída com as previsões.")
+    parser.add_argument('--artefatos', default='artefatos_modelo', help="Diretório dos artefatos gerados pelo main.py.")
+    parser.add_argument('--modelos', nargs='+', default=None,
+                        help="Modelos a usar, pelo nome (ex.: 'Random Forest' KNN). Padrão: todos.")
+    parser.add_argument('--chunksize', type=int, default=50_000, help="Linhas por bloco.")
+    args = parser.parse_args()
+    prever_lote(args.entrada, args.saida, args.artefatos, args.modelos, args.chunksize)
+
+
+if __name__ == "__main__":
+    main()
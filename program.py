@@ -5,9 +5,58 @@ from PIL import Image, ImageTk
 import pandas as pd
 import numpy as np
 import joblib
-import json
 import os
 import random
+import time
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from artefatos import listar_modelos, carregar_modelo, carregar_json, entrada_do_modelo, DIRETORIO_INDICE_SIMILARES, DIRETORIO_TITULOS
+from codificador import CodificadorLinha, erro_de_faixa
+from indice_similaridade import IndiceSimilaridade
+from cache_previsoes import CachePrevisoes
+from fatores import Importancias
+from titulos import carregar_titulos
+from manifesto import validar_manifesto, listar_versoes
+from custos_modelos import modelo_selecionado
+from cenarios import AgregadosGeneroIdioma, ranking_generos_idiomas, varredura
+
+# Marca o início do processo para medir o tempo até a primeira pintura da janela
+INICIO_PROCESSO = time.perf_counter()
+
+# Metadados pequenos lidos em paralelo no início: atributo -> arquivo
+ARQUIVOS_METADADOS = {
+    'generos': 'generos_lista.json',
+    'idiomas': 'idiomas_lista.json',
+    'metricas': 'metricas_modelos.json',
+}
+
+# Estado de cada versão dos artefatos; trocar de versão guarda o da atual e restaura (ou carrega) o da escolhida
+ATRIBUTOS_VERSAO = ('base_path', 'generos', 'idiomas', 'metricas', 'feature_importances', 'lista_modelos', 'scaler',
+                    'colunas_modelo', 'indice_similares', 'titulos_filmes', 'cache_previsoes', 'modelos',
+                    '_carregamentos_modelos', '_codificador', 'modelo_padrao', 'agregados')
+
+# Cliques em sequência dentro desse intervalo viram uma previsão só
+ATRASO_DEBOUNCE_MS = 150
+# Frequência com que a fila de resultados das previsões é lida
+INTERVALO_POLL_MS = 15
+# Análise "E se..." (cenarios.py): linhas mostradas no ranking e tamanho das células do mapa de calor
+MODOS_CENARIO = ('Gênero × Idioma', 'Orçamento × Votos')
+LINHAS_RANKING = 200
+CELULA_MAPA = (50, 26)
+
+
+def _abreviar(valor):
+    """1500000 -> '1.5M', para os eixos do mapa de calor."""
+    for limite, sufixo in ((1e9, 'B'), (1e6, 'M'), (1e3, 'k')):
+        if abs(valor) >= limite: return f"{valor / limite:.3g}{sufixo}"
+    return f"{valor:.0f}"
+
+
+def _cor_probabilidade(p):
+    """Vermelho (0%) -> amarelo (50%) -> verde (100%)."""
+    return f"#{int(255 * min(1.0, 2 * (1 - p))):02x}{int(200 * min(1.0, 2 * p)):02x}50"
 
 class CreateToolTip:
     def __init__(self, widget, text, delay=500):
@@ -81,7 +130,7 @@ class MoviePredictorApp(ThemedTk):
     def __init__(self):
         super().__init__(theme="arc")
         self.title("CineScope")
-        self.geometry("420x780") 
+        self.geometry("420x850") 
         self.resizable(False, False)
         
         try:
@@ -108,26 +157,223 @@ class MoviePredictorApp(ThemedTk):
             'year': '🗓️ Ano de Lançamento'
         }
         
-        self._load_resources()
+        # Até os metadados chegarem a janela aparece vazia, em estado de carregamento
+        self.diretorio_artefatos = "artefatos_modelo"
+        self.base_path = self.diretorio_artefatos
+        # Versões lado a lado (manifesto.py): a principal e as de artefatos_modelo/versoes
+        self.versoes, self.versao_atual, self._estados_versoes = {}, None, {}
+        # Segurada pelo worker durante uma previsão: a troca de versão espera ela terminar
+        self._trava_versao = threading.Lock()
+        # Chamado quando a recarga da versão atual (artefatos alterados no disco) terminar
+        self._depois_da_recarga = None
+        self.generos, self.idiomas, self.metricas, self.feature_importances = [], [], {}, {}
+        self.titulos_filmes, self.colunas_modelo = None, None
+        self.lista_modelos = {}
+        self.modelo_padrao = ''
+        self.agregados = None
+        # Janela "E se..." (aberta sob demanda) e o id do último cálculo pedido a ela
+        self._janela_cenarios, self._id_cenario = None, 0
+        self.modelos = {}
+        self._carregamentos_modelos = {}
+        self._trava_modelos = threading.Lock()
+        self._codificador = None
+        # Previsões rodam em um worker próprio; os resultados voltam por uma fila lida pelo after()
+        self.executor_previsao = ThreadPoolExecutor(max_workers=1)
+        self._fila_previsoes = queue.Queue()
+        self._id_pedido = 0
+        self._futuro_previsao = None
+        self._debounce_previsao = None
+        self._poll_previsoes_ativo = False
+        self._ocupado = False
+        self.latencias_previsao = deque(maxlen=100)
+        # Resultados de entradas repetidas; esvaziado sozinho quando os artefatos mudam
+        self.cache_previsoes = CachePrevisoes(self.base_path)
+        self.indice_similares = None
+        # Carregamento das versões e dos modelos; os JSONs de metadados têm um pool só deles,
+        # porque _load_resources espera por eles: no mesmo pool, cargas sobrepostas (troca de
+        # versão, recarga) poderiam ocupar todos os workers esperando leituras presas na fila
+        self.executor = ThreadPoolExecutor(max_workers=len(ARQUIVOS_METADADOS) + 1)
+        self.executor_metadados = ThreadPoolExecutor(max_workers=len(ARQUIVOS_METADADOS))
+
+        self._futuro_recursos = self.executor.submit(self._load_resources, self.base_path)
+        # Um único laço de _poll_resources por vez, seja qual for a carga em andamento
+        self._poll_recursos_ativo = True
         self._load_icons()
         self._configure_styles()
         self._create_widgets()
-
-    def _load_resources(self):
+        self._set_loading_state(True)
+        self.after_idle(self._report_first_paint)
+        self.after(20, self._poll_resources)
+
+    def _load_resources(self, base_path):
+        """
+        Roda em uma thread: confere o manifesto e lê a lista de modelos e os JSONs
+        de metadados em paralelo. Devolve o estado da versão em base_path (ATRIBUTOS_VERSAO).
+        """
+        inicio = time.perf_counter()
+        # Só tamanhos e hashes dos arquivos pequenos: nenhum modelo é aberto aqui
+        manifesto, avisos = validar_manifesto(base_path)
+        tempo_manifesto = time.perf_counter() - inicio
+        lista_modelos = listar_modelos(base_path)
+        futuros = {attr: self.executor_metadados.submit(carregar_json, base_path, arquivo)
+                   for attr, arquivo in ARQUIVOS_METADADOS.items()}
+        recursos = {attr: futuro.result() for attr, futuro in futuros.items()}
+        recursos['base_path'] = base_path
+        recursos['lista_modelos'] = lista_modelos
+        # O escolhido pelo orçamento de latência/tamanho do treino (custos_modelos.py), se houver
+        recursos['modelo_padrao'] = modelo_selecionado(base_path, lista_modelos) or \
+            ('Random Forest' if 'Random Forest' in lista_modelos else '')
+        recursos['feature_importances'] = Importancias.carregar(base_path)
+        # Filmes de treino por par gênero × idioma, para a análise "E se..."; artefatos antigos não têm
+        recursos['agregados'] = AgregadosGeneroIdioma.carregar(base_path)
+        recursos['scaler'] = joblib.load(os.path.join(base_path, 'scaler.joblib'))
+        caminho_colunas = os.path.join(base_path, 'colunas_modelo.json')
+        recursos['colunas_modelo'] = carregar_json(base_path, 'colunas_modelo.json') if os.path.exists(caminho_colunas) else None
+        # Artefatos antigos sem o índice continuam usando o kneighbors do próprio KNN
+        caminho_indice = os.path.join(base_path, DIRETORIO_INDICE_SIMILARES)
+        recursos['indice_similares'] = IndiceSimilaridade.carregar(caminho_indice) if os.path.isdir(caminho_indice) else None
+        # Títulos mapeados em memória; artefatos antigos caem nos JSONs movie_titles/train_indices
+        recursos['titulos_filmes'] = carregar_titulos(base_path, DIRETORIO_TITULOS)
+        recursos['cache_previsoes'] = CachePrevisoes(base_path)
+        recursos['modelos'], recursos['_carregamentos_modelos'], recursos['_codificador'] = {}, {}, None
+        versoes = listar_versoes(self.diretorio_artefatos)
+        versao = next((nome for nome, caminho in versoes.items() if caminho == base_path), base_path)
+        return {'estado': recursos, 'versao': versao, 'versoes': versoes, 'avisos': avisos,
+                'manifesto': manifesto, 'tempo_manifesto': tempo_manifesto, 'tempo': time.perf_counter() - inicio}
+
+    def _start_loading(self, base_path):
+        """Carrega a versão em base_path em segundo plano; reaproveita o laço de _poll_resources se já houver um."""
+        self._set_loading_state(True)
+        self._futuro_recursos = self.executor.submit(self._load_resources, base_path)
+        if not self._poll_recursos_ativo:
+            self._poll_recursos_ativo = True
+            self.after(20, self._poll_resources)
+
+    def _poll_resources(self):
+        """Verifica pelo after() se o carregamento terminou; o Tk só é tocado na thread principal."""
+        if not self._futuro_recursos.done():
+            self.after(20, self._poll_resources)
+            return
+        self._poll_recursos_ativo = False
         try:
-            base_path = "artefatos_modelo"
-            self.modelos = joblib.load(os.path.join(base_path, 'todos_os_modelos.joblib'))
-            self.scaler = joblib.load(os.path.join(base_path, 'scaler.joblib'))
-            with open(os.path.join(base_path, 'generos_lista.json'), 'r', encoding='utf-8') as f: self.generos = json.load(f)
-            with open(os.path.join(base_path, 'idiomas_lista.json'), 'r', encoding='utf-8') as f: self.idiomas = json.load(f)
-            with open(os.path.join(base_path, 'metricas_modelos.json'), 'r', encoding='utf-8') as f: self.metricas = json.load(f)
-            with open(os.path.join(base_path, 'feature_importances.json'), 'r', encoding='utf-8') as f: self.feature_importances = json.load(f)
-            with open(os.path.join(base_path, 'movie_titles.json'), 'r', encoding='utf-8') as f: self.movie_titles = json.load(f)
-            with open(os.path.join(base_path, 'train_indices.json'), 'r', encoding='utf-8') as f: self.train_indices = json.load(f)
-            self.colunas_modelo = self.modelos['Random Forest'].feature_names_in_
+            recursos = self._futuro_recursos.result()
         except Exception as e:
-            messagebox.showerror("Erro ao Carregar Recursos", f"Não foi possível carregar um arquivo essencial: {e}\n\nA aplicação será encerrada.")
-            self.destroy()
+            if self.versao_atual is None:
+                messagebox.showerror("Erro ao Carregar Recursos", f"Não foi possível carregar um arquivo essencial: {e}\n\nA aplicação será encerrada.")
+                self.destroy()
+                return
+            # Falha ao abrir outra versão (ou ao recarregar a atual): a atual continua valendo
+            self._depois_da_recarga = None
+            messagebox.showerror("Erro ao Carregar Versão", f"Não foi possível abrir a versão escolhida: {e}")
+            self.combo_versao.set(self.versao_atual)
+            self._set_loading_state(False)
+            return
+        manifesto = recursos['manifesto']
+        descricao = f"versão {recursos['versao']}, criada em {manifesto['criado_em']}" if manifesto else f"versão {recursos['versao']}"
+        print(f"⏱ Metadados carregados em {recursos['tempo'] * 1000:.0f} ms (em segundo plano; {descricao}, "
+              f"manifesto conferido em {recursos['tempo_manifesto'] * 1000:.1f} ms)")
+        for aviso in recursos['avisos']: print(f"AVISO: {aviso}")
+        self.versoes = recursos['versoes']
+        self._apply_version(recursos['versao'], recursos['estado'])
+
+    def _refresh_versions(self):
+        """Relê as versões ao abrir a lista: versões treinadas com a janela aberta também aparecem."""
+        self.versoes = listar_versoes(self.diretorio_artefatos)
+        self.combo_versao.config(values=list(self.versoes))
+
+    def _on_version_select(self, event=None):
+        """Troca a versão dos artefatos sem reabrir a janela; versões já abertas voltam na hora."""
+        versao = self.combo_versao.get()
+        if not versao or versao == self.versao_atual: return
+        self._cancel_pending_prediction()
+        if versao in self._estados_versoes:
+            self._apply_version(versao, self._estados_versoes[versao])
+            return
+        self._start_loading(self.versoes[versao])
+
+    def _apply_version(self, versao, estado):
+        """Guarda o estado da versão atual e passa a usar `estado`; espera uma previsão em andamento terminar."""
+        if not self._trava_versao.acquire(blocking=False):
+            self.after(INTERVALO_POLL_MS, self._apply_version, versao, estado)
+            return
+        try:
+            if self.versao_atual is not None:
+                self._estados_versoes[self.versao_atual] = {attr: getattr(self, attr) for attr in ATRIBUTOS_VERSAO}
+            for attr in ATRIBUTOS_VERSAO: setattr(self, attr, estado[attr])
+            self.versao_atual = versao
+        finally:
+            self._trava_versao.release()
+        # O ranking aberto era da versão anterior (outros modelos e vocabulários)
+        if self._janela_cenarios is not None: self._close_what_if()
+
+        self.combo_versao.config(values=list(self.versoes)); self.combo_versao.set(versao)
+        self.combo_gen1.config(values=self.generos); self.combo_idioma1.config(values=self.idiomas)
+        # Gênero ou idioma que não existe no vocabulário da nova versão é desmarcado
+        if self.combo_gen1.get() not in self.generos: self.combo_gen1.set('')
+        if self.combo_idioma1.get() not in self.idiomas: self.combo_idioma1.set('')
+        self.combo_modelo.config(values=list(self.lista_modelos))
+        if self.combo_modelo.get() not in self.lista_modelos:
+            self.combo_modelo.set(self.modelo_padrao)
+        self._clear_results()
+        self._set_loading_state(False)
+        self._on_model_select()
+        depois, self._depois_da_recarga = self._depois_da_recarga, None
+        if depois is not None: depois()
+
+    def _reload_if_changed(self, depois):
+        """
+        Se os artefatos da versão atual mudaram no disco (main.py ou --atualizar com a janela aberta),
+        recarrega a versão inteira em segundo plano e chama `depois` em seguida. Devolve True nesse caso.
+        """
+        if not self.cache_previsoes.artefatos_mudaram(): return False
+        # Só esvaziar o cache não adianta: os modelos, o scaler e o índice em memória são os antigos
+        self._cancel_pending_prediction()
+        self._depois_da_recarga = depois
+        # Uma carga já em andamento lê o disco de agora: basta encadear `depois` a ela
+        if self._poll_recursos_ativo: return True
+        print(f"AVISO: os artefatos de '{self.base_path}' mudaram no disco; recarregando a versão {self.versao_atual}")
+        self._start_loading(self.base_path)
+        return True
+
+    def _report_first_paint(self):
+        self.update_idletasks()
+        print(f"⏱ Primeira pintura da janela em {(time.perf_counter() - INICIO_PROCESSO) * 1000:.0f} ms")
+
+    def _set_loading_state(self, carregando):
+        if carregando:
+            self.result_text_label.config(text="Carregando recursos...", style='Default.TLabel')
+            self.predict_button.config(state='disabled'); self.whatif_button.config(state='disabled')
+            # Outra versão escolhida no meio da carga trocaria o futuro acompanhado pelo _poll_resources
+            self.combo_versao.config(state='disabled')
+        else:
+            self.result_text_label.config(text="Aguardando dados...", style='Default.TLabel')
+            self.predict_button.config(state='normal'); self.whatif_button.config(state='normal')
+            self.combo_versao.config(state='readonly')
+
+    def _load_model_async(self, nome_modelo):
+        """Começa a carregar um modelo em segundo plano na primeira vez que ele é escolhido."""
+        # Chamado tanto pela thread do Tk quanto pelo worker de previsão
+        with self._trava_modelos:
+            if nome_modelo in self._carregamentos_modelos or nome_modelo not in self.lista_modelos: return
+            # Diretório e arquivo da versão atual, mesmo que a versão mude antes do carregamento começar
+            base_path, arquivo = self.base_path, self.lista_modelos[nome_modelo]
+            def carregar():
+                inicio = time.perf_counter()
+                # Arrays mapeados do disco: abrir é quase instantâneo e as páginas ficam no cache do SO
+                modelo = carregar_modelo(base_path, nome_modelo, arquivo)
+                print(f"⏱ Modelo '{nome_modelo}' carregado em {(time.perf_counter() - inicio) * 1000:.0f} ms")
+                return modelo
+            self._carregamentos_modelos[nome_modelo] = self.executor.submit(carregar)
+
+    def _get_model(self, nome_modelo):
+        """Devolve o modelo carregado, esperando o carregamento em andamento se preciso."""
+        if nome_modelo not in self.modelos:
+            self._load_model_async(nome_modelo)
+            self.modelos[nome_modelo] = self._carregamentos_modelos[nome_modelo].result()
+            if self.colunas_modelo is None:
+                # Artefatos antigos sem colunas_modelo.json: as colunas vêm do próprio modelo
+                self.colunas_modelo = self.modelos[nome_modelo].feature_names_in_
+        return self.modelos[nome_modelo]
 
     def _load_icons(self):
         try:
@@ -165,9 +411,20 @@ class MoviePredictorApp(ThemedTk):
     def _on_model_select(self, event=None):
         """Atualiza a UI (métricas e painéis visíveis) quando um modelo é selecionado."""
         nome_modelo = self.combo_modelo.get()
+        self._cancel_pending_prediction()
+        if nome_modelo: self._load_model_async(nome_modelo)
         if nome_modelo and nome_modelo in self.metricas:
-            metricas_modelo = self.metricas[nome_modelo]; acc = metricas_modelo['accuracy']; prec = metricas_modelo['precision']; f1 = metricas_modelo['f1_score']
-            self.acc_label_val.config(text=f"{acc:.3f}"); self.prec_label_val.config(text=f"{prec:.3f}"); self.f1_label_val.config(text=f"{f1:.3f}")
+            metricas_modelo = self.metricas[nome_modelo]
+            # Com validação cruzada: média ± desvio dos folds; artefatos antigos só têm o conjunto de teste
+            validacao = metricas_modelo.get('validacao_cruzada')
+            def texto(metrica):
+                if validacao: return f"{validacao[metrica]['media']:.3f} ± {validacao[metrica]['desvio']:.3f}"
+                return f"{metricas_modelo[metrica]:.3f}"
+            self.acc_label_val.config(text=texto('accuracy')); self.prec_label_val.config(text=texto('precision')); self.f1_label_val.config(text=texto('f1_score'))
+            # Custos medidos no treino (custos_modelos.py); artefatos antigos não têm
+            custos = metricas_modelo.get('custos')
+            self.latencia_label_val.config(text=f"{custos['linha_p99_ms']:.2f} ms" if custos else "---")
+            self.tamanho_label_val.config(text=f"{custos['bytes'] / 1e6:.1f} MB" if custos else "---")
         
         if nome_modelo in self.feature_importances:
             self.frame_fatores.pack(pady=5, fill='x', ipady=5)
@@ -183,6 +440,7 @@ class MoviePredictorApp(ThemedTk):
         
     def _populate_random_data(self):
         """Preenche os campos numéricos com valores aleatórios dentro de faixas definidas."""
+        self._cancel_pending_prediction()
         # Definir as faixas para cada campo
         random_data = {
             'ano': random.randint(1850, 2025),
@@ -231,13 +489,22 @@ class MoviePredictorApp(ThemedTk):
         frame_modelo = ttk.LabelFrame(main_frame, text="Seleção do Modelo de IA")
         frame_modelo.pack(pady=10, fill='x', padx=2)
 
+        # Versão dos artefatos (lista relida a cada abertura)
+        version_row_frame = ttk.Frame(frame_modelo)
+        version_row_frame.pack(fill='x', padx=10, pady=(5, 0))
+        ttk.Label(version_row_frame, text="Versão:").pack(side='left')
+        self.combo_versao = ttk.Combobox(version_row_frame, values=list(self.versoes), state='readonly', width=20,
+                                         postcommand=self._refresh_versions)
+        self.combo_versao.pack(side='left', padx=5)
+        self.combo_versao.bind("<<ComboboxSelected>>", self._on_version_select)
+
         # Frame para a linha de seleção (label + combobox)
         selection_row_frame = ttk.Frame(frame_modelo)
         selection_row_frame.pack(fill='x', padx=10, pady=5)
         ttk.Label(selection_row_frame, text="Escolha o modelo:").pack(side='left')
-        self.combo_modelo = ttk.Combobox(selection_row_frame, values=list(self.modelos.keys()), state='readonly', width=20)
+        self.combo_modelo = ttk.Combobox(selection_row_frame, values=list(self.lista_modelos), state='readonly', width=20)
         self.combo_modelo.pack(side='left', padx=5)
-        self.combo_modelo.set('Random Forest'); self.combo_modelo.bind("<<ComboboxSelected>>", self._on_model_select)
+        self.combo_modelo.bind("<<ComboboxSelected>>", self._on_model_select)
 
         ttk.Separator(frame_modelo, orient='horizontal').pack(fill='x', pady=5, padx=5, side='top')
 
@@ -257,6 +524,8 @@ class MoviePredictorApp(ThemedTk):
         ttk.Label(labels_col_frame, text="Acurácia:", style='Metric.TLabel').pack(anchor='w', pady=1)
         ttk.Label(labels_col_frame, text="Precisão:", style='Metric.TLabel').pack(anchor='w', pady=1)
         ttk.Label(labels_col_frame, text="F1-Score:", style='Metric.TLabel').pack(anchor='w', pady=1)
+        ttk.Label(labels_col_frame, text="Latência (p99):", style='Metric.TLabel').pack(anchor='w', pady=1)
+        ttk.Label(labels_col_frame, text="Tamanho:", style='Metric.TLabel').pack(anchor='w', pady=1)
 
         # Adiciona os rótulos de valor na coluna direita (alinhados à direita)
         self.acc_label_val = ttk.Label(values_col_frame, text="---", style='Metric.TLabel')
@@ -265,6 +534,10 @@ class MoviePredictorApp(ThemedTk):
         self.prec_label_val.pack(anchor='e', pady=1)
         self.f1_label_val = ttk.Label(values_col_frame, text="---", style='Metric.TLabel')
         self.f1_label_val.pack(anchor='e', pady=1)
+        self.latencia_label_val = ttk.Label(values_col_frame, text="---", style='Metric.TLabel')
+        self.latencia_label_val.pack(anchor='e', pady=1)
+        self.tamanho_label_val = ttk.Label(values_col_frame, text="---", style='Metric.TLabel')
+        self.tamanho_label_val.pack(anchor='e', pady=1)
         
         # ===== FIM DA SEÇÃO CORRIGIDA =====
 
@@ -290,10 +563,18 @@ class MoviePredictorApp(ThemedTk):
         inner_result_frame = ttk.Frame(frame_resultado); inner_result_frame.pack(pady=10)
         self.result_icon_label = ttk.Label(inner_result_frame); self.result_text_label = ttk.Label(inner_result_frame, text="Aguardando dados...", style='Default.TLabel')
         self.result_icon_label.pack(side='left', padx=(0, 5)); self.result_text_label.pack(side='left')
-        frame_botoes = ttk.Frame(frame_resultado); frame_botoes.pack(pady=(5, 10), padx=10, fill='x', expand=True)
+        # Barra de ocupado: só aparece enquanto uma previsão está em andamento
+        self.busy_bar = ttk.Progressbar(frame_resultado, mode='indeterminate')
+        self.frame_botoes = frame_botoes = ttk.Frame(frame_resultado); frame_botoes.pack(pady=(5, 10), padx=10, fill='x', expand=True)
         self.clear_button = ttk.Button(frame_botoes, text="Limpar", image=self.icon_clear, compound="left", command=self._clear_fields); self.clear_button.pack(side='right', padx=(5, 0), fill='x', expand=True)
         self.predict_button = ttk.Button(frame_botoes, text="Prever Sucesso", image=self.icon_predict, compound="left", command=self._predict); self.predict_button.pack(side='left', padx=(0, 5), fill='x', expand=True)
+        # Todas as combinações de gênero × idioma (ou orçamento × votos) em uma previsão só
+        self.whatif_button = ttk.Button(frame_botoes, text="E se...", command=self._open_what_if); self.whatif_button.pack(side='left', padx=5, fill='x', expand=True)
         
+        # Mudar qualquer entrada descarta a previsão em andamento, que seria de dados antigos
+        for entry in self.entries.values(): entry.entry.bind('<KeyRelease>', self._cancel_pending_prediction, add='+')
+        for combo in (self.combo_gen1, self.combo_idioma1): combo.bind('<<ComboboxSelected>>', self._cancel_pending_prediction, add='+')
+
         self._on_model_select()
 
     def _clear_results(self):
@@ -312,6 +593,7 @@ class MoviePredictorApp(ThemedTk):
             label.config(text=f"🎬 ...")
 
     def _clear_fields(self):
+        self._cancel_pending_prediction()
         for widget in self.entries.values(): widget.delete(0, 'end');
         self.combo_gen1.set(''); self.combo_idioma1.set('');
         self._clear_results(); self.predict_button.focus()
@@ -321,105 +603,349 @@ class MoviePredictorApp(ThemedTk):
         for nome_campo, widget in campos_a_checar.items():
             if not widget.get().strip(): messagebox.showwarning('Campo Obrigatório', f'O campo "{nome_campo}" não pode estar vazio.'); widget.focus(); return None
         try:
-            inputs = {}; year = float(self.entries['ano'].get());
-            if not (1800 <= year <= 2100): messagebox.showerror('Erro de Validação', "O ano deve ser entre 1800 e 2100."); self.entries['ano'].focus(); return None
-            inputs['year'] = year; duration = float(self.entries['duração'].get());
-            if duration <= 0: messagebox.showerror('Erro de Validação', "A duração deve ser um número positivo."); self.entries['duração'].focus(); return None
-            inputs['duration'] = duration; votes = float(self.entries['quantidade'].get());
-            if votes < 0: messagebox.showerror('Erro de Validação', "A quantidade de votos não pode ser negativa."); self.entries['quantidade'].focus(); return None
-            inputs['votes'] = votes; budget = float(self.entries['orçamento'].get());
-            if budget < 0: messagebox.showerror('Erro de Validação', "O orçamento não pode ser negativo."); self.entries['orçamento'].focus(); return None
-            inputs['budget'] = budget; inputs['genero'] = self.combo_gen1.get(); inputs['idioma'] = self.combo_idioma1.get();
+            # Mesmas faixas do servidor e da previsão em lote (codificador.REGRAS_NUMERICAS)
+            inputs = {}
+            for campo, chave in (('year', 'ano'), ('duration', 'duração'), ('votes', 'quantidade'), ('budget', 'orçamento')):
+                inputs[campo] = float(self.entries[chave].get()); erro = erro_de_faixa(campo, inputs[campo])
+                if erro: messagebox.showerror('Erro de Validação', erro); self.entries[chave].focus(); return None
+            inputs['genero'] = self.combo_gen1.get(); inputs['idioma'] = self.combo_idioma1.get();
             if not inputs['genero']: messagebox.showwarning('Campo Obrigatório', 'Por favor, selecione um gênero.'); self.combo_gen1.focus(); return None
             if not inputs['idioma']: messagebox.showwarning('Campo Obrigatório', 'Por favor, selecione um idioma.'); self.combo_idioma1.focus(); return None
             return inputs
         except ValueError: messagebox.showerror('Erro de Entrada', 'Por favor, verifique os campos numéricos.\nEles devem conter apenas números válidos.'); return None
 
-    def _display_factors(self, user_inputs, nome_modelo):
+    def _rank_factors(self, user_inputs, nome_modelo):
+        """Roda no worker de previsão: [(nome exibido, importância, campo)] dos 3 fatores principais, ou None."""
+        if nome_modelo not in self.feature_importances:
+            return None
+
+        # Ranking dos numéricos já vem pronto do artefato: só o gênero e o idioma entram na comparação
+        nomes = {key: self.feature_map.get(key, key.capitalize()) for key in ['year', 'duration', 'votes', 'budget']}
+        nomes['genero'] = f"🎬 Gênero: {user_inputs['genero']}"
+        nomes['idioma'] = f"🌐 Idioma: {user_inputs['idioma']}"
+        fatores = self.feature_importances.top_fatores(nome_modelo, user_inputs['genero'], user_inputs['idioma'])
+        return [(nomes[campo], importancia, campo) for campo, importancia in fatores]
+
+    def _explain_prediction(self, modelo, linha, user_inputs):
+        """
+        Roda no worker de previsão: contribuição de cada fator para a probabilidade
+        de sucesso desta entrada (caminho nas árvores). None para modelos sem suporte.
+        """
+        if not hasattr(modelo, 'contribuicoes'):
+            return None
+        _, contrib = modelo.contribuicoes(linha)
+        posicoes = self._codificador.posicoes
+        colunas = {key: key for key in ['year', 'duration', 'votes', 'budget']}
+        colunas['genero'], colunas['idioma'] = user_inputs['genero'], user_inputs['idioma']
+        return {campo: float(contrib[0, posicoes[coluna]]) for campo, coluna in colunas.items() if coluna in posicoes}
+
+    def _display_factors(self, fatores, contribuicoes=None):
         # Limpar os labels antes de preencher
         for num_label, name_label in self.factor_labels:
             num_label.config(text="...")
             name_label.config(text="")
             
-        if nome_modelo not in self.feature_importances:
+        if fatores is None:
             self.factor_labels[0][0].config(text="1.")
             self.factor_labels[0][1].config(text="Análise de fatores não disponível.")
             return
 
-        importances_modelo = self.feature_importances[nome_modelo]
-        user_features = {}
-        for key in ['year', 'duration', 'votes', 'budget']:
-            friendly_name = self.feature_map.get(key, key.capitalize())
-            user_features[friendly_name] = importances_modelo.get(key, 0)
-        
-        genero_nome = f"🎬 Gênero: {user_inputs['genero']}"
-        idioma_nome = f"🌐 Idioma: {user_inputs['idioma']}"
-        user_features[genero_nome] = importances_modelo.get(user_inputs['genero'], 0)
-        user_features[idioma_nome] = importances_modelo.get(user_inputs['idioma'], 0)
-        
-        sorted_features = sorted(user_features.items(), key=lambda item: item[1], reverse=True)
-        
         # Atualiza os labels separados
-        for i, (feature_name, importance) in enumerate(sorted_features[:3]):
+        for i, (feature_name, importance, campo) in enumerate(fatores):
             num_label, name_label = self.factor_labels[i]
             
             # Divide o nome (ex: "🗓️ Ano de Lançamento") em ícone e texto
             parts = feature_name.split(" ", 1)
             icon = parts[0]
             name = parts[1] if len(parts) > 1 else ""
+            # Quanto este fator empurrou a probabilidade de sucesso desta previsão, em pontos percentuais
+            if contribuicoes and campo in contribuicoes: name += f"  ({contribuicoes[campo] * 100:+.1f} p.p.)"
 
             num_label.config(text=f"{i+1}. {icon}")
             name_label.config(text=name)
 
-    def _display_similar_movies(self, df_input, modelo_knn):
-        try:
-            _, indices = modelo_knn.kneighbors(df_input, n_neighbors=3)
-            original_indices = [self.train_indices[i] for i in indices[0]]
-            for i, original_idx in enumerate(original_indices):
-                title = self.movie_titles.get(str(original_idx), "Título não encontrado")
-                # Adiciona o emoji antes do título
-                self.similar_labels[i].config(text=f"🎬 {title}")
-        except Exception as e:
+    def _search_similar_movies(self, entrada, modelo_knn):
+        """Roda no worker de previsão: devolve os títulos dos 3 filmes mais próximos."""
+        if self.indice_similares is not None: _, indices = self.indice_similares.buscar(entrada, k=3)
+        else: _, indices = modelo_knn.kneighbors(entrada, n_neighbors=3)
+        return self.titulos_filmes.titulos(indices[0])
+
+    def _display_similar_movies(self, titulos, erro=None):
+        if erro is not None:
             for i, label in enumerate(self.similar_labels): label.config(text=f"{i+1}. Erro ao buscar")
-            print(f"Erro na busca de similares: {e}")
+            print(f"Erro na busca de similares: {erro}")
+            return
+        for i, title in enumerate(titulos):
+            # Adiciona o emoji antes do título
+            self.similar_labels[i].config(text=f"🎬 {title}")
 
     def _predict(self):
+        """Valida na thread do Tk e agenda a inferência; o clique nunca espera o modelo."""
         user_inputs = self._validate_inputs();
         if user_inputs is None: return
         nome_modelo_escolhido = self.combo_modelo.get();
         if not nome_modelo_escolhido: messagebox.showwarning('Seleção de Modelo', 'Por favor, escolha um modelo de IA antes de prever.'); return
-        
+
+        if self._reload_if_changed(self._predict): return
+        self._cancel_pending_prediction()
         self._clear_results()
 
-        modelo_a_usar = self.modelos[nome_modelo_escolhido]
-        
-        try:
-            numeric_cols = ['year', 'duration', 'votes', 'budget']; dtypes = {col: 'float64' for col in self.colunas_modelo if col in numeric_cols}
-            novo_df = pd.DataFrame(0, index=[0], columns=self.colunas_modelo).astype(dtypes)
-            for col in numeric_cols:
-                if col in novo_df.columns: novo_df.loc[0, col] = user_inputs[col]
-            if user_inputs['genero'] in novo_df.columns: novo_df.loc[0, user_inputs['genero']] = 1
-            if user_inputs['idioma'] in novo_df.columns: novo_df.loc[0, user_inputs['idioma']] = 1
-            
-            colunas_existentes_no_df = [c for c in numeric_cols if c in novo_df.columns]
-            if colunas_existentes_no_df: novo_df.loc[:, colunas_existentes_no_df] = self.scaler.transform(novo_df[colunas_existentes_no_df])
-            
-            resultado = modelo_a_usar.predict(novo_df)[0]
-            
-            if resultado == 1:
-                self.result_text_label.config(text="PREVISÃO: SUCESSO", style='Success.TLabel')
-                self.result_icon_label.config(image=self.icon_success)
-            else:
-                self.result_text_label.config(text="PREVISÃO: FRACASSO", style='Failure.TLabel')
-                self.result_icon_label.config(image=self.icon_failure)
-            
-            if nome_modelo_escolhido in self.feature_importances: self._display_factors(user_inputs, nome_modelo_escolhido)
-            if nome_modelo_escolhido == 'KNN': self._display_similar_movies(novo_df, modelo_a_usar)
+        # Entradas já previstas com os mesmos artefatos: mostra o resultado guardado na hora
+        chave = CachePrevisoes.chave(nome_modelo_escolhido, user_inputs)
+        em_cache = self.cache_previsoes.obter(chave)
+        if em_cache is not None:
+            self._show_prediction({**em_cache, 'nome_modelo': nome_modelo_escolhido, 'user_inputs': user_inputs, 'erro': None})
+            return
 
-        except Exception as e:
-            messagebox.showerror('Erro Inesperado na Previsão', f'Ocorreu um erro durante a previsão: {e}')
+        self._set_busy(True)
+        # Cliques repetidos em sequência viram uma única previsão (a última)
+        pedido = (self._id_pedido, nome_modelo_escolhido, user_inputs, time.perf_counter())
+        self._debounce_previsao = self.after(ATRASO_DEBOUNCE_MS, self._submit_prediction, pedido)
+
+    def _submit_prediction(self, pedido):
+        self._debounce_previsao = None
+        self._futuro_previsao = self.executor_previsao.submit(self._run_prediction, *pedido, time.perf_counter())
+        if not self._poll_previsoes_ativo:
+            self._poll_previsoes_ativo = True
+            self.after(INTERVALO_POLL_MS, self._poll_predictions)
+
+    def _cancel_pending_prediction(self, event=None):
+        """Descarta a previsão em andamento; chamado quando as entradas mudam ou há um novo pedido."""
+        self._id_pedido += 1
+        if self._debounce_previsao is not None:
+            self.after_cancel(self._debounce_previsao)
+            self._debounce_previsao = None
+        if self._futuro_previsao is not None:
+            # Só cancela se ainda estiver na fila; se já começou, o resultado é ignorado pelo id
+            self._futuro_previsao.cancel()
+            self._futuro_previsao = None
+        if self._ocupado:
+            self._set_busy(False)
             self._clear_results()
 
+    def _run_prediction(self, id_pedido, nome_modelo, user_inputs, clicado_em, enviado_em):
+        """Roda no worker de previsão (fora da thread do Tk) e coloca o resultado na fila."""
+        inicio = time.perf_counter()
+        resposta = {'id': id_pedido, 'nome_modelo': nome_modelo, 'user_inputs': user_inputs,
+                    'clicado_em': clicado_em, 'fila': inicio - enviado_em, 'erro': None}
+        if id_pedido != self._id_pedido:
+            # Ficou velho enquanto esperava na fila: nem roda o modelo
+            return
+        # A versão não muda no meio da previsão (ver _apply_version)
+        with self._trava_versao:
+            if id_pedido != self._id_pedido: return
+            try:
+                modelo_a_usar = self._get_model(nome_modelo)
+                # Posições das colunas e vetores do scaler calculados uma vez; cada clique só preenche um array
+                if self._codificador is None: self._codificador = CodificadorLinha(self.colunas_modelo, self.scaler)
+                linha = self._codificador.codificar(user_inputs)
+
+                # DataFrame só para quem guarda nomes de colunas (não os treinados com main.py --esparso)
+                entrada = entrada_do_modelo(modelo_a_usar, linha, self.colunas_modelo)
+                resposta['resultado'] = modelo_a_usar.predict(entrada)[0]
+                resposta['fatores'] = self._rank_factors(user_inputs, nome_modelo)
+                resposta['contribuicoes'] = self._explain_prediction(modelo_a_usar, linha, user_inputs)
+
+                if nome_modelo == 'KNN':
+                    try: resposta['similares'] = self._search_similar_movies(entrada, modelo_a_usar)
+                    except Exception as e: resposta['erro_similares'] = e
+            except Exception as e:
+                resposta['erro'] = e
+        resposta['inferencia'] = time.perf_counter() - inicio
+        self._fila_previsoes.put(resposta)
+
+    def _poll_predictions(self):
+        """Lê a fila de resultados pelo after(); só a thread do Tk mexe nos widgets."""
+        while True:
+            try: resposta = self._fila_previsoes.get_nowait()
+            except queue.Empty: break
+            # Resultado de um pedido já substituído ou cancelado
+            if resposta['id'] != self._id_pedido: continue
+            self._futuro_previsao = None
+            self._set_busy(False)
+            if resposta['erro'] is None and 'erro_similares' not in resposta:
+                self.cache_previsoes.guardar(CachePrevisoes.chave(resposta['nome_modelo'], resposta['user_inputs']),
+                                             {campo: resposta.get(campo) for campo in ('resultado', 'fatores', 'contribuicoes', 'similares')})
+            self._show_prediction(resposta)
+
+        if self._ocupado or not self._fila_previsoes.empty():
+            self.after(INTERVALO_POLL_MS, self._poll_predictions)
+        else:
+            self._poll_previsoes_ativo = False
+
+    def _show_prediction(self, resposta):
+        if resposta['erro'] is not None:
+            messagebox.showerror('Erro Inesperado na Previsão', f"Ocorreu um erro durante a previsão: {resposta['erro']}")
+            self._clear_results()
+            return
+
+        if 'inferencia' not in resposta:
+            estatisticas = self.cache_previsoes.estatisticas()
+            print(f"⏱ Previsão ({resposta['nome_modelo']}): do cache | acertos {estatisticas['acertos']} "
+                  f"| falhas {estatisticas['falhas']} | taxa {estatisticas['taxa_acerto']:.0%}")
+        else:
+            self._record_latency(resposta)
+
+        if resposta['resultado'] == 1:
+            self.result_text_label.config(text="PREVISÃO: SUCESSO", style='Success.TLabel')
+            self.result_icon_label.config(image=self.icon_success)
+        else:
+            self.result_text_label.config(text="PREVISÃO: FRACASSO", style='Failure.TLabel')
+            self.result_icon_label.config(image=self.icon_failure)
+
+        nome_modelo_escolhido = resposta['nome_modelo']
+        if nome_modelo_escolhido in self.feature_importances: self._display_factors(resposta['fatores'], resposta.get('contribuicoes'))
+        if nome_modelo_escolhido == 'KNN': self._display_similar_movies(resposta.get('similares'), resposta.get('erro_similares'))
+
+    def _record_latency(self, resposta):
+        # fila: do envio ao worker até começar a rodar; total: do clique até a tela (inclui o debounce)
+        latencia = {'fila': resposta['fila'], 'inferencia': resposta['inferencia'],
+                    'total': time.perf_counter() - resposta['clicado_em']}
+        self.latencias_previsao.append(latencia)
+        print(f"⏱ Previsão ({resposta['nome_modelo']}): fila {latencia['fila'] * 1000:.1f} ms "
+              f"| inferência {latencia['inferencia'] * 1000:.1f} ms | clique até a tela {latencia['total'] * 1000:.0f} ms")
+
+    def _set_busy(self, ocupado):
+        """Indicador de ocupado: barra animada, texto e cursor de espera."""
+        self._ocupado = ocupado
+        if ocupado:
+            self.result_text_label.config(text="Calculando...", style='Default.TLabel')
+            self.busy_bar.pack(fill='x', padx=40, pady=(0, 5), before=self.frame_botoes)
+            self.busy_bar.start(15)
+            self.config(cursor='watch')
+        else:
+            self.busy_bar.stop()
+            self.busy_bar.pack_forget()
+            self.config(cursor='')
+
+    # ==================== ANÁLISE "E SE..." ====================
+    def _open_what_if(self):
+        """Abre (ou traz para a frente) a janela "E se..." e calcula a grade com as entradas atuais."""
+        user_inputs = self._validate_inputs()
+        if user_inputs is None: return
+        nome_modelo = self.combo_modelo.get()
+        if not nome_modelo: messagebox.showwarning('Seleção de Modelo', 'Por favor, escolha um modelo de IA antes de prever.'); return
+        if self._reload_if_changed(self._open_what_if): return
+        self._entradas_cenario, self._modelo_cenario = user_inputs, nome_modelo
+        if self._janela_cenarios is None: self._create_what_if_window()
+        else: self._janela_cenarios.lift()
+        self._run_what_if()
+
+    def _create_what_if_window(self):
+        janela = self._janela_cenarios = tk.Toplevel(self)
+        janela.title("CineScope - E se..."); janela.geometry("580x540")
+        janela.protocol('WM_DELETE_WINDOW', self._close_what_if)
+
+        topo = ttk.Frame(janela, padding=10); topo.pack(fill='x')
+        ttk.Label(topo, text="Variar:").pack(side='left')
+        self.combo_modo_cenario = ttk.Combobox(topo, values=MODOS_CENARIO, state='readonly', width=18)
+        self.combo_modo_cenario.set(MODOS_CENARIO[0]); self.combo_modo_cenario.pack(side='left', padx=5)
+        self.combo_modo_cenario.bind("<<ComboboxSelected>>", self._run_what_if)
+        # Pares sem nenhum filme de treino são extrapolação do modelo
+        self.so_vistos_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(topo, text="Só pares com filmes no treino", variable=self.so_vistos_var, command=self._run_what_if).pack(side='left', padx=5)
+        self.status_cenario_label = ttk.Label(janela, text="", style='Metric.TLabel'); self.status_cenario_label.pack(fill='x', padx=10)
+
+        # Ranking (gênero × idioma) e mapa de calor (orçamento × votos): só um fica visível
+        self.frame_ranking = ttk.Frame(janela)
+        colunas = ('posicao', 'genero', 'idioma', 'probabilidade', 'filmes', 'taxa')
+        titulos = ('#', 'Gênero', 'Idioma', 'P(sucesso)', 'Filmes no treino', 'Sucesso no treino')
+        self.tree_ranking = ttk.Treeview(self.frame_ranking, columns=colunas, show='headings')
+        for coluna, titulo, largura in zip(colunas, titulos, (40, 110, 110, 80, 100, 110)):
+            self.tree_ranking.heading(coluna, text=titulo); self.tree_ranking.column(coluna, width=largura, anchor='center')
+        self.tree_ranking.tag_configure('atual', background='#dbe9ff')
+        barra = ttk.Scrollbar(self.frame_ranking, orient='vertical', command=self.tree_ranking.yview)
+        self.tree_ranking.configure(yscrollcommand=barra.set)
+        self.tree_ranking.pack(side='left', fill='both', expand=True); barra.pack(side='right', fill='y')
+        self.canvas_mapa = tk.Canvas(janela, background='white', highlightthickness=0)
+
+    def _close_what_if(self):
+        self._id_cenario += 1
+        self._janela_cenarios.destroy()
+        self._janela_cenarios = None
+
+    def _run_what_if(self, event=None):
+        """Agenda a grade do modo escolhido no worker de previsão; o resultado volta pelo after()."""
+        self._id_cenario += 1
+        self.status_cenario_label.config(text=f"Calculando ({self._modelo_cenario})...")
+        futuro = self.executor_previsao.submit(self._compute_what_if, self._id_cenario, self.combo_modo_cenario.get(),
+                                               self._modelo_cenario, dict(self._entradas_cenario), self.so_vistos_var.get())
+        self.after(INTERVALO_POLL_MS, self._poll_what_if, futuro)
+
+    def _compute_what_if(self, id_cenario, modo, nome_modelo, entradas, so_vistos):
+        """Roda no worker de previsão: a grade inteira em uma única chamada ao modelo (ver cenarios.py)."""
+        resultado = {'id': id_cenario, 'modo': modo, 'nome_modelo': nome_modelo, 'entradas': entradas, 'erro': None}
+        # Substituído enquanto esperava na fila (outro modo, janela fechada): nem roda o modelo
+        if id_cenario != self._id_cenario: return resultado
+        inicio = time.perf_counter()
+        with self._trava_versao:
+            try:
+                modelo = self._get_model(nome_modelo)
+                if self._codificador is None: self._codificador = CodificadorLinha(self.colunas_modelo, self.scaler)
+                if modo == MODOS_CENARIO[0]:
+                    resultado['ranking'] = ranking_generos_idiomas(modelo, self._codificador, entradas, self.generos, self.idiomas,
+                                                                   self.agregados, so_vistos and self.agregados is not None)
+                else:
+                    resultado['linhas'], resultado['colunas'], resultado['grade'] = varredura(modelo, self._codificador, entradas)
+            except Exception as e:
+                resultado['erro'] = e
+        resultado['segundos'] = time.perf_counter() - inicio
+        return resultado
+
+    def _poll_what_if(self, futuro):
+        if not futuro.done():
+            self.after(INTERVALO_POLL_MS, self._poll_what_if, futuro)
+            return
+        resultado = futuro.result()
+        if resultado['id'] != self._id_cenario or self._janela_cenarios is None: return
+        if resultado['erro'] is not None:
+            self.status_cenario_label.config(text=f"Erro na análise: {resultado['erro']}")
+            return
+        combinacoes = len(resultado['ranking']) if 'ranking' in resultado else resultado['grade'].size
+        print(f"⏱ E se... ({resultado['nome_modelo']}, {resultado['modo']}): {combinacoes} combinações "
+              f"em {resultado['segundos'] * 1000:.0f} ms")
+        if 'ranking' in resultado: self._show_ranking(resultado)
+        else: self._show_heatmap(resultado)
+
+    def _show_ranking(self, resultado):
+        self.canvas_mapa.pack_forget(); self.frame_ranking.pack(fill='both', expand=True, padx=10, pady=(5, 10))
+        ranking, entradas = resultado['ranking'], resultado['entradas']
+        self.tree_ranking.delete(*self.tree_ranking.get_children())
+        for posicao, linha in enumerate(ranking.head(LINHAS_RANKING).itertuples(index=False), start=1):
+            filmes = "---" if pd.isna(linha.filmes) else f"{int(linha.filmes):,}"
+            taxa = "---" if pd.isna(linha.taxa_sucesso) else f"{linha.taxa_sucesso:.0%}"
+            atual = linha.genero == entradas['genero'] and linha.idioma == entradas['idioma']
+            self.tree_ranking.insert('', 'end', values=(posicao, linha.genero, linha.idioma, f"{linha.probabilidade:.1%}", filmes, taxa),
+                                     tags=('atual',) if atual else ())
+
+        texto = f"{resultado['nome_modelo']}: {len(ranking)} pares em {resultado['segundos'] * 1000:.0f} ms"
+        if len(ranking) > LINHAS_RANKING: texto += f" (os {LINHAS_RANKING} mais prováveis)"
+        atual = np.flatnonzero((ranking['genero'] == entradas['genero']).to_numpy() & (ranking['idioma'] == entradas['idioma']).to_numpy())
+        if len(atual): texto += f" | {entradas['genero']} / {entradas['idioma']}: {atual[0] + 1}º"
+        self.status_cenario_label.config(text=texto)
+
+    def _show_heatmap(self, resultado):
+        self.frame_ranking.pack_forget(); self.canvas_mapa.pack(fill='both', expand=True, padx=10, pady=(5, 10))
+        linhas, colunas, grade, entradas = resultado['linhas'], resultado['colunas'], resultado['grade'], resultado['entradas']
+        canvas = self.canvas_mapa; canvas.delete('all')
+        largura, altura = CELULA_MAPA; x0, y0 = 80, 40
+        canvas.create_text(x0 + largura * len(colunas) / 2, 10, text="Votos →", font=('Segoe UI', 9, 'bold'))
+        canvas.create_text(x0 - 8, 10, text="Orçamento ↓", anchor='e', font=('Segoe UI', 9, 'bold'))
+        for j, votos in enumerate(colunas):
+            canvas.create_text(x0 + largura * (j + 0.5), y0 - 10, text=_abreviar(votos), font=('Segoe UI', 8))
+        for i, orcamento in enumerate(linhas):
+            y = y0 + altura * i
+            canvas.create_text(x0 - 8, y + altura / 2, text=_abreviar(orcamento), anchor='e', font=('Segoe UI', 8))
+            for j, probabilidade in enumerate(grade[i]):
+                x = x0 + largura * j
+                canvas.create_rectangle(x, y, x + largura, y + altura, fill=_cor_probabilidade(probabilidade), outline='white')
+                canvas.create_text(x + largura / 2, y + altura / 2, text=f"{probabilidade:.0%}", font=('Segoe UI', 8))
+        # Célula mais próxima dos valores digitados
+        i = int(np.argmin(np.abs(linhas - entradas['budget']))); j = int(np.argmin(np.abs(colunas - entradas['votes'])))
+        canvas.create_rectangle(x0 + largura * j, y0 + altura * i, x0 + largura * (j + 1), y0 + altura * (i + 1), outline='black', width=2)
+        self.status_cenario_label.config(text=f"{resultado['nome_modelo']}: {grade.size} combinações em {resultado['segundos'] * 1000:.0f} ms "
+                                              f"| {entradas['genero']} / {entradas['idioma']} | P(sucesso) de {grade.min():.0%} a {grade.max():.0%}")
+
 if __name__ == "__main__":
     app = MoviePredictorApp()
     app.mainloop()
\ No newline at end of file
@@ -0,0 +1,457 @@
+import numpy as np
+import pandas as pd
+import argparse
+import json
+import joblib
+import math
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from artefatos import (listar_modelos, carregar_modelo, carregar_json, entrada_do_modelo, DIRETORIO_INDICE_SIMILARES,
+                       DIRETORIO_TITULOS)
+from codificador import CodificadorLinha, COLUNAS_NUMERICAS, erro_de_faixa
+from fatores import Importancias
+from indice_similaridade import IndiceSimilaridade
+from titulos import carregar_titulos
+from manifesto import validar_manifesto
+from custos_modelos import modelo_selecionado, melhor_modelo
+
+# ==================== SERVIDOR DE INFERÊNCIA ====================
+# Serve as previsões da interface por HTTP local, sem Tkinter. Os artefatos de
+# artefatos_modelo são carregados uma vez na subida (modelos mapeados em memória,
+# como na interface) e cada pedido é um JSON com as mesmas entradas da janela:
+#
+#   POST /prever     {"modelo": "Random Forest", "year": 2010, "duration": 120, "votes": 50000,
+#                     "budget": 15000000, "genero": "Drama", "idioma": "English"}
+#                    -> {"previsao": 1, "probabilidade": 0.73}
+#                    sem "modelo": o escolhido pelo orçamento do treino (custos_modelos.py) ou,
+#                    sem orçamento, o de maior f1_score em metricas_modelos.json
+#   POST /explicar   mesmas entradas -> os 3 fatores principais e, nos modelos de
+#                    árvores, quanto cada um empurrou a probabilidade de sucesso
+#   POST /similares  mesmas entradas (sem "modelo", "k" opcional) -> títulos mais próximos
+#   GET  /modelos    modelos disponíveis e suas métricas
+#   GET  /metricas   contadores de latência e throughput por rota e tamanho dos lotes
+#   GET  /saude
+#
+# Micro-lotes: cada rota/modelo tem uma fila e uma thread própria. A thread
+# pega o primeiro pedido, espera até --janela-ms por outros (ou até
+# --lote-maximo) e roda uma chamada vetorizada para o lote inteiro
+# (codificar_lote + predict_proba, top_fatores_lote + contribuicoes, uma busca
+# no índice). Sob carga o custo fixo de cada chamada é dividido pelo lote;
+# um pedido isolado só paga a janela.
+#
+#   python servidor_inferencia.py --porta 8765 --janela-ms 2 --lote-maximo 64
+
+PORTA_PADRAO = 8765
+JANELA_MS_PADRAO = 2.0
+LOTE_MAXIMO_PADRAO = 64
+# Quanto um pedido espera pelo lote antes de desistir
+TEMPO_MAXIMO_S = 30.0
+# Latências guardadas por rota para os percentis
+N_LATENCIAS = 10_000
+K_SIMILARES = 3
+K_MAXIMO = 50
+
+
+class ErroRequisicao(Exception):
+    """Erro do cliente: vira uma resposta com o status e a mensagem."""
+
+    def __init__(self, mensagem, status=400):
+        super().__init__(mensagem)
+        self.status = status
+
+
+def validar_entradas(dados, generos, idiomas):
+    """As mesmas regras de MoviePredictorApp._validate_inputs, sobre um dicionário vindo do JSON."""
+    entradas = {}
+    for campo in COLUNAS_NUMERICAS:
+        if dados.get(campo) is None:
+            raise ErroRequisicao(f'O campo "{campo}" é obrigatório.')
+        try:
+            valor = float(dados[campo])
+        except (TypeError, ValueError):
+            raise ErroRequisicao(f'O campo "{campo}" deve ser um número.')
+        if not math.isfinite(valor):
+            raise ErroRequisicao(f'O campo "{campo}" deve ser um número finito.')
+        entradas[campo] = valor
+    for campo in COLUNAS_NUMERICAS:
+        erro = erro_de_faixa(campo, entradas[campo])
+        if erro:
+            raise ErroRequisicao(erro)
+    for campo, rotulo, validos in (('genero', 'Gênero', generos), ('idioma', 'Idioma', idiomas)):
+        valor = dados.get(campo)
+        if not valor:
+            raise ErroRequisicao(f'O campo "{campo}" é obrigatório.')
+        if not isinstance(valor, str) or valor not in validos:
+            raise ErroRequisicao(f'{rotulo} desconhecido: "{valor}".')
+        entradas[campo] = valor
+    return entradas
+
+
+class AgrupadorLotes:
+    """
+    Junta pedidos concorrentes em lotes. `processar(itens)` recebe a lista de
+    itens de um lote e devolve a lista de resultados, na mesma ordem.
+    """
+
+    def __init__(self, nome, processar, janela_s, lote_maximo):
+        self.nome = nome
+        self.processar = processar
+        self.janela_s = janela_s
+        self.lote_maximo = max(1, lote_maximo)
+        self.fila = queue.Queue()
+        self._trava = threading.Lock()
+        self.lotes, self.itens, self.maior_lote, self.segundos = 0, 0, 0, 0.0
+        self.thread = threading.Thread(target=self._laco, name=f'lotes-{nome}', daemon=True)
+        self.thread.start()
+
+    def enviar(self, item):
+        futuro = Future()
+        self.fila.put((item, futuro))
+        return futuro
+
+    def fechar(self):
+        self.fila.put(None)
+        self.thread.join()
+
+    def _laco(self):
+        while True:
+            pedido = self.fila.get()
+            if pedido is None:
+                return
+            lote = [pedido]
+            prazo = time.perf_counter() + self.janela_s
+            fechar = False
+            # Sem janela ainda junta o que já estava na fila
+            while len(lote) < self.lote_maximo:
+                restante = prazo - time.perf_counter()
+                try:
+                    pedido = self.fila.get(timeout=restante) if restante > 0 else self.fila.get_nowait()
+                except queue.Empty:
+                    break
+                if pedido is None:
+                    fechar = True
+                    break
+                lote.append(pedido)
+            self._executar(lote)
+            if fechar:
+                return
+
+    def _executar(self, lote):
+        inicio = time.perf_counter()
+        try:
+            resultados = self.processar([item for item, _ in lote])
+        except Exception as e:
+            for _, futuro in lote:
+                futuro.set_exception(e)
+        else:
+            for (_, futuro), resultado in zip(lote, resultados):
+                futuro.set_result(resultado)
+        with self._trava:
+            self.lotes += 1
+            self.itens += len(lote)
+            self.maior_lote = max(self.maior_lote, len(lote))
+            self.segundos += time.perf_counter() - inicio
+
+    def estatisticas(self):
+        with self._trava:
+            return {'lotes': self.lotes, 'pedidos': self.itens, 'maior_lote': self.maior_lote,
+                    'media_por_lote': self.itens / self.lotes if self.lotes else 0.0,
+                    'ms_por_lote': self.segundos / self.lotes * 1000 if self.lotes else 0.0}
+
+
+class Contadores:
+    """Pedidos, erros e latências por rota (thread-safe)."""
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self._trava = threading.Lock()
+        self.rotas = {}
+
+    def registrar(self, rota, segundos, erro=False):
+        with self._trava:
+            contador = self.rotas.setdefault(rota, {'pedidos': 0, 'erros': 0,
+                                                    'latencias': deque(maxlen=N_LATENCIAS)})
+            contador['pedidos'] += 1
+            contador['erros'] += int(erro)
+            contador['latencias'].append(segundos * 1000)
+
+    def resumo(self):
+        with self._trava:
+            decorrido = time.perf_counter() - self.inicio
+            resumo = {}
+            for rota, contador in self.rotas.items():
+                p50, p90, p99 = np.percentile(contador['latencias'], [50, 90, 99])
+                resumo[rota] = {'pedidos': contador['pedidos'], 'erros': contador['erros'],
+                                'pedidos_por_segundo': contador['pedidos'] / decorrido,
+                                'latencia_p50_ms': p50, 'latencia_p90_ms': p90, 'latencia_p99_ms': p99}
+            return {'segundos_ativo': decorrido, 'rotas': resumo}
+
+
+class ServicoInferencia:
+    """Artefatos carregados uma vez e um AgrupadorLotes por rota/modelo."""
+
+    def __init__(self, base_path='artefatos_modelo', janela_ms=JANELA_MS_PADRAO, lote_maximo=LOTE_MAXIMO_PADRAO):
+        inicio = time.perf_counter()
+        self.base_path = base_path
+        self.janela_s = janela_ms / 1000
+        self.lote_maximo = lote_maximo
+        # Artefatos misturados de treinos diferentes são recusados antes de abrir os modelos (manifesto.py)
+        self.manifesto, self.avisos_manifesto = validar_manifesto(base_path)
+        self.lista_modelos = listar_modelos(base_path)
+        self.metricas = carregar_json(base_path, 'metricas_modelos.json')
+        # Pedidos sem "modelo": o do orçamento do treino ou, sem seleção, o melhor pelas métricas
+        self.modelo_padrao = modelo_selecionado(base_path, self.lista_modelos) or \
+            melhor_modelo(self.metricas, self.lista_modelos)
+        self.generos = set(carregar_json(base_path, 'generos_lista.json'))
+        self.idiomas = set(carregar_json(base_path, 'idiomas_lista.json'))
+        self.colunas = carregar_json(base_path, 'colunas_modelo.json')
+        self.codificador = CodificadorLinha(self.colunas, joblib.load(os.path.join(base_path, 'scaler.joblib')))
+        self.importancias = Importancias.carregar(base_path)
+        # Arrays mapeados do disco, como na interface: vários servidores compartilham as páginas
+        self.modelos = {nome: carregar_modelo(base_path, nome, arquivo) for nome, arquivo in self.lista_modelos.items()}
+        caminho_indice = os.path.join(base_path, DIRETORIO_INDICE_SIMILARES)
+        self.indice_similares = IndiceSimilaridade.carregar(caminho_indice) if os.path.isdir(caminho_indice) else None
+        self.titulos_filmes = carregar_titulos(base_path, DIRETORIO_TITULOS)
+        self.contadores = Contadores()
+        self._agrupadores = {}
+        self._trava = threading.Lock()
+        self.segundos_carregamento = time.perf_counter() - inicio
+
+    # ----------------------------- lotes ------------------------------
+
+    def _agrupador(self, operacao, nome_modelo, processar):
+        chave = f'{operacao}/{nome_modelo}' if nome_modelo else operacao
+        with self._trava:
+            if chave not in self._agrupadores:
+                self._agrupadores[chave] = AgrupadorLotes(chave, processar, self.janela_s, self.lote_maximo)
+            return self._agrupadores[chave]
+
+    def _codificar(self, entradas):
+        numericas = pd.DataFrame([{c: e[c] for c in COLUNAS_NUMERICAS} for e in entradas])
+        return self.codificador.codificar_lote(numericas, [e['genero'] for e in entradas],
+                                               [e['idioma'] for e in entradas])
+
+    def _entrada_modelo(self, modelo, X):
+        return entrada_do_modelo(modelo, X, self.colunas)
+
+    def _prever_lote(self, nome_modelo, entradas):
+        modelo = self.modelos[nome_modelo]
+        proba = modelo.predict_proba(self._entrada_modelo(modelo, self._codificar(entradas)))
+        classes = np.asarray(modelo.classes_)
+        previsoes = classes[np.argmax(proba, axis=1)]
+        sucesso = proba[:, list(classes).index(1)]
+        return [{'previsao': int(p), 'probabilidade': float(s)} for p, s in zip(previsoes, sucesso)]
+
+    def _explicar_lote(self, nome_modelo, entradas):
+        modelo = self.modelos[nome_modelo]
+        generos, idiomas = [e['genero'] for e in entradas], [e['idioma'] for e in entradas]
+        campos = self.importancias.top_fatores_lote(nome_modelo, generos, idiomas)
+        vies, contrib = None, None
+        if hasattr(modelo, 'contribuicoes'):
+            vies, contrib = modelo.contribuicoes(self._codificar(entradas))
+        posicoes = self.codificador.posicoes
+        respostas = []
+        for i, entrada in enumerate(entradas):
+            fatores = []
+            for campo in campos[i]:
+                coluna = entrada[campo] if campo in ('genero', 'idioma') else campo
+                fator = {'campo': campo, 'coluna': coluna,
+                         'importancia': self.importancias.importancia(nome_modelo, coluna)}
+                if contrib is not None and coluna in posicoes:
+                    fator['contribuicao'] = float(contrib[i, posicoes[coluna]])
+                fatores.append(fator)
+            respostas.append({'fatores': fatores} if vies is None else {'fatores': fatores, 'taxa_base': vies})
+        return respostas
+
+    def _similares_lote(self, pedidos):
+        entradas = [entrada for entrada, _ in pedidos]
+        k = max(k for _, k in pedidos)
+        X = self._codificar(entradas)
+        if self.indice_similares is not None:
+            distancias, indices = self.indice_similares.buscar(X, k=k)
+        else:
+            modelo_knn = self.modelos['KNN']
+            distancias, indices = modelo_knn.kneighbors(self._entrada_modelo(modelo_knn, X), n_neighbors=k)
+        return [{'similares': [{'titulo': self.titulos_filmes[int(p)], 'distancia': float(d)}
+                               for p, d in zip(indices[i, :k_item], distancias[i, :k_item]) if p >= 0]}
+                for i, (_, k_item) in enumerate(pedidos)]
+
+    # ------------------------------ rotas -----------------------------
+
+    def _modelo_pedido(self, dados):
+        nome_modelo = dados.get('modelo') or self.modelo_padrao
+        if nome_modelo is None:
+            raise ErroRequisicao(f'O campo "modelo" é obrigatório. Disponíveis: {list(self.modelos)}')
+        if nome_modelo not in self.modelos:
+            raise ErroRequisicao(f'Modelo desconhecido: "{nome_modelo}". Disponíveis: {list(self.modelos)}')
+        return nome_modelo
+
+    def _esperar(self, futuro):
+        try:
+            return futuro.result(timeout=TEMPO_MAXIMO_S)
+        except TimeoutError:
+            raise ErroRequisicao("Tempo esgotado esperando o lote.", status=503)
+
+    def prever(self, dados):
+        nome_modelo = self._modelo_pedido(dados)
+        entradas = validar_entradas(dados, self.generos, self.idiomas)
+        agrupador = self._agrupador('prever', nome_modelo, lambda itens: self._prever_lote(nome_modelo, itens))
+        return {'modelo': nome_modelo, **self._esperar(agrupador.enviar(entradas))}
+
+    def explicar(self, dados):
+        nome_modelo = self._modelo_pedido(dados)
+        if nome_modelo not in self.importancias:
+            raise ErroRequisicao(f'Análise de fatores não disponível para o modelo "{nome_modelo}".')
+        entradas = validar_entradas(dados, self.generos, self.idiomas)
+        agrupador = self._agrupador('explicar', nome_modelo, lambda itens: self._explicar_lote(nome_modelo, itens))
+        return {'modelo': nome_modelo, **self._esperar(agrupador.enviar(entradas))}
+
+    def similares(self, dados):
+        if self.indice_similares is None and 'KNN' not in self.modelos:
+            raise ErroRequisicao("Busca de similares não disponível: sem índice nem modelo KNN.")
+        try:
+            k = int(dados.get('k', K_SIMILARES))
+        except (TypeError, ValueError):
+            raise ErroRequisicao('O campo "k" deve ser um inteiro.')
+        if not 1 <= k <= K_MAXIMO:
+            raise ErroRequisicao(f'O campo "k" deve ser entre 1 e {K_MAXIMO}.')
+        entradas = validar_entradas(dados, self.generos, self.idiomas)
+        agrupador = self._agrupador('similares', None, self._similares_lote)
+        return self._esperar(agrupador.enviar((entradas, k)))
+
+    def listar(self):
+        return {'versao': self.manifesto['versao'] if self.manifesto else None, 'padrao': self.modelo_padrao,
+                'modelos': {nome: {'metricas': self.metricas.get(nome),
+                                   'fatores': nome in self.importancias,
+                                   'contribuicoes': hasattr(modelo, 'contribuicoes')}
+                            for nome, modelo in self.modelos.items()}}
+
+    def estatisticas(self):
+        with self._trava:
+            agrupadores = list(self._agrupadores.items())
+        return {**self.contadores.resumo(), 'janela_ms': self.janela_s * 1000, 'lote_maximo': self.lote_maximo,
+                'lotes': {chave: agrupador.estatisticas() for chave, agrupador in agrupadores}}
+
+    def aquecer(self, generos, idiomas):
+        """Uma previsão por modelo para trazer as páginas dos arrays mapeados antes do primeiro pedido."""
+        entrada = {'year': 2000.0, 'duration': 100.0, 'votes': 1000.0, 'budget': 1e6,
+                   'genero': generos[0], 'idioma': idiomas[0]}
+        for nome_modelo in self.modelos:
+            self._prever_lote(nome_modelo, [entrada])
+            if nome_modelo in self.importancias:
+                self._explicar_lote(nome_modelo, [entrada])
+        if self.indice_similares is not None or 'KNN' in self.modelos:
+            self._similares_lote([(entrada, K_SIMILARES)])
+
+    def fechar(self):
+        with self._trava:
+            agrupadores, self._agrupadores = list(self._agrupadores.values()), {}
+        for agrupador in agrupadores:
+            agrupador.fechar()
+
+
+class ManipuladorHTTP(BaseHTTPRequestHandler):
+    # HTTP/1.1 mantém a conexão aberta entre pedidos do mesmo cliente
+    protocol_version = 'HTTP/1.1'
+    # Cabeçalho e corpo saem em dois send(): com o Nagle ligado o corpo espera o ACK atrasado
+    # do cliente (~40 ms por pedido) e os clientes ficam ociosos em vez de formar lotes
+    disable_nagle_algorithm = True
+    servico = None
+    rotas_get = {'/saude': lambda servico: {'status': 'ok'},
+                 '/modelos': ServicoInferencia.listar,
+                 '/metricas': ServicoInferencia.estatisticas}
+    rotas_post = {'/prever': ServicoInferencia.prever,
+                  '/explicar': ServicoInferencia.explicar,
+                  '/similares': ServicoInferencia.similares}
+
+    def do_GET(self):
+        self._responder(self.rotas_get, lambda: ())
+
+    def do_POST(self):
+        self._responder(self.rotas_post, self._ler_json)
+
+    def _ler_json(self):
+        tamanho = int(self.headers.get('Content-Length') or 0)
+        try:
+            dados = json.loads(self.rfile.read(tamanho) or b'{}')
+        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            raise ErroRequisicao(f"JSON inválido: {e}")
+        if not isinstance(dados, dict):
+            raise ErroRequisicao("O corpo deve ser um objeto JSON.")
+        return (dados,)
+
+    def _responder(self, rotas, argumentos):
+        inicio = time.perf_counter()
+        rota = self.path.split('?', 1)[0]
+        status = 200
+        try:
+            # O corpo é lido mesmo se a rota não existir, senão sobra na conexão mantida aberta
+            argumentos = argumentos()
+            if rota not in rotas:
+                raise ErroRequisicao(f"Rota não encontrada: {self.command} {rota}", status=404)
+            corpo = rotas[rota](self.servico, *argumentos)
+        except ErroRequisicao as e:
+            status, corpo = e.status, {'erro': str(e)}
+        except Exception as e:
+            status, corpo = 500, {'erro': f"{type(e).__name__}: {e}"}
+        dados = json.dumps(corpo, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(dados)))
+        self.end_headers()
+        self.wfile.write(dados)
+        if rota in self.rotas_post:
+            self.servico.contadores.registrar(rota, time.perf_counter() - inicio, erro=status != 200)
+
+    def log_message(self, formato, *args):
+        # Um print por pedido custaria mais que a própria previsão; os números ficam em /metricas
+        pass
+
+
+class ServidorHTTP(ThreadingHTTPServer):
+    """Uma thread por conexão, todas usando o mesmo ServicoInferencia."""
+    daemon_threads = True
+    # Com muitos clientes conectando juntos, a fila padrão do listen (5) recusaria conexões
+    request_queue_size = 256
+
+
+def criar_servidor(servico, host='127.0.0.1', porta=PORTA_PADRAO):
+    manipulador = type('Manipulador', (ManipuladorHTTP,), {'servico': servico})
+    return ServidorHTTP((host, porta), manipulador)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor HTTP local de inferência do CineScope, com micro-lotes.")
+    parser.add_argument('--artefatos', default='artefatos_modelo', help="Diretório dos artefatos gerados pelo main.py.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--porta', type=int, default=PORTA_PADRAO)
+    parser.add_argument('--janela-ms', type=float, default=JANELA_MS_PADRAO,
+                        help="Quanto o primeiro pedido de um lote espera por outros.")
+    parser.add_argument('--lote-maximo', type=int, default=LOTE_MAXIMO_PADRAO,
+                        help="Pedidos por lote (1 desliga os micro-lotes).")
+    args = parser.parse_args()
+
+    servico = ServicoInferencia(args.artefatos, args.janela_ms, args.lote_maximo)
+    servico.aquecer(sorted(servico.generos), sorted(servico.idiomas))
+    servidor = criar_servidor(servico, args.host, args.porta)
+    print(f"✔ Artefatos carregados em {servico.segundos_carregamento * 1000:.0f} ms ({', '.join(servico.modelos)})")
+    for aviso in servico.avisos_manifesto:
+        print(f"AVISO: {aviso}")
+    print(f"✔ Servidor de inferência em http://{args.host}:{servidor.server_address[1]} "
+          f"(janela {args.janela_ms:g} ms, lotes de até {args.lote_maximo})", flush=True)
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+        servico.fechar()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+import numpy as np
+import argparse
+import http.client
+import json
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+from artefatos import carregar_json
+
+# ==================== TESTE DE CARGA DO SERVIDOR ====================
+# Dispara pedidos concorrentes contra o servidor_inferencia.py e mede
+# throughput e latência do lado do cliente. Sem --url, sobe o servidor duas
+# vezes em um subprocesso, sem micro-lotes (--lote-maximo 1) e com eles,
+# com as mesmas entradas, para mostrar o ganho dos lotes:
+#
+#   python teste_carga.py --rota prever --modelo "Random Forest" --clientes 32 --pedidos 100
+#   python teste_carga.py --url http://127.0.0.1:8765 --rota similares
+
+DIRETORIO = os.path.dirname(os.path.abspath(__file__))
+# Abaixo desse ganho de pedidos/s os micro-lotes não valem a janela que cada pedido espera
+LIMIAR_GANHO = 1.1
+
+
+def _entradas(base_path, n, seed):
+    """Entradas válidas sorteadas nas mesmas faixas do botão de dados aleatórios da interface."""
+    rng = np.random.default_rng(seed)
+    generos = carregar_json(base_path, 'generos_lista.json')
+    idiomas = carregar_json(base_path, 'idiomas_lista.json')
+    return [{'year': int(rng.integers(1850, 2026)), 'duration': int(rng.integers(1, 301)),
+             'votes': int(rng.integers(0, 4_000_001)), 'budget': int(rng.integers(0, 1_000_000_001)),
+             'genero': str(rng.choice(generos)), 'idioma': str(rng.choice(idiomas))} for _ in range(n)]
+
+
+def _pedir(conexao, metodo, rota, dados=None):
+    corpo = json.dumps(dados).encode('utf-8') if dados is not None else None
+    conexao.request(metodo, rota, body=corpo, headers={'Content-Type': 'application/json'} if corpo else {})
+    resposta = conexao.getresponse()
+    return resposta.status, json.loads(resposta.read())
+
+
+def disparar(host, porta, rota, entradas, n_clientes):
+    """Cada cliente (uma thread com conexão própria) envia a sua fatia das entradas em sequência."""
+    latencias = [[] for _ in range(n_clientes)]
+    erros = [0] * n_clientes
+    barreira = threading.Barrier(n_clientes + 1)
+
+    def cliente(i):
+        conexao = http.client.HTTPConnection(host, porta, timeout=60)
+        barreira.wait()
+        for dados in entradas[i::n_clientes]:
+            inicio = time.perf_counter()
+            status, _ = _pedir(conexao, 'POST', rota, dados)
+            latencias[i].append((time.perf_counter() - inicio) * 1000)
+            erros[i] += status != 200
+        conexao.close()
+
+    threads = [threading.Thread(target=cliente, args=(i,)) for i in range(n_clientes)]
+    for thread in threads:
+        thread.start()
+    barreira.wait()
+    inicio = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    segundos = time.perf_counter() - inicio
+    todas = np.concatenate([np.array(l) for l in latencias])
+    p50, p90, p99 = np.percentile(todas, [50, 90, 99])
+    return {'pedidos': len(todas), 'erros': sum(erros), 'segundos': segundos,
+            'pedidos_por_segundo': len(todas) / segundos, 'p50_ms': p50, 'p90_ms': p90, 'p99_ms': p99}
+
+
+def _subir_servidor(base_path, janela_ms, lote_maximo):
+    """Sobe o servidor em uma porta livre e devolve (processo, porta) quando ele estiver aceitando pedidos."""
+    processo = subprocess.Popen(
+        [sys.executable, '-u', os.path.join(DIRETORIO, 'servidor_inferencia.py'), '--artefatos', base_path,
+         '--porta', '0', '--janela-ms', str(janela_ms), '--lote-maximo', str(lote_maximo)],
+        stdout=subprocess.PIPE, text=True)
+    for linha in processo.stdout:
+        encontrado = re.search(r'http://[^:]+:(\d+)', linha)
+        if encontrado:
+            return processo, int(encontrado.group(1))
+    processo.wait()
+    raise RuntimeError(f"O servidor terminou sem subir (código {processo.returncode})")
+
+
+def _rodada(rotulo, host, porta, rota, entradas, n_clientes):
+    conexao = http.client.HTTPConnection(host, porta, timeout=60)
+    # Aquecimento: conexões, páginas mapeadas e o agrupador da rota
+    disparar(host, porta, rota, entradas[:n_clientes * 2], n_clientes)
+    resultado = disparar(host, porta, rota, entradas, n_clientes)
+    _, metricas = _pedir(conexao, 'GET', '/metricas')
+    conexao.close()
+    lotes = [estatisticas for chave, estatisticas in metricas['lotes'].items()
+             if chave.startswith(rota.strip('/'))]
+    media = lotes[0]['media_por_lote'] if lotes else float('nan')
+    print(f"⏱ {rotulo}: {resultado['pedidos_por_segundo']:,.0f} pedidos/s | p50 {resultado['p50_ms']:.1f} ms "
+          f"| p90 {resultado['p90_ms']:.1f} ms | p99 {resultado['p99_ms']:.1f} ms "
+          f"| {media:.1f} pedidos por lote" + (f" | {resultado['erros']} erro(s)" if resultado['erros'] else ""))
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga do servidor de inferência do CineScope.")
+    parser.add_argument('--url', default=None,
+                        help="Servidor já rodando (ex.: http://127.0.0.1:8765). Sem ele, compara com e sem lotes.")
+    parser.add_argument('--artefatos', default='artefatos_modelo')
+    parser.add_argument('--rota', choices=['prever', 'explicar', 'similares'], default='prever')
+    parser.add_argument('--modelo', default='Random Forest')
+    parser.add_argument('--clientes', type=int, default=32, help="Clientes concorrentes.")
+    parser.add_argument('--pedidos', type=int, default=100, help="Pedidos por cliente.")
+    parser.add_argument('--janela-ms', type=float, default=2.0)
+    parser.add_argument('--lote-maximo', type=int, default=64)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rota = '/' + args.rota
+    entradas = [dict(e, modelo=args.modelo) for e in _entradas(args.artefatos, args.clientes * args.pedidos, args.seed)]
+    print(f"{'='*60}\nTeste de carga: POST {rota}" + (f" ({args.modelo})" if args.rota != 'similares' else "")
+          + f" | {args.clientes} clientes x {args.pedidos} pedidos\n{'='*60}")
+
+    if args.url:
+        encontrado = re.match(r'http://([^:/]+):(\d+)', args.url)
+        if not encontrado:
+            parser.error("--url deve ser no formato http://host:porta")
+        _rodada("servidor", encontrado.group(1), int(encontrado.group(2)), rota, entradas, args.clientes)
+        return
+
+    resultados = {}
+    for rotulo, janela_ms, lote_maximo in (("sem lotes", 0, 1),
+                                           (f"com lotes ({args.janela_ms:g} ms, até {args.lote_maximo})",
+                                            args.janela_ms, args.lote_maximo)):
+        processo, porta = _subir_servidor(args.artefatos, janela_ms, lote_maximo)
+        try:
+            resultados[rotulo] = _rodada(rotulo, '127.0.0.1', porta, rota, entradas, args.clientes)
+        finally:
+            processo.terminate()
+            processo.wait()
+    sem, com = resultados.values()
+    ganho = com['pedidos_por_segundo'] / sem['pedidos_por_segundo']
+    resumo = f"{ganho:.1f}x pedidos/s | p50 {sem['p50_ms']:.1f} -> {com['p50_ms']:.1f} ms"
+    if ganho > LIMIAR_GANHO:
+        print(f"✔ Ganho dos micro-lotes: {resumo}")
+    else:
+        # Com poucos clientes quase não há pedidos para juntar e a janela só soma espera
+        print(f"AVISO: os micro-lotes não compensaram com {args.clientes} clientes ({resumo}). "
+              f"Aumente --clientes ou rode o servidor com --lote-maximo 1.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+import numpy as np
+import json
+import os
+
+# ==================== TÍTULOS DOS FILMES ====================
+# O painel de filmes similares recebe posições do conjunto de treino e precisa
+# dos títulos. Antes isso eram dois JSONs (movie_titles.json, um dicionário
+# {índice original: título}, e train_indices.json, posição -> índice original)
+# lidos inteiros na abertura da interface. Aqui os títulos já ficam na ordem
+# das posições de treino, concatenados em UTF-8, com um array de offsets:
+#
+#   titulos.bin   os títulos codificados em UTF-8, um depois do outro
+#   offsets.npy   int64 (n + 1,): o título i ocupa bin[offsets[i]:offsets[i + 1]]
+#
+# Os dois são abertos mapeados em memória; só as páginas dos títulos
+# realmente exibidos são lidas do disco.
+
+ARQUIVO_TEXTO = 'titulos.bin'
+ARQUIVO_OFFSETS = 'offsets.npy'
+# Formato antigo, ainda lido como fallback
+ARQUIVO_TITULOS_JSON = 'movie_titles.json'
+ARQUIVO_INDICES_JSON = 'train_indices.json'
+TITULO_NAO_ENCONTRADO = "Título não encontrado"
+
+
+class EscritorTitulos:
+    """
+    Grava a loja de títulos em blocos (o modo streaming escreve chunk a chunk).
+    `n_titulos` é o total de títulos que serão adicionados.
+    """
+
+    def __init__(self, diretorio, n_titulos):
+        os.makedirs(diretorio, exist_ok=True)
+        self.diretorio = diretorio
+        self.n_titulos = n_titulos
+        self.offsets = np.lib.format.open_memmap(os.path.join(diretorio, ARQUIVO_OFFSETS), mode='w+',
+                                                 dtype=np.int64, shape=(n_titulos + 1,))
+        self.offsets[0] = 0
+        self.arquivo = open(os.path.join(diretorio, ARQUIVO_TEXTO), 'wb')
+        self.posicao = 0
+
+    def adicionar(self, titulos):
+        codificados = [str(t).encode('utf-8') for t in titulos]
+        if not codificados:
+            return
+        tamanhos = np.fromiter((len(c) for c in codificados), dtype=np.int64, count=len(codificados))
+        fim = self.posicao + len(codificados)
+        if fim > self.n_titulos:
+            raise ValueError(f"Mais títulos que o previsto ({self.n_titulos})")
+        self.offsets[self.posicao + 1:fim + 1] = self.offsets[self.posicao] + np.cumsum(tamanhos)
+        self.arquivo.write(b''.join(codificados))
+        self.posicao = fim
+
+    def fechar(self):
+        if self.posicao != self.n_titulos:
+            raise ValueError(f"Foram adicionados {self.posicao} títulos, mas {self.n_titulos} eram esperados")
+        self.arquivo.close()
+        self.offsets.flush()
+        del self.offsets
+
+
+def salvar_titulos(diretorio, titulos):
+    """Grava `titulos` (na ordem das posições de treino) em `diretorio`. Retorna o diretório."""
+    titulos = list(titulos)
+    escritor = EscritorTitulos(diretorio, len(titulos))
+    escritor.adicionar(titulos)
+    escritor.fechar()
+    return diretorio
+
+
+def acrescentar_titulos(diretorio, titulos):
+    """
+    Acrescenta `titulos` ao fim de uma loja existente (as próximas posições de
+    treino) sem regravar o texto já gravado. Retorna o novo total de títulos.
+    """
+    codificados = [str(t).encode('utf-8') for t in titulos]
+    caminho_offsets = os.path.join(diretorio, ARQUIVO_OFFSETS)
+    offsets = np.load(caminho_offsets)
+    novos = offsets[-1] + np.cumsum([len(c) for c in codificados], dtype=np.int64)
+    with open(os.path.join(diretorio, ARQUIVO_TEXTO), 'r+b') as f:
+        # Trunca no fim registrado: bytes de uma tentativa anterior interrompida não contam
+        f.seek(int(offsets[-1]))
+        f.truncate()
+        f.write(b''.join(codificados))
+    # Os offsets vão por último: até o rename a loja continua válida com os títulos antigos
+    temporario = caminho_offsets + '.tmp.npy'
+    np.save(temporario, np.concatenate((offsets, novos)))
+    os.replace(temporario, caminho_offsets)
+    return len(offsets) - 1 + len(codificados)
+
+
+class TitulosFilmes:
+    """Posição no conjunto de treino -> título, sobre os arrays mapeados."""
+
+    def __init__(self, offsets, texto):
+        self.offsets = offsets
+        self.texto = texto
+
+    @classmethod
+    def carregar(cls, diretorio, mmap_mode='r'):
+        offsets = np.load(os.path.join(diretorio, ARQUIVO_OFFSETS), mmap_mode=mmap_mode)
+        caminho_texto = os.path.join(diretorio, ARQUIVO_TEXTO)
+        # np.memmap não aceita arquivo vazio
+        if os.path.getsize(caminho_texto):
+            texto = np.memmap(caminho_texto, dtype=np.uint8, mode='r')
+        else:
+            texto = np.empty(0, dtype=np.uint8)
+        return cls(offsets, texto)
+
+    @classmethod
+    def de_json(cls, base_path):
+        """Artefatos antigos: monta a loja em memória a partir dos dois JSONs."""
+        with open(os.path.join(base_path, ARQUIVO_TITULOS_JSON), 'r', encoding='utf-8') as f:
+            por_indice = json.load(f)
+        with open(os.path.join(base_path, ARQUIVO_INDICES_JSON), 'r', encoding='utf-8') as f:
+            indices_treino = json.load(f)
+        codificados = [str(por_indice.get(str(i), TITULO_NAO_ENCONTRADO)).encode('utf-8') for i in indices_treino]
+        offsets = np.zeros(len(codificados) + 1, dtype=np.int64)
+        np.cumsum([len(c) for c in codificados], out=offsets[1:])
+        return cls(offsets, np.frombuffer(b''.join(codificados), dtype=np.uint8))
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, posicao):
+        if not 0 <= posicao < len(self):
+            return TITULO_NAO_ENCONTRADO
+        inicio, fim = int(self.offsets[posicao]), int(self.offsets[posicao + 1])
+        return self.texto[inicio:fim].tobytes().decode('utf-8')
+
+    def titulos(self, posicoes):
+        return [self[int(p)] for p in posicoes]
+
+
+def carregar_titulos(base_path, diretorio):
+    """A loja compacta em base_path/diretorio ou, em artefatos antigos, os JSONs."""
+    caminho = os.path.join(base_path, diretorio)
+    if os.path.isdir(caminho):
+        return TitulosFilmes.carregar(caminho)
+    return TitulosFilmes.de_json(base_path)
+
+
+if __name__ == "__main__":
+    # Compara abertura e memória da loja compacta com os JSONs antigos:
+    #   python titulos.py [numero_de_titulos]
+    import gc
+    import shutil
+    import sys
+    import tempfile
+    import time
+
+    def rss_mb():
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rng = np.random.default_rng(42)
+    palavras = np.array(['The', 'Last', 'Night', 'Love', 'Dark', 'City', 'Return', 'of', 'King', 'Ação', 'Cœur', '夜'])
+    titulos = [' '.join(rng.choice(palavras, size=rng.integers(1, 6))) + f' {i}' for i in range(n)]
+    # Índices originais espalhados, como depois da limpeza e do train_test_split
+    indices_treino = rng.permutation(int(n * 1.25))[:n].tolist()
+    por_indice = {str(i): t for i, t in zip(indices_treino, titulos)}
+
+    diretorio = tempfile.mkdtemp()
+    try:
+        with open(os.path.join(diretorio, ARQUIVO_TITULOS_JSON), 'w') as f:
+            json.dump(por_indice, f, indent=2)
+        with open(os.path.join(diretorio, ARQUIVO_INDICES_JSON), 'w') as f:
+            json.dump(indices_treino, f)
+        salvar_titulos(os.path.join(diretorio, 'titulos'), titulos)
+        del por_indice
+        gc.collect()
+
+        def tamanho(*nomes):
+            return sum(os.path.getsize(os.path.join(diretorio, nome)) for nome in nomes) / 2**20
+
+        print(f"{'='*40}\n{n} títulos\n{'='*40}")
+        print(f"JSON: {tamanho(ARQUIVO_TITULOS_JSON, ARQUIVO_INDICES_JSON):.1f} MB | "
+              f"compacto: {tamanho('titulos/' + ARQUIVO_TEXTO, 'titulos/' + ARQUIVO_OFFSETS):.1f} MB em disco")
+
+        # Caminho antigo da interface: os dois JSONs inteiros e dois lookups por título
+        antes = rss_mb()
+        inicio = time.perf_counter()
+        with open(os.path.join(diretorio, ARQUIVO_TITULOS_JSON), 'r', encoding='utf-8') as f:
+            movie_titles = json.load(f)
+        with open(os.path.join(diretorio, ARQUIVO_INDICES_JSON), 'r', encoding='utf-8') as f:
+            train_indices = json.load(f)
+        tempo_json = time.perf_counter() - inicio
+        memoria_json = rss_mb() - antes
+        posicoes = rng.integers(0, n, size=3000)
+        inicio = time.perf_counter()
+        esperado = [movie_titles.get(str(train_indices[p]), TITULO_NAO_ENCONTRADO) for p in posicoes]
+        busca_json = (time.perf_counter() - inicio) / len(posicoes) * 1e6
+        del movie_titles, train_indices
+        gc.collect()
+
+        antes = rss_mb()
+        inicio = time.perf_counter()
+        loja = TitulosFilmes.carregar(os.path.join(diretorio, 'titulos'))
+        tempo_compacto = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        obtido = loja.titulos(posicoes)
+        busca_compacto = (time.perf_counter() - inicio) / len(posicoes) * 1e6
+        memoria_compacto = rss_mb() - antes
+
+        status = "✔" if esperado == obtido == [titulos[p] for p in posicoes] else "✘ DIVERGÊNCIA"
+        print(f"{status} Títulos idênticos aos do caminho JSON")
+        print(f"⏱ abertura: JSON {tempo_json * 1000:.0f} ms | compacto {tempo_compacto * 1000:.2f} ms")
+        print(f"⏱ memória residente: JSON +{memoria_json:.0f} MB | compacto +{memoria_compacto:.1f} MB")
+        print(f"⏱ por título: JSON {busca_json:.2f} µs | compacto {busca_compacto:.2f} µs")
+    finally:
+        shutil.rmtree(diretorio, ignore_errors=True)
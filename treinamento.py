@@ -0,0 +1,118 @@
+import joblib
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from joblib import Parallel, delayed
+from sklearn.linear_model import LogisticRegression
+from instrumentacao import medir
+
+# ==================== TREINAMENTO PARALELO ====================
+# Os modelos são treinados ao mesmo tempo em um pool de processos (loky, do joblib).
+# A matriz de treino é gravada uma única vez em disco e cada processo a abre com
+# mmap_mode: as páginas são compartilhadas pelo cache do sistema operacional em vez
+# de cada worker receber uma cópia serializada.
+
+
+# Ainda têm o parâmetro n_jobs, mas ele não faz mais nada (e o sklearn avisa quando recebe um valor)
+SEM_N_JOBS = (LogisticRegression,)
+
+
+def aceita_n_jobs(modelo):
+    return 'n_jobs' in modelo.get_params() and not isinstance(modelo, SEM_N_JOBS)
+
+
+def dividir_cpus(modelos, cpus, processos):
+    """
+    Divide o orçamento de CPUs entre processos (um modelo por processo) e o
+    paralelismo interno (n_jobs) de cada modelo. Modelos sem n_jobs ficam com
+    1 CPU; o restante é dividido entre os que aceitam n_jobs.
+    """
+    if processos < len(modelos):
+        # Nem todos rodam ao mesmo tempo: cada processo fica com a sua fatia
+        return {nome: max(1, cpus // processos) for nome in modelos}
+
+    paralelizaveis = [nome for nome, modelo in modelos.items() if aceita_n_jobs(modelo)]
+    divisao = {nome: 1 for nome in modelos}
+    if paralelizaveis:
+        livres = max(len(paralelizaveis), cpus - (len(modelos) - len(paralelizaveis)))
+        for i, nome in enumerate(paralelizaveis):
+            divisao[nome] = livres // len(paralelizaveis) + (1 if i < livres % len(paralelizaveis) else 0)
+    return divisao
+
+
+@contextmanager
+def matrizes_compartilhadas(**matrizes):
+    """
+    Grava cada matriz uma única vez em um diretório temporário e devolve os caminhos.
+    joblib.load(caminho, mmap_mode='r') mapeia os arrays internos (colunas do
+    DataFrame ou data/indices/indptr da CSR) direto do arquivo em cada worker.
+    """
+    diretorio = tempfile.mkdtemp(prefix='cinescope_treino_')
+    try:
+        caminhos = {}
+        for nome, matriz in matrizes.items():
+            caminhos[nome] = os.path.join(diretorio, f'{nome}.joblib')
+            joblib.dump(matriz, caminhos[nome])
+        yield caminhos
+    finally:
+        shutil.rmtree(diretorio, ignore_errors=True)
+
+
+def carregar_matriz(X):
+    """Abre a matriz mapeada em memória quando recebe um caminho; senão usa o objeto como está."""
+    return joblib.load(X, mmap_mode='r') if isinstance(X, str) else X
+
+
+def _treinar_um(nome, modelo, X_train, X_test, y_train):
+    """
+    Treina e prevê o teste. No pool, X_train/X_test chegam como caminhos dos arquivos mapeados.
+    As medições (tempo e memória, ver instrumentacao.py) voltam para o processo principal registrar.
+    """
+    X_train = carregar_matriz(X_train)
+    X_test = carregar_matriz(X_test)
+
+    with medir(f'fit ({nome})', linhas=X_train.shape[0]) as medicao_fit:
+        modelo.fit(X_train, y_train)
+
+    with medir(f'predict ({nome})', linhas=X_test.shape[0]) as medicao_predict:
+        y_pred = modelo.predict(X_test)
+
+    return nome, modelo, y_pred, medicao_fit, medicao_predict
+
+
+def treinar_modelos(modelos, X_train, y_train, X_test, cpus=None, processos=None):
+    """
+    Treina e avalia os modelos respeitando um orçamento de CPUs.
+    Retorna {nome: (modelo_treinado, y_pred, medicao_fit, medicao_predict)} na ordem de `modelos`;
+    cada medição é o dicionário de instrumentacao.medir, com os segundos em 'segundos'.
+    """
+    cpus = cpus or os.cpu_count() or 1
+    processos = min(processos or cpus, len(modelos), cpus)
+    divisao = dividir_cpus(modelos, cpus, processos)
+
+    n_jobs_original = {}
+    for nome, modelo in modelos.items():
+        if aceita_n_jobs(modelo):
+            n_jobs_original[nome] = modelo.get_params()['n_jobs']
+            modelo.set_params(n_jobs=divisao[nome])
+
+    plano = ", ".join(f"{nome}: {n}" for nome, n in divisao.items())
+    print(f"Orçamento de CPU: {cpus} ({processos} processo(s)) -> {plano}")
+
+    if processos == 1:
+        # Sem pool não há o que compartilhar: treina direto no processo atual
+        resultados = [_treinar_um(nome, modelo, X_train, X_test, y_train) for nome, modelo in modelos.items()]
+    else:
+        with matrizes_compartilhadas(X_train=X_train, X_test=X_test) as caminhos:
+            tarefas = (delayed(_treinar_um)(nome, modelo, caminhos['X_train'], caminhos['X_test'], y_train)
+                       for nome, modelo in modelos.items())
+            resultados = Parallel(n_jobs=processos, backend='loky')(tarefas)
+
+    # O n_jobs do treino não deve ir para os artefatos: na interface cada previsão é de uma linha só
+    for nome, modelo, *_ in resultados:
+        if nome in n_jobs_original:
+            modelo.set_params(n_jobs=n_jobs_original[nome])
+
+    return {nome: (modelo, y_pred, medicao_fit, medicao_predict)
+            for nome, modelo, y_pred, medicao_fit, medicao_predict in resultados}
@@ -0,0 +1,171 @@
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+import os
+from joblib import Parallel, delayed
+from scipy import stats
+from sklearn.base import clone
+from sklearn.metrics import accuracy_score, precision_score, f1_score
+from sklearn.model_selection import StratifiedKFold
+from sklearn.preprocessing import StandardScaler
+from preprocessamento import COLUNAS_PARA_ESCALAR
+from treinamento import matrizes_compartilhadas, carregar_matriz, aceita_n_jobs
+from instrumentacao import medir, registrar
+
+# ==================== VALIDAÇÃO CRUZADA ====================
+# Avalia cada modelo em K folds estratificados do conjunto de treino, com todas
+# as combinações fold × modelo rodando ao mesmo tempo em um pool de processos.
+# A matriz de treino é gravada uma vez e mapeada em cada worker (ver treinamento.py).
+#
+# O scaler é ajustado dentro de cada fold, só com as linhas de treino do fold: as
+# colunas numéricas voltam à escala original (scaler.inverse_transform) uma única
+# vez no processo principal e cada worker as escalona de novo antes do fit.
+#
+# Resultado, em metricas_modelos.json -> <modelo> -> 'validacao_cruzada':
+#   folds                                       K
+#   accuracy / precision / f1_score             {'media', 'desvio', 'ic95': [inf, sup], 'por_fold': [...]}
+#   fit_segundos / predict_segundos             tempos de cada fold
+
+N_FOLDS = 5
+SEMENTE = 42
+CONFIANCA = 0.95
+METRICAS = {'accuracy': accuracy_score, 'precision': precision_score, 'f1_score': f1_score}
+
+
+def _posicoes_numericas(colunas):
+    return [i for i, coluna in enumerate(colunas) if coluna in COLUNAS_PARA_ESCALAR]
+
+
+def _matriz_do_fold(X, numericas, posicoes, indices, scaler):
+    """Linhas `indices` de X com as colunas numéricas escalonadas pelo scaler do fold."""
+    escalonadas = scaler.transform(numericas[indices]).astype(np.float32)
+    if sp.issparse(X):
+        # Na CSR as numéricas são as primeiras colunas (ver features.montar_matriz_esparsa)
+        return sp.hstack([sp.csr_matrix(escalonadas), X[indices][:, len(posicoes):]], format='csr')
+    if isinstance(X, pd.DataFrame):
+        X_fold = X.iloc[indices].copy()
+        X_fold[X.columns[posicoes]] = escalonadas
+        return X_fold
+    X_fold = np.array(X[indices])
+    X_fold[:, posicoes] = escalonadas
+    return X_fold
+
+
+def _avaliar_fold(nome, modelo, fold, X, numericas, y, posicoes, idx_treino, idx_validacao):
+    """Ajusta o scaler e o modelo no treino do fold e mede na validação. Roda nos workers."""
+    X = carregar_matriz(X)
+    numericas = carregar_matriz(numericas)
+    scaler = StandardScaler().fit(numericas[idx_treino])
+    X_treino = _matriz_do_fold(X, numericas, posicoes, idx_treino, scaler)
+    X_validacao = _matriz_do_fold(X, numericas, posicoes, idx_validacao, scaler)
+
+    modelo = clone(modelo)
+    with medir(f'cv fit ({nome})', linhas=len(idx_treino)) as medicao_fit:
+        modelo.fit(X_treino, y[idx_treino])
+    with medir(f'cv predict ({nome})', linhas=len(idx_validacao)) as medicao_predict:
+        y_pred = modelo.predict(X_validacao)
+
+    valores = {metrica: float(funcao(y[idx_validacao], y_pred)) for metrica, funcao in METRICAS.items()}
+    return nome, fold, valores, medicao_fit, medicao_predict
+
+
+def resumir(valores, confianca=CONFIANCA):
+    """Média, desvio padrão amostral e intervalo de confiança (t de Student) dos valores por fold."""
+    valores = np.asarray(valores, dtype=np.float64)
+    media = float(valores.mean())
+    desvio = float(valores.std(ddof=1)) if len(valores) > 1 else 0.0
+    margem = float(stats.t.ppf((1 + confianca) / 2, len(valores) - 1) * desvio / np.sqrt(len(valores))) \
+        if len(valores) > 1 else 0.0
+    return {'media': media, 'desvio': desvio, 'ic95': [media - margem, media + margem], 'por_fold': valores.tolist()}
+
+
+def validacao_cruzada(modelos, X, y, scaler, colunas, n_folds=N_FOLDS, cpus=None):
+    """
+    Avalia `modelos` (não treinados) em `n_folds` folds estratificados de X/y, o
+    treino já escalonado por `scaler`. Retorna {nome: resumo} no formato descrito acima.
+    """
+    cpus = cpus or os.cpu_count() or 1
+    y = np.asarray(y)
+    posicoes = _posicoes_numericas(colunas)
+    if sp.issparse(X):
+        numericas = X[:, posicoes].toarray()
+    else:
+        numericas = np.asarray(X.iloc[:, posicoes] if isinstance(X, pd.DataFrame) else X[:, posicoes])
+    # Pequenas diferenças de arredondamento (float32) em relação aos valores do CSV
+    numericas = scaler.inverse_transform(numericas.astype(np.float64))
+
+    folds = list(StratifiedKFold(n_splits=n_folds, shuffle=True, random_state=SEMENTE).split(numericas, y))
+    # Cada tarefa já é um processo: paralelismo interno dos modelos desligado
+    modelos = {nome: clone(modelo).set_params(n_jobs=1) if aceita_n_jobs(modelo) else clone(modelo)
+               for nome, modelo in modelos.items()}
+    processos = min(cpus, len(modelos) * n_folds)
+    print(f"Validação cruzada: {n_folds} folds × {len(modelos)} modelos em {processos} processo(s)")
+
+    if processos == 1:
+        resultados = [_avaliar_fold(nome, modelo, fold, X, numericas, y, posicoes, treino, validacao)
+                      for nome, modelo in modelos.items() for fold, (treino, validacao) in enumerate(folds)]
+    else:
+        with matrizes_compartilhadas(X=X, numericas=numericas) as caminhos:
+            tarefas = (delayed(_avaliar_fold)(nome, modelo, fold, caminhos['X'], caminhos['numericas'], y, posicoes,
+                                              treino, validacao)
+                       for nome, modelo in modelos.items() for fold, (treino, validacao) in enumerate(folds))
+            resultados = Parallel(n_jobs=processos, backend='loky')(tarefas)
+
+    por_modelo = {nome: [None] * n_folds for nome in modelos}
+    tempos = {nome: {'fit_segundos': [None] * n_folds, 'predict_segundos': [None] * n_folds} for nome in modelos}
+    for nome, fold, valores, medicao_fit, medicao_predict in resultados:
+        registrar(medicao_fit)
+        registrar(medicao_predict)
+        por_modelo[nome][fold] = valores
+        tempos[nome]['fit_segundos'][fold] = medicao_fit['segundos']
+        tempos[nome]['predict_segundos'][fold] = medicao_predict['segundos']
+
+    resumo = {}
+    for nome, valores_folds in por_modelo.items():
+        resumo[nome] = {'folds': n_folds,
+                        **{metrica: resumir([v[metrica] for v in valores_folds]) for metrica in METRICAS},
+                        **tempos[nome]}
+        m = resumo[nome]
+        print(f"{nome}: Acurácia {formatar(m['accuracy'])} | Precisão {formatar(m['precision'])} | "
+              f"F1-Score {formatar(m['f1_score'])} | fit {np.mean(m['fit_segundos']):.2f}s/fold")
+    return resumo
+
+
+def formatar(resumo_metrica):
+    """'0.712 ± 0.004' a partir do resumo de uma métrica."""
+    return f"{resumo_metrica['media']:.3f} ± {resumo_metrica['desvio']:.3f}"
+
+
+def verificar_determinismo(modelos, X, y, scaler, colunas, n_folds=N_FOLDS, cpus=None):
+    """
+    Roda a validação cruzada com 1 processo e com `cpus` (padrão: todas, no
+    mínimo 2, para a comparação não ser trivial em máquinas de 1 CPU) e confere
+    se as métricas de cada fold são idênticas. Retorna (iguais, {cpus: resumo}).
+    """
+    resumos = {}
+    for n_cpus in (1, max(2, cpus or os.cpu_count() or 1)):
+        resumos[n_cpus] = validacao_cruzada(modelos, X, y, scaler, colunas, n_folds=n_folds, cpus=n_cpus)
+    iguais = all(resumos[c][nome][metrica]['por_fold'] == resumos[1][nome][metrica]['por_fold']
+                 for c in resumos for nome in resumos[1] for metrica in METRICAS)
+    return iguais, resumos
+
+
+if __name__ == "__main__":
+    # Compara a validação cruzada com 1 processo e com todas as CPUs (também roda
+    # na seção "equivalencia" do benchmark.py); sai com código 1 se divergir:
+    #   python validacao_cruzada.py [caminho_csv] [folds]
+    import sys
+    import time
+    from main import preparar_dados_em_memoria, criar_modelos
+
+    caminho = sys.argv[1] if len(sys.argv) > 1 else 'imdb_filmes.csv'
+    n_folds = int(sys.argv[2]) if len(sys.argv) > 2 else N_FOLDS
+    dados = preparar_dados_em_memoria(caminho)
+
+    inicio = time.perf_counter()
+    iguais, _ = verificar_determinismo(criar_modelos(), dados['X_train'], dados['y_train'], dados['scaler'],
+                                       dados['colunas'], n_folds=n_folds)
+    print(f"⏱ {time.perf_counter() - inicio:.2f}s")
+    print(f"{'✔' if iguais else '✘ DIVERGÊNCIA'} Métricas por fold iguais em todas as configurações: {iguais}")
+    if not iguais:
+        sys.exit(1)